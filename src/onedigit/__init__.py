@@ -10,8 +10,43 @@ from onedigit.info import (  # noqa: F401 I001
     __bugtrack_url__,
 )
 from onedigit.logger import get_logger
-from onedigit.model import Combo, Model
-from onedigit.simple import advance, calculate, get_model
+from onedigit.operators import Operator, parse_ops
+from onedigit import powers, bounds  # noqa: F401
+from onedigit.model import Combo, Improvement, Model, RoundBuffer, RunStats
+from onedigit import kernels, specialized, threads, shards  # noqa: F401
+from onedigit.propagate import Propagator
+from onedigit import goals  # noqa: F401
+from onedigit.simple import advance, advance_iter, calculate, get_model
+from onedigit.template import calculate_all
+from onedigit.columns import Columns
+from onedigit.loader import load_model
+from onedigit.merge import merge_snapshots
+from onedigit.store import ModelStore
+from onedigit import verify, approximate, decompose, plan, benchmark  # noqa: F401
+from onedigit.distributed import Coordinator
+from onedigit.schedule import AdaptiveScheduler
 from onedigit.cli import main
 
-__all__ = ["Combo", "Model", "advance", "calculate", "get_model", "get_logger", "main"]
+__all__ = [
+    "AdaptiveScheduler",
+    "Columns",
+    "Coordinator",
+    "Combo",
+    "Improvement",
+    "Model",
+    "ModelStore",
+    "Operator",
+    "Propagator",
+    "RoundBuffer",
+    "RunStats",
+    "advance",
+    "advance_iter",
+    "calculate",
+    "calculate_all",
+    "get_model",
+    "get_logger",
+    "load_model",
+    "main",
+    "merge_snapshots",
+    "parse_ops",
+]
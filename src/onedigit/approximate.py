@@ -0,0 +1,323 @@
+"""Upper bounds on the cost of every value of huge ranges, from a small exact table."""
+
+import array
+import itertools
+import random
+import time
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Cost of values without a bound (costs are kept in bytes)
+NO_BOUND = 255
+
+# Bases used for the decompositions: the largest values of each cost in the table
+BASES_PER_COST = 3
+
+# Each level of the range is this much larger than the values it is built from
+_GROWTH = 1.5
+
+# Tables that add a constant to every byte, saturating at NO_BOUND
+_ADD = [bytes(min(NO_BOUND, x + k) if x != NO_BOUND else NO_BOUND for x in range(256)) for k in range(256)]
+
+
+class ApproximateTable:
+    """
+    Upper bounds on the cost of every value from 1 to 'max_value'.
+
+    Values in the exact table keep their cost. Larger values are built
+    greedily against it, as 'q * b + r' or 'q * b - s', where 'b' is one
+    of a few cheap bases of the table, the remainders 'r' and 's' are
+    smaller than 'b' (so their cost is exact) and the quotient 'q' is a
+    smaller value with a bound of its own. The range is filled in levels,
+    each one built from the values below it, with one slice per base and
+    remainder, so the work per value is a few byte operations.
+
+    Costs are kept in one byte per value; expressions are only built
+    when asked for (see 'combo'), by finding the decomposition again.
+    Sampling (see 'sample') then tries products and sums of random pairs,
+    picking cheap operands more often, and keeps those that lower a bound.
+
+    The bounds are costs of valid expressions, not the best ones: the
+    exact engines can start from them (see 'warm_start').
+
+    Args:
+        table (onedigit.Model): exact model for the digit, run to convergence.
+        max_value (int): largest value to bound.
+        bases_per_cost (int, optional): bases taken for every cost. More bases give lower
+            bounds, and take longer. Defaults to BASES_PER_COST.
+
+    Raises:
+        ValueError: when the table does not use addition, subtraction and multiplication.
+    """
+
+    def __init__(self, table: onedigit.Model, max_value: int, *, bases_per_cost: int = BASES_PER_COST) -> None:
+        if not {"+", "-", "*"}.issubset(table.ops):
+            raise ValueError("the table must use addition, subtraction and multiplication")
+        self.table = table
+        self.digit = table.digit
+        self.max_value = max_value
+        self.table_value = min(table.max_value, max_value)
+
+        # Bounds of every value, exact up to 'table_value'
+        self.costs = array.array("B", bytes([NO_BOUND]) * (max_value + 1))
+        for value, combo in table.state.items():
+            if 1 <= value <= self.table_value:
+                self.costs[value] = min(combo.cost, NO_BOUND - 1)
+
+        by_cost: dict[int, list[int]] = {}
+        for value in range(2, self.table_value + 1):
+            if self.costs[value] != NO_BOUND:
+                by_cost.setdefault(self.costs[value], []).append(value)
+        self.bases = sorted(b for values in by_cost.values() for b in values[-bases_per_cost:])
+
+        # Combinations found by sampling: value -> (operation, operand1, operand2)
+        self.sampled: dict[int, tuple[str, int, int]] = {}
+
+        self._fill()
+
+    def _fill(self) -> None:
+        """Bound the values above the table, level by level."""
+        costs = self.costs
+        lo = self.table_value + 1
+        while lo <= self.max_value:
+            hi = min(self.max_value + 1, max(lo + 1, int(lo * _GROWTH)))
+            for b in self.bases:
+                add_b = _ADD[costs[b]]
+                for r in range(b):
+                    # Values of the level with remainder 'r', and their quotients
+                    t0 = lo + (r - lo) % b
+                    if t0 >= hi:
+                        continue
+                    q0 = (t0 - r) // b
+                    n = len(range(t0, hi, b))
+                    current = costs[t0:hi:b]
+                    if r == 0:
+                        plus = costs[q0 : q0 + n].tobytes().translate(add_b)
+                        costs[t0:hi:b] = array.array("B", map(min, current, plus))
+                        continue
+                    # q * b + r, and (q + 1) * b - (b - r)
+                    cost_r, cost_s = costs[r], costs[b - r]
+                    plus = costs[q0 : q0 + n].tobytes().translate(add_b).translate(_ADD[cost_r])
+                    minus = costs[q0 + 1 : q0 + 1 + n].tobytes().translate(add_b).translate(_ADD[cost_s])
+                    costs[t0:hi:b] = array.array("B", map(min, current, plus, minus))
+            lo = hi
+
+    def cost(self, value: int) -> int:
+        """
+        Get the bound on the cost of a value.
+
+        Args:
+            value (int): value from 1 to 'max_value'.
+
+        Returns:
+            int: cost of an expression for the value, 0 if none was found.
+        """
+        cost = self.costs[value]
+        return 0 if cost == NO_BOUND else cost
+
+    def combo(self, value: int, *, limit: int = 0) -> onedigit.Combo | None:
+        """
+        Build an expression for a value, with a cost no larger than its bound.
+
+        Args:
+            value (int): value from 1 to 'max_value'.
+            limit (int, optional): largest value the expression may go through. Defaults to no limit.
+
+        Returns:
+            onedigit.Combo: combination for the value, or None if it has no bound (or none within 'limit').
+        """
+        costs, bound = self.costs, self.costs[value]
+        if bound == NO_BOUND:
+            return None
+        if value in self.table.state and value <= self.table_value:
+            return self.table.state[value]
+
+        for b in self.bases:
+            q, r = divmod(value, b)
+            if r == 0 and costs[q] + costs[b] <= bound:
+                return self._binary(q, b, "*")
+            if r and costs[q] + costs[b] + costs[r] <= bound:
+                return self._binary(q, b, "*").binary_operation(self._combo(r), "+")
+            # Only this product goes above the value; the operands of the others are smaller
+            if r and costs[q + 1] + costs[b] + costs[b - r] <= bound and (not limit or (q + 1) * b <= limit):
+                return self._binary(q + 1, b, "*").binary_operation(self._combo(b - r), "-")
+
+        if value not in self.sampled:
+            return None
+        op, operand1, operand2 = self.sampled[value]
+        return self._binary(operand1, operand2, op)
+
+    def _combo(self, value: int) -> onedigit.Combo:
+        """Build an expression for a value that has a bound."""
+        combo = self.combo(value)
+        if combo is None:
+            raise RuntimeError(f"value {value} has a bound of {self.costs[value]}, but no expression for it")
+        return combo
+
+    def _binary(self, value1: int, value2: int, op: str) -> onedigit.Combo:
+        """Build an expression for an operation on two values that have a bound."""
+        return self._combo(value1).binary_operation(self._combo(value2), op)
+
+    def sample(self, count: int, *, seed: int = 0, deadline: float = 0.0) -> int:
+        """
+        Try products and sums of random pairs, keeping those that lower a bound.
+
+        One operand is a value of the table, picked with a probability
+        that halves with every unit of cost. The other one is any value the
+        result stays in range with.
+
+        Bounds that are lowered are not carried to the values built from
+        them; the next 'refine' does that.
+
+        Args:
+            count (int): number of pairs to try.
+            seed (int, optional): seed of the random generator. Defaults to 0.
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which to stop. Defaults to no deadline.
+
+        Returns:
+            int: number of bounds lowered.
+        """
+        rng = random.Random(seed)  # nosec B311  # seeded sampling, not cryptography
+        costs, max_value = self.costs, self.max_value
+        operands = [v for v in range(2, self.table_value + 1) if costs[v] != NO_BOUND]
+        if not operands:
+            return 0
+        cum_weights = list(itertools.accumulate(2.0 ** -costs[v] for v in operands))
+
+        improved, done = 0, 0
+        while done < count:
+            if deadline and time.monotonic() >= deadline:
+                break
+            batch = min(count - done, 4096)
+            done += batch
+            for x in rng.choices(operands, cum_weights=cum_weights, k=batch):
+                op = "*" if rng.random() < 0.5 else "+"
+                largest = max_value // x if op == "*" else max_value - x
+                if largest < 2:
+                    continue
+                y = rng.randint(2, largest)
+                value = x * y if op == "*" else x + y
+                cost = costs[y] + costs[x]
+                if cost < costs[value]:
+                    costs[value] = cost
+                    self.sampled[value] = (op, y, x)
+                    improved += 1
+        return improved
+
+    def refine(self) -> None:
+        """Carry bounds lowered by sampling to the values built from them."""
+        self._fill()
+
+    def warm_start(self, mymodel: onedigit.Model) -> int:
+        """
+        Add expressions for the values of a model that have no cheaper one.
+
+        The model keeps its combinations when they are as cheap, and only
+        values up to its 'max_value' and 'max_cost' are added, with
+        expressions that stay within 'max_value'. Since the model could
+        find every such expression, the exact engines converge to the same
+        costs, and goals (see 'onedigit.goals') can be reached sooner.
+
+        Args:
+            mymodel (onedigit.Model): model to start, for the same digit.
+
+        Raises:
+            ValueError: when the model is for another digit, does not use the operations of the bounds,
+                or is smaller than the exact table.
+
+        Returns:
+            int: number of combinations added or replaced.
+        """
+        if mymodel.digit != self.digit:
+            raise ValueError(f"the bounds are for digit={self.digit}, but the model is for digit={mymodel.digit}")
+        if not set(self.table.ops).issubset(mymodel.ops):
+            raise ValueError(f"the bounds use operations {' '.join(self.table.ops)}, but the model does not")
+        if self.table_value > mymodel.max_value:
+            raise ValueError(
+                f"the exact table goes up to {self.table_value}, beyond the model (max_value={mymodel.max_value})"
+            )
+
+        costs, state = self.costs, mymodel.state
+        buffer = onedigit.RoundBuffer(mymodel)
+        for value in range(1, min(mymodel.max_value, self.max_value) + 1):
+            cost = costs[value]
+            current = state.get(value)
+            if cost > mymodel.max_cost or (current is not None and current.cost <= cost):
+                continue
+            combo = self.combo(value, limit=mymodel.max_value)
+            if combo is not None:
+                buffer.offer(combo)
+        mymodel.apply_round(buffer)
+        return len(buffer.found)
+
+    def histogram(self) -> dict[int, int]:
+        """
+        Count the values by the bound on their cost.
+
+        Returns:
+            dict[int, int]: number of values for every cost, 0 for values without a bound.
+        """
+        counts = [0] * 256
+        for cost in self.costs[1:]:
+            counts[cost] += 1
+        histogram = {cost: n for cost, n in enumerate(counts) if n and cost != NO_BOUND}
+        if counts[NO_BOUND]:
+            histogram[0] = counts[NO_BOUND]
+        return histogram
+
+
+def approximate(
+    digit: int,
+    max_value: int,
+    *,
+    table_value: int = 10_000,
+    table_cost: int = 10,
+    bases_per_cost: int = BASES_PER_COST,
+    samples: int = 0,
+    time_budget: float = 0.0,
+    ops: tuple[str, ...] | None = None,
+) -> ApproximateTable:
+    """
+    Bound the cost of every value of a range, from a small exact table.
+
+    The exact table is run to convergence with the 'propagate' engine.
+
+    Args:
+        digit (int): digit to use.
+        max_value (int): largest value to bound.
+        table_value (int, optional): largest value of the exact table. Defaults to 10000.
+        table_cost (int, optional): largest cost of the exact table. Defaults to 10.
+        bases_per_cost (int, optional): bases taken for every cost (see 'ApproximateTable'). Defaults to BASES_PER_COST.
+        samples (int, optional): random pairs to try after the greedy pass (see 'ApproximateTable.sample'). Defaults to none.
+        time_budget (float, optional): wall-clock seconds the sampling may run. Defaults to no limit.
+        ops (tuple[str, ...], optional): operations of the exact table. Defaults to all of them.
+
+    Raises:
+        ValueError: when the parameters are not valid.
+
+    Returns:
+        ApproximateTable: bounds for the range.
+    """
+    logger.debug(
+        f"approximate(digit={digit}, max_value={max_value}, table_value={table_value}, table_cost={table_cost}, "
+        f"bases_per_cost={bases_per_cost}, "
+        f"samples={samples}, time_budget={time_budget}, ops={ops})"
+    )
+    started = time.monotonic()
+
+    table = onedigit.Model(digit=digit, ops=ops)
+    table.seed(max_value=min(table_value, max_value), max_cost=table_cost)
+    onedigit.propagate.propagate(table)
+    bounds = ApproximateTable(table, max_value, bases_per_cost=bases_per_cost)
+    logger.info(f"bounded {max_value} values in {time.monotonic() - started:.3f} seconds.")
+
+    if samples:
+        deadline = started + time_budget if time_budget else 0.0
+        improved = bounds.sample(samples, deadline=deadline)
+        if improved:
+            bounds.refine()
+        logger.info(f"sampling lowered {improved} bounds.")
+    return bounds
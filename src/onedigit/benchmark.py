@@ -0,0 +1,187 @@
+"""Benchmark harness that measures the engines, to calibrate the planner (see 'onedigit.plan')."""
+
+import dataclasses
+import math
+import time
+import tracemalloc
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Simulations measured for every engine (digit, max_value, max_cost), from the smallest
+CONFIGS: tuple[tuple[int, int, int], ...] = ((7, 500, 6), (7, 1000, 7), (7, 2000, 8), (7, 4000, 9), (7, 8000, 10))
+
+# Largest number of rounds of a measured simulation
+MAX_STEPS = 30
+
+# Bounds of the fitted growth of time with the number of pairs
+MIN_EXPONENT, MAX_EXPONENT = 0.5, 2.0
+
+
+@dataclasses.dataclass
+class Sample:
+    """
+    Measurement of a simulation run to convergence.
+
+    Args:
+        engine (str): engine that ran the rounds.
+        max_value (int): largest value of the simulation.
+        max_cost (int): largest cost of a combination.
+        pairs (int): pairs of combinations across all rounds (see 'onedigit.plan.round_pairs').
+        seconds (float): wall-clock seconds.
+        combinations (int): number of combinations at the end.
+    """
+
+    engine: str
+    max_value: int
+    max_cost: int
+    pairs: int
+    seconds: float
+    combinations: int
+
+
+def _simulate(engine: str, digit: int, max_value: int, max_cost: int) -> tuple[list[int], onedigit.Model]:
+    """Run a simulation to convergence, and get the size of the model at every round."""
+    mymodel = onedigit.Model(digit=digit)
+    mymodel.seed(max_value=max_value, max_cost=max_cost)
+    sizes = [len(mymodel.state)]
+    for _ in range(MAX_STEPS):
+        updates = mymodel.simulate(engine=engine)
+        sizes.append(len(mymodel.state))
+        if not updates:
+            break
+    return sizes, mymodel
+
+
+def measure(engine: str, digit: int, max_value: int, max_cost: int) -> Sample:
+    """
+    Measure the time an engine takes to run a simulation to convergence.
+
+    Args:
+        engine (str): engine to measure.
+        digit (int): digit to use.
+        max_value (int): largest value of the simulation.
+        max_cost (int): largest cost of a combination.
+
+    Returns:
+        Sample: the measurement.
+    """
+    started = time.perf_counter()
+    sizes, _ = _simulate(engine, digit, max_value, max_cost)
+    seconds = time.perf_counter() - started
+    return Sample(engine, max_value, max_cost, onedigit.plan.round_pairs(sizes, engine), seconds, sizes[-1])
+
+
+def measure_memory(engine: str, digit: int, max_value: int, max_cost: int) -> float:
+    """
+    Measure the peak memory of a simulation, for every combination of the model.
+
+    Allocations are traced, which makes the simulation slower, so it is
+    measured apart from the time.
+
+    Args:
+        engine (str): engine to measure.
+        digit (int): digit to use.
+        max_value (int): largest value of the simulation.
+        max_cost (int): largest cost of a combination.
+
+    Returns:
+        float: peak bytes for every combination.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        sizes, _ = _simulate(engine, digit, max_value, max_cost)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return peak / max(1, sizes[-1])
+
+
+def fit(samples: list[Sample]) -> tuple[float, float]:
+    """
+    Fit the time of some samples as 'coefficient * pairs ^ exponent'.
+
+    The fit is a least squares line over the logarithms. With a single
+    sample, the time is taken to grow with the number of pairs.
+
+    Args:
+        samples (list[Sample]): measurements of one engine.
+
+    Raises:
+        ValueError: when there are no samples.
+
+    Returns:
+        tuple[float, float]: coefficient and exponent.
+    """
+    if not samples:
+        raise ValueError("there are no samples to fit")
+    xs = [math.log(max(1, s.pairs)) for s in samples]
+    ys = [math.log(max(1e-9, s.seconds)) for s in samples]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 1.0
+    exponent = min(MAX_EXPONENT, max(MIN_EXPONENT, exponent))
+    return math.exp(mean_y - exponent * mean_x), exponent
+
+
+def run_benchmark(
+    *,
+    engines: tuple[str, ...] = onedigit.plan.MEASURED_ENGINES,
+    configs: tuple[tuple[int, int, int], ...] | None = None,
+    time_limit: float = 10.0,
+) -> tuple[onedigit.plan.Calibration, list[Sample]]:
+    """
+    Measure the engines on simulations of growing size, and calibrate the planner.
+
+    Every engine runs the simulations in order, and stops after the first
+    one that takes longer than 'time_limit'. The peak memory is measured
+    on the largest simulation that took a quarter of it or less.
+
+    Args:
+        engines (tuple[str, ...], optional): engines to measure. Defaults to MEASURED_ENGINES.
+        configs (tuple[tuple[int, int, int], ...], optional): simulations to run, as
+            '(digit, max_value, max_cost)', from the smallest. Defaults to CONFIGS.
+        time_limit (float, optional): seconds after which an engine stops growing its simulations. Defaults to 10.
+
+    Raises:
+        ValueError: when an engine is not known, or there are no simulations.
+
+    Returns:
+        tuple[onedigit.plan.Calibration, list[Sample]]: calibration, and the measurements it comes from.
+    """
+    logger.debug(f"run_benchmark(engines={engines}, configs={configs}, time_limit={time_limit})")
+    for engine in engines:
+        if engine not in onedigit.model.ENGINES:
+            raise ValueError(f"unknown engine '{engine}', use one of {', '.join(onedigit.model.ENGINES)}")
+    configs = CONFIGS if configs is None else configs
+    if not configs:
+        raise ValueError("there are no simulations to run")
+
+    models: dict[str, onedigit.plan.EngineModel] = {}
+    samples: list[Sample] = []
+    for engine in engines:
+        measured: list[Sample] = []
+        memory_config = configs[0]
+        for digit, max_value, max_cost in configs:
+            sample = measure(engine, digit, max_value, max_cost)
+            logger.info(
+                f"{engine}: max_value={max_value}, max_cost={max_cost}, {sample.pairs} pairs "
+                f"in {sample.seconds:.3f} seconds."
+            )
+            measured.append(sample)
+            if sample.seconds <= time_limit / 4:
+                memory_config = (digit, max_value, max_cost)
+            if sample.seconds > time_limit:
+                break
+
+        coefficient, exponent = fit(measured)
+        bytes_per_combo = measure_memory(engine, *memory_config)
+        models[engine] = onedigit.plan.EngineModel(coefficient, exponent, bytes_per_combo)
+        samples.extend(measured)
+
+    return onedigit.plan.Calibration(models, source="benchmark"), samples
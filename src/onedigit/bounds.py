@@ -0,0 +1,174 @@
+"""Lower bounds on the cost of every value, for a digit and a set of operations."""
+
+import functools
+import math
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Pairs of values a level may take to be enumerated exactly
+LEVEL_PAIRS = 100_000
+
+
+class CostBounds:
+    """
+    Smallest cost an expression for each value can have, within the limits of a model.
+
+    Models only keep values from 1 to 'max_value' (and the digit), so
+    every expression is built from values in that range. The cheapest
+    levels are enumerated exactly: the values of cost 1 are the digit
+    and the results of unary operations on it, those of cost 'c' are
+    joint digits and the results of operations on values of costs 'a'
+    and 'c - a'. Levels are enumerated while they take fewer than
+    LEVEL_PAIRS pairs of values; no expression is built, only values.
+
+    Beyond that, the largest value an expression of each cost can reach
+    is bounded from those of the cheaper costs (a sum is at most the sum
+    of the largest values, a power at most the largest base to the
+    largest exponent, and so on), so a value above the bound for a cost
+    needs a costlier expression.
+
+    A value whose bound is above 'max_cost' can not be reached by the
+    model. A value whose combination costs as much as its bound can not
+    be improved: it is closed (see 'Model.useful_cost').
+
+    Args:
+        digit (int): digit of the model.
+        max_value (int): largest value the model retains.
+        max_cost (int): largest cost of a combination.
+        ops (tuple[str, ...]): operations the model uses.
+
+    Attributes:
+        lower (list[int]): bound of every value from 0 to 'max_value', 'max_cost' + 1 if it can not be reached.
+        exact (int): number of levels enumerated exactly.
+        reach (list[int]): largest value an expression of each cost, from 0 to 'max_cost', can have.
+    """
+
+    def __init__(self, digit: int, max_value: int, max_cost: int, ops: tuple[str, ...]) -> None:
+        self.digit = digit
+        self.max_value = max_value
+        self.max_cost = max_cost
+        self.ops = ops
+
+        levels = self._levels()
+        self.exact = len(levels) - 1
+        self.reach = [max(level, default=0) for level in levels] + [0] * (max_cost - self.exact)
+        for cost in range(self.exact + 1, max_cost + 1):
+            self.reach[cost] = self._largest(cost)
+
+        unreached = max_cost + 1
+        self.lower = [unreached] * (max_value + 1)
+        for cost in range(self.exact, 0, -1):
+            for value in levels[cost]:
+                if value <= max_value:
+                    self.lower[value] = cost
+
+        # Values of no exact level need one of the costlier expressions that can reach them
+        top = 0
+        for cost in range(self.exact + 1, max_cost + 1):
+            for value in range(top + 1, min(self.reach[cost], max_value) + 1):
+                if self.lower[value] == unreached:
+                    self.lower[value] = cost
+            top = max(top, self.reach[cost])
+        logger.debug(f"CostBounds(digit={digit}, max_value={max_value}, max_cost={max_cost}, exact={self.exact})")
+
+    def _unary(self, values: set[int]) -> set[int]:
+        """Add the results of unary operations, at the same cost, until there are no new values."""
+        pending = list(values)
+        while pending:
+            value = pending.pop()
+            for op in self.ops:
+                result = onedigit.specialized.UNARY_FUNCTIONS[op](value) if op in ("!", "sqrt") else 0
+                if 1 <= result <= self.max_value and result not in values:
+                    values.add(result)
+                    pending.append(result)
+        return values
+
+    def _levels(self) -> list[set[int]]:
+        """Enumerate the values of every cost, from the cheapest, while it takes few pairs."""
+        digit, max_value, ops = self.digit, self.max_value, self.ops
+        limit_bits = max_value.bit_length()
+        levels: list[set[int]] = [set(), self._unary({digit})]
+        for cost in range(2, self.max_cost + 1):
+            if sum(len(levels[a]) * len(levels[cost - a]) for a in range(1, cost // 2 + 1)) > LEVEL_PAIRS:
+                break
+            joint = int(str(digit) * cost)
+            found = {joint} if joint <= max_value else set()
+            for a in range(1, cost // 2 + 1):
+                for x in levels[a]:
+                    for y in levels[cost - a]:
+                        # Operands in both orders, as in a round ('-' and '/' need the larger one first)
+                        for p, q in ((x, y), (y, x)):
+                            if "+" in ops:
+                                found.add(p + q)
+                            if "-" in ops and p > q:
+                                found.add(p - q)
+                            if "*" in ops:
+                                found.add(p * q)
+                            if "/" in ops and p >= q and p % q == 0:
+                                found.add(p // q)
+                            # Same limit on the exponent as 'Combo.binary_operation'
+                            if (
+                                "^" in ops
+                                and q <= onedigit.powers.MAX_EXPONENT
+                                and (p == 1 or q * (p.bit_length() - 1) <= limit_bits)
+                            ):
+                                found.add(p**q)
+            levels.append(self._unary({v for v in found if 1 <= v <= max_value}))
+        return levels
+
+    def _largest(self, cost: int) -> int:
+        """Bound the largest value of an expression of some cost, from those of the cheaper costs."""
+        ops, reach, max_value = self.ops, self.reach, self.max_value
+        joint = int(str(self.digit) * cost)
+        largest = joint if joint <= max_value else 0
+        for a in range(1, cost // 2 + 1):
+            x, y = reach[a], reach[cost - a]
+            if not (x and y):
+                continue
+            candidates = [max(x, y)]
+            if "+" in ops:
+                candidates.append(x + y)
+            if "*" in ops:
+                candidates.append(x * y)
+            if "^" in ops:
+                for base, exponent in ((x, y), (y, x)):
+                    exponent = min(exponent, onedigit.powers.MAX_EXPONENT)
+                    fits = base < 2 or exponent * math.log2(base) <= math.log2(max_value) + 1
+                    candidates.append(base**exponent if fits else max_value)
+            largest = max(largest, *candidates)
+        largest = min(largest, max_value)
+        if "!" in ops and largest >= 3:
+            largest = min(max_value, max(largest, math.factorial(min(largest, onedigit.powers.MAX_FACTORIAL))))
+        return largest
+
+    def closed(self, value: int, cost: int) -> bool:
+        """
+        Check if a combination can not be improved.
+
+        Args:
+            value (int): value of the combination, from 1 to 'max_value'.
+            cost (int): cost of the combination.
+
+        Returns:
+            bool: True if no cheaper expression can exist for the value.
+        """
+        return cost <= self.lower[value]
+
+
+@functools.lru_cache(maxsize=8)
+def cost_bounds(digit: int, max_value: int, max_cost: int, ops: tuple[str, ...]) -> CostBounds:
+    """
+    Get the bounds for the limits of a model, reusing them across rounds.
+
+    Args:
+        digit (int): digit of the model.
+        max_value (int): largest value the model retains.
+        max_cost (int): largest cost of a combination.
+        ops (tuple[str, ...]): operations the model uses.
+
+    Returns:
+        CostBounds: bounds for those limits.
+    """
+    return CostBounds(digit, max_value, max_cost, ops)
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 """CLI to calculate number combinations with a single digit."""
 
+import contextlib
 import datetime
 import json
+import os
+import sqlite3
 
 import onedigit
 
@@ -18,6 +21,16 @@ def main(
     full: bool = False,
     input_filename: str = "",
     output_filename: str = "",
+    time_budget: float = 0.0,
+    max_memory: float = 0.0,
+    workers: str = "",
+    engine: str = "pairs",
+    ops: str = "",
+    adaptive: bool = False,
+    goal: str = "",
+    warm_start: bool = False,
+    dry_run: bool = False,
+    calibration: str = "",
 ) -> bool:
     """
     Command line interface to calculate combinations using a given digit.
@@ -34,8 +47,18 @@ def main(
         max_cost (int, optional): maximum cost a combination can have for it to be remembered. Defaults to 2.
         max_steps (int, optional): maximum number of generative rounds. Defaults to 5.
         full (bool, optional): display combinations using full expressions. Defaults to False.
-        input_filename (str, optional): JSON file used to preload the model. Empty by default.
-        output_filename (str, optional): JSON file used to store the model upon completion. If not filename is provided, a random filename will be used. Empty by default.
+        input_filename (str, optional): JSON file (or '.sqlite' store) used to preload the model. Empty by default.
+        output_filename (str, optional): JSON file used to store the model upon completion. If not filename is provided, a random filename will be used. Files ending in '.npz' get the model as NumPy columns instead, and files ending in '.sqlite' get it added to a store (see the 'query' command). Empty by default.
+        time_budget (float, optional): wall-clock seconds the simulation may run. The best combinations found by then are reported. Defaults to no limit.
+        max_memory (float, optional): megabytes a round of the simulation may use. The costliest combinations are dropped to stay within it. Defaults to no limit.
+        workers (str, optional): comma separated addresses ('host:port') of workers started with 'onedigit worker'. Rounds are split across them. Defaults to running locally.
+        engine (str, optional): how to run each round: 'pairs' tries every operation on every pair, 'kernels' applies addition, subtraction, multiplication and division to whole sets at once, 'propagate' settles combinations cheapest first and converges in one round, 'specialized' runs the rounds of 'pairs' with a loop for each operation, 'threads' splits the rounds of 'pairs' across threads on a free-threaded build, 'shards' splits the rounds of 'pairs' by ranges of result values, so shards never produce the same value, 'auto' picks the one the planner expects to be the fastest (see 'dry_run'). All find the same costs. Defaults to 'pairs'.
+        ops (str, optional): operations to use, such as '+-*/'. Symbols are + - * / ^ ! and √ (or 'sqrt'). The input file must use the same operations. Defaults to all of them.
+        adaptive (bool, optional): only revisit pairs with an operand that changed, and skip operations that stopped finding improvements. A full round confirms the result at the end. Defaults to False.
+        goal (str, optional): stop as soon as every value up to max_value has a combination ('coverage'), or has one of cost K or less ('cost<=K'). Defaults to running until the simulation converges.
+        warm_start (bool, optional): start from the expressions of an approximate run (see the 'approximate' command), so good combinations are known from the first round. Defaults to False.
+        dry_run (bool, optional): show the number of pairs, time and memory the run is expected to take with every engine, and the engine 'auto' picks, without running it. Defaults to False.
+        calibration (str, optional): JSON file written by the 'benchmark' command, to estimate the runs with measurements from this host. Defaults to the measurements shipped with the package.
 
     Returns:
         bool: True if calculation runs without issues.
@@ -46,7 +69,17 @@ def main(
         f"max_steps={type(max_steps).__name__}({max_steps}), "
         f"max_cost={type(max_cost).__name__}({max_cost}), "
         f"input_filename={type(input_filename).__name__}({input_filename}), "
-        f"output_filename={type(output_filename).__name__}({output_filename})"
+        f"output_filename={type(output_filename).__name__}({output_filename}), "
+        f"time_budget={type(time_budget).__name__}({time_budget}), "
+        f"max_memory={type(max_memory).__name__}({max_memory}), "
+        f"workers={type(workers).__name__}({workers}), "
+        f"engine={type(engine).__name__}({engine}), "
+        f"ops={type(ops).__name__}({ops}), "
+        f"adaptive={type(adaptive).__name__}({adaptive}), "
+        f"goal={type(goal).__name__}({goal}), "
+        f"warm_start={type(warm_start).__name__}({warm_start}), "
+        f"dry_run={type(dry_run).__name__}({dry_run}), "
+        f"calibration={type(calibration).__name__}({calibration})"
     )
 
     # ------------------------------------------------------------
@@ -61,10 +94,64 @@ def main(
         logger.error("digit, max_value, max_cost, and max_steps must be positive integer numbers")
         return False
 
+    try:
+        time_budget = float(time_budget)
+        max_memory = float(max_memory)
+    except ValueError:
+        logger.error("time_budget and max_memory must be numbers (seconds and megabytes)")
+        return False
+    if time_budget < 0 or max_memory < 0:
+        logger.error("time_budget and max_memory must not be negative")
+        return False
+
     if not (1 <= digit <= 9):
         logger.error("digit must be an integer number between 1 and 9")
         return False
 
+    if engine not in onedigit.model.ENGINES and engine != "auto":
+        logger.error(f"engine must be one of {', '.join(onedigit.model.ENGINES)}, or auto")
+        return False
+
+    try:
+        op_list = onedigit.parse_ops(str(ops))
+    except ValueError as e:
+        logger.error(f"ops is not valid: {e}")
+        return False
+
+    if goal:
+        try:
+            onedigit.goals.parse_goal(str(goal))
+        except ValueError as e:
+            logger.error(f"goal is not valid: {e}")
+            return False
+
+    # ------------------------------------------------------------
+    # Estimate the run, to choose the engine or to show the plan
+    if engine == "auto" or dry_run:
+        try:
+            plan_calibration = None
+            if calibration:
+                with open(calibration, mode="r", encoding="utf-8") as calibration_fp:
+                    plan_calibration = onedigit.plan.Calibration.load(calibration_fp)
+            plan = onedigit.plan.plan_run(
+                digit,
+                max_value=max_value,
+                max_cost=max_cost,
+                max_steps=max_steps,
+                ops=op_list,
+                time_budget=time_budget,
+                max_memory=max_memory,
+                calibration=plan_calibration,
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"failed to plan the run: {e}")
+            return False
+        if dry_run:
+            print(plan.describe())
+            return True
+        logger.info(f"engine '{plan.engine}' selected.")
+        engine = plan.engine
+
     # ------------------------------------------------------------
     if not isinstance(input_filename, str):
         logger.error("input_filename is not valid")
@@ -76,32 +163,28 @@ def main(
         t = datetime.datetime.now(tz)
         output_filename = "model" + "." + t.strftime("%Y%m%d%H%M%S") + ".json"
 
-    # ------------------------------------------------------------
-    # Check if there is input data
-    input_text = ""
-    if input_filename:
-        input_lines = []
-        try:
-            with open(input_filename, mode="r", encoding="utf-8") as input_fp:
-                input_lines = input_fp.readlines()
-        except FileNotFoundError:
-            logger.error(f"The input file '{input_filename}' does not exist.")
-        except PermissionError:
-            logger.error(f"No permissions to open the input file '{input_filename}'.")
-        except ValueError:
-            logger.error(f"Unknown error opening the input file '{input_filename}'.")
-
-        if not input_lines:
-            logger.error(f"failed to read input file '{input_filename}', simulation will use a fresh model.")
-        else:
-            input_text = "".join(input_lines)
-        del input_lines
+    # Workers can be given as a string, or as a sequence
+    if isinstance(workers, str):
+        worker_list = [w for w in workers.split(",") if w.strip()]
+    else:
+        worker_list = [str(w) for w in workers]
 
     # Start calculation
     model = onedigit.calculate(
-        digit=digit, max_value=max_value, max_cost=max_cost, max_steps=max_steps, input_json=input_text
+        digit=digit,
+        max_value=max_value,
+        max_cost=max_cost,
+        max_steps=max_steps,
+        input_filename=input_filename,
+        time_budget=time_budget,
+        max_memory=max_memory,
+        workers=worker_list,
+        engine=engine,
+        ops=str(ops),
+        adaptive=bool(adaptive),
+        goal=str(goal),
+        warm_start=bool(warm_start),
     )
-    del input_text
 
     # ------------------------------------------------------------
     # Get the combinations
@@ -112,9 +195,25 @@ def main(
     else:
         combos = sorted(model.state.values())
 
+    for step in model.stats.degradations:
+        logger.error(f"results are incomplete to stay within the memory budget: {step}.")
+
     # ------------------------------------------------------------
     # Take care of outputs
-    if output_filename:
+    if output_filename.endswith(onedigit.store.SUFFIXES):
+        # Add the model to a store, keeping the cheapest combination of every value
+        try:
+            with onedigit.store.ModelStore(output_filename) as store:
+                store.write(model)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            logger.error(f"failed to write the model to the store '{output_filename}': {e}")
+    elif output_filename.endswith(".npz"):
+        # Write the model as columns, for analysis tools
+        try:
+            onedigit.columns.write_npz(model, output_filename)
+        except PermissionError:
+            logger.error(f"failed to open output file '{output_filename}' in write mode.")
+    elif output_filename:
         # Represent model in JSON format
         model_dict = model.asdict()
         jsenc = json.JSONEncoder()
@@ -136,3 +235,397 @@ def main(
             print(f"{c.value:>4} = {c.expr_simple:<15}   [{c.cost:>3}]")
 
     return True
+
+
+def worker(*, host: str = "127.0.0.1", port: int = 7337) -> bool:
+    """
+    Run a worker that takes part of the rounds of a simulation.
+
+    The worker waits for a coordinator (see the 'workers' option of the
+    main command), and runs until it is interrupted.
+
+    Args:
+        host (str, optional): address to listen on. Defaults to 127.0.0.1.
+        port (int, optional): port to listen on. Defaults to 7337.
+
+    Returns:
+        bool: True when the worker is interrupted.
+    """
+    logger.debug(f"worker(host={host}, port={port})")
+
+    try:
+        onedigit.distributed.serve(host=host, port=int(port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        logger.error(f"failed to run worker on {host}:{port}: {e}")
+        return False
+
+    return True
+
+
+def merge(*input_filenames: str, output: str = "") -> bool:
+    """
+    Merge JSON snapshots of models for the same digit.
+
+    The cheapest combination of every value is kept. Inputs are streamed,
+    so any number of them, of any size, can be merged. For example:
+
+        onedigit merge a.json b.json c.json -o merged.json
+
+    Args:
+        input_filenames (str): JSON files with models, as written by the main command.
+        output (str): JSON file that receives the merged model.
+
+    Returns:
+        bool: True if the snapshots were merged.
+    """
+    logger.debug(f"merge(input_filenames={input_filenames}, output={output})")
+
+    if not input_filenames:
+        logger.error("at least one input file is needed")
+        return False
+    if not output or not isinstance(output, str):
+        logger.error("an output file is needed (use -o <filename>)")
+        return False
+
+    # Write to a temporary file, so a failed merge does not leave a partial output
+    partial = output + ".partial"
+    try:
+        with contextlib.ExitStack() as stack:
+            inputs = [stack.enter_context(open(name, mode="r", encoding="utf-8")) for name in input_filenames]
+            output_fp = stack.enter_context(open(partial, mode="w", encoding="utf-8"))
+            onedigit.merge.merge_snapshots(inputs, output_fp, names=[str(name) for name in input_filenames])
+        os.replace(partial, output)
+    except (OSError, ValueError) as e:
+        logger.error(f"failed to merge snapshots: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+
+    return True
+
+
+def query(
+    filename: str,
+    *,
+    digit: int,
+    min_value: int = 1,
+    max_value: int = 0,
+    max_cost: int = 0,
+    unreachable: bool = False,
+    full: bool = False,
+) -> bool:
+    """
+    Show combinations kept in a store, without loading the whole model.
+
+    Stores are written by the main command, with an output file ending
+    in '.sqlite'. For example, values from 5000 to 6000 of cost 4 or less:
+
+        onedigit query model.sqlite --digit 7 --min_value 5000 --max_value 6000 --max_cost 4
+
+    Args:
+        filename (str): store to query.
+        digit (int): digit of the model.
+        min_value (int, optional): smallest value to show. Defaults to 1.
+        max_value (int, optional): largest value to show. Defaults to no limit.
+        max_cost (int, optional): largest cost to show. Defaults to no limit.
+        unreachable (bool, optional): show the values without a combination (within 'max_cost') instead. Defaults to False.
+        full (bool, optional): display combinations using full expressions. Defaults to False.
+
+    Returns:
+        bool: True if the query ran.
+    """
+    logger.debug(
+        f"query(filename={filename}, digit={digit}, min_value={min_value}, max_value={max_value}, "
+        f"max_cost={max_cost}, unreachable={unreachable})"
+    )
+
+    try:
+        digit, min_value, max_value, max_cost = int(digit), int(min_value), int(max_value), int(max_cost)
+    except ValueError:
+        logger.error("digit, min_value, max_value and max_cost must be integer numbers")
+        return False
+    if not isinstance(filename, str) or not os.path.exists(filename):
+        logger.error(f"the store '{filename}' does not exist")
+        return False
+
+    try:
+        with onedigit.store.ModelStore(filename) as store:
+            store.header(digit)
+            if unreachable:
+                for value in store.unreachable(digit, min_value=min_value, max_value=max_value, max_cost=max_cost):
+                    print(value)
+            else:
+                for c in store.query(digit, min_value=min_value, max_value=max_value, max_cost=max_cost):
+                    if full:
+                        print(f"{c.value:>4} = {c.expr_full:<70}   [{c.cost:>3}]")
+                    else:
+                        print(f"{c.value:>4} = {c.expr_simple:<15}   [{c.cost:>3}]")
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"failed to query the store '{filename}': {e}")
+        return False
+
+    return True
+
+
+def verify(filename: str, *, processes: int = 0, limit: int = 20) -> bool:
+    """
+    Check every combination of a snapshot by evaluating its expression again.
+
+    The value, cost, digits, operations and limits of every combination
+    are checked, and its simple expression must match the full one. Large
+    snapshots are checked by a pool of processes. For example:
+
+        onedigit verify third_party.json
+
+    Args:
+        filename (str): JSON snapshot, or '.sqlite' store, to check.
+        processes (int, optional): processes used for large snapshots, 1 to use none. Defaults to one per core.
+        limit (int, optional): largest number of problems to show. Defaults to 20.
+
+    Returns:
+        bool: True if every combination is valid.
+    """
+    logger.debug(f"verify(filename={filename}, processes={processes}, limit={limit})")
+
+    try:
+        processes, limit = int(processes), int(limit)
+    except ValueError:
+        logger.error("processes and limit must be integer numbers")
+        return False
+    if processes < 0:
+        logger.error("processes must not be negative")
+        return False
+
+    try:
+        if str(filename).endswith(onedigit.store.SUFFIXES):
+            if not os.path.exists(filename):
+                raise FileNotFoundError(f"'{filename}' does not exist")
+            with onedigit.store.ModelStore(filename) as store:
+                problems = onedigit.verify.verify_store(store, processes=processes)
+        else:
+            with open(filename, mode="r", encoding="utf-8") as input_fp:
+                problems = onedigit.verify.verify_snapshot(input_fp, processes=processes)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        logger.error(f"failed to read '{filename}': {e}")
+        return False
+
+    for problem in problems[:limit]:
+        print(problem)
+    if problems:
+        logger.error(f"'{filename}' has {len(problems)} invalid combinations.")
+        return False
+
+    logger.info(f"every combination of '{filename}' is valid.")
+    return True
+
+
+def approximate(
+    *,
+    digit: int,
+    max_value: int,
+    table_value: int = 10_000,
+    table_cost: int = 10,
+    samples: int = 0,
+    time_budget: float = 0.0,
+    values: str = "",
+    full: bool = False,
+) -> bool:
+    """
+    Find an upper bound on the cost of every value of a range too large for an exact table.
+
+    Values are built greedily against a small exact table (see
+    'onedigit.approximate'), and random pairs can then be tried to lower
+    the bounds. The number of values with each cost is shown, and the
+    expressions of the values asked for. For example:
+
+        onedigit approximate --digit 7 --max_value 10000000 --values 1234567,7654321
+
+    Args:
+        digit (int): the digit to use to generate combinations.
+        max_value (int): largest value to bound.
+        table_value (int, optional): largest value of the exact table. Defaults to 10000.
+        table_cost (int, optional): largest cost of the exact table. Defaults to 10.
+        samples (int, optional): random pairs to try after the greedy pass. Defaults to none.
+        time_budget (float, optional): wall-clock seconds the sampling may run. Defaults to no limit.
+        values (str, optional): comma separated values to show an expression for. Defaults to none.
+        full (bool, optional): display combinations using full expressions. Defaults to False.
+
+    Returns:
+        bool: True if the bounds were found.
+    """
+    logger.debug(
+        f"approximate(digit={digit}, max_value={max_value}, table_value={table_value}, table_cost={table_cost}, "
+        f"samples={samples}, time_budget={time_budget}, values={values})"
+    )
+
+    try:
+        digit, max_value, table_value, table_cost = int(digit), int(max_value), int(table_value), int(table_cost)
+        samples, time_budget = int(samples), float(time_budget)
+        # Values can be given as a string, or as a sequence
+        items = values if isinstance(values, tuple | list) else str(values).split(",")
+        shown = [int(v) for v in items if str(v).strip()]
+    except ValueError:
+        logger.error("digit, max_value, table_value, table_cost, samples and values must be numbers")
+        return False
+    if not (1 <= digit <= 9) or max_value < 1 or any(not (1 <= v <= max_value) for v in shown):
+        logger.error("digit must be between 1 and 9, and values between 1 and max_value")
+        return False
+
+    try:
+        bounds = onedigit.approximate.approximate(
+            digit,
+            max_value,
+            table_value=table_value,
+            table_cost=table_cost,
+            samples=samples,
+            time_budget=time_budget,
+        )
+    except (MemoryError, ValueError) as e:
+        logger.error(f"failed to bound the values: {e}")
+        return False
+
+    for cost, count in sorted(bounds.histogram().items()):
+        print(f"cost {cost:>3}: {count} values" if cost else f"no bound: {count} values")
+    for value in shown:
+        c = bounds.combo(value)
+        if c is None:
+            print(f"{value:>4} = ?")
+        elif full:
+            print(f"{c.value:>4} = {c.expr_full:<70}   [{c.cost:>3}]")
+        else:
+            print(f"{c.value:>4} = {c.expr_simple:<15}   [{c.cost:>3}]")
+
+    return True
+
+
+def decompose(
+    filename: str,
+    *,
+    digit: int,
+    values: str,
+    time_budget: float = 1.0,
+    max_depth: int = onedigit.decompose.MAX_DEPTH,
+    full: bool = False,
+) -> bool:
+    """
+    Find expressions for values far beyond a model, by decomposing them against it.
+
+    Values are written as products and powers of combinations of the
+    model, plus or minus one more (see 'onedigit.decompose'). Each value
+    is searched for at most 'time_budget' seconds, and the cheapest
+    expression found is shown. For example:
+
+        onedigit decompose models.sqlite --digit 7 --values 987654321012,10000000000007
+
+    Args:
+        filename (str): JSON snapshot, or '.sqlite' store, with a finished model.
+        digit (int): digit of the model.
+        values (str): comma separated values to find an expression for.
+        time_budget (float, optional): wall-clock seconds the search of every value may run. Defaults to 1.
+        max_depth (int, optional): number of nested levels to try. Defaults to MAX_DEPTH.
+        full (bool, optional): display combinations using full expressions. Defaults to False.
+
+    Returns:
+        bool: True if the model was read.
+    """
+    logger.debug(
+        f"decompose(filename={filename}, digit={digit}, values={values}, time_budget={time_budget}, "
+        f"max_depth={max_depth})"
+    )
+
+    try:
+        digit, time_budget, max_depth = int(digit), float(time_budget), int(max_depth)
+        # Values can be given as a string, or as a sequence
+        items = values if isinstance(values, tuple | list) else str(values).split(",")
+        targets = [int(v) for v in items if str(v).strip()]
+    except ValueError:
+        logger.error("digit, time_budget, max_depth and values must be numbers")
+        return False
+    if any(v < 1 for v in targets) or max_depth < 0:
+        logger.error("values must be positive, and max_depth must not be negative")
+        return False
+
+    try:
+        if str(filename).endswith(onedigit.store.SUFFIXES):
+            if not os.path.exists(filename):
+                raise FileNotFoundError(f"'{filename}' does not exist")
+            with onedigit.store.ModelStore(filename) as store:
+                mymodel = store.read(digit)
+        else:
+            with open(filename, mode="r", encoding="utf-8") as input_fp:
+                mymodel = onedigit.loader.load_model(input_fp, digit=digit)
+        decomposer = onedigit.decompose.Decomposer(mymodel)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        logger.error(f"failed to read '{filename}': {e}")
+        return False
+
+    for value in targets:
+        c = decomposer.search(value, time_budget=time_budget, max_depth=max_depth)
+        if c is None:
+            print(f"{value:>4} = ?")
+        elif full:
+            print(f"{c.value:>4} = {c.expr_full:<70}   [{c.cost:>3}]")
+        else:
+            print(f"{c.value:>4} = {c.expr_simple:<15}   [{c.cost:>3}]")
+
+    return True
+
+
+def benchmark(*, output: str = "calibration.json", time_limit: float = 10.0) -> bool:
+    """
+    Measure the engines on this host, to calibrate the estimates of '--dry_run' and '--engine auto'.
+
+    Every engine runs simulations of growing size (see 'onedigit.benchmark')
+    until one takes longer than 'time_limit'. The time of every simulation
+    is shown, and the calibration is written to a JSON file, to be given
+    to the main command with '--calibration'. For example:
+
+        onedigit benchmark --output calibration.json
+        onedigit --digit 7 --max_value 100000 --max_cost 9 --dry_run --calibration calibration.json
+
+    Args:
+        output (str, optional): JSON file to write the calibration to. Defaults to 'calibration.json'.
+        time_limit (float, optional): seconds after which an engine stops growing its simulations. Defaults to 10.
+
+    Returns:
+        bool: True if the calibration was written.
+    """
+    logger.debug(f"benchmark(output={output}, time_limit={time_limit})")
+
+    try:
+        time_limit = float(time_limit)
+    except ValueError:
+        logger.error("time_limit must be a number")
+        return False
+    if time_limit <= 0:
+        logger.error("time_limit must be positive")
+        return False
+
+    result, samples = onedigit.benchmark.run_benchmark(time_limit=time_limit)
+    print(f"{'engine':<12} {'max_value':>9} {'max_cost':>8} {'pairs':>10} {'seconds':>9}")
+    for s in samples:
+        print(f"{s.engine:<12} {s.max_value:>9} {s.max_cost:>8} {s.pairs:>10} {s.seconds:>9.3f}")
+
+    try:
+        with open(output, mode="w", encoding="utf-8") as output_fp:
+            json.dump(result.asdict(), output_fp, indent=2)
+    except OSError as e:
+        logger.error(f"failed to write the calibration to '{output}': {e}")
+        return False
+
+    logger.info(f"calibration written to '{output}'.")
+    return True
+
+
+# Commands other than the main one, selected by the first argument
+COMMANDS = {
+    "worker": worker,
+    "merge": merge,
+    "query": query,
+    "verify": verify,
+    "approximate": approximate,
+    "decompose": decompose,
+    "benchmark": benchmark,
+}
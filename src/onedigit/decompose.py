@@ -0,0 +1,248 @@
+"""Expressions for values far beyond a table, built by decomposing them against it."""
+
+import bisect
+import time
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Largest number of nested levels tried by default
+MAX_DEPTH = 2
+
+# Joint digits added to the table (say, 7777777777), by their cost
+MAX_JOINT_DIGITS = 20
+
+# Cost limit of a search that has found nothing yet
+NO_LIMIT = 10**9
+
+
+def integer_root(value: int, exponent: int) -> int:
+    """
+    Get the largest number whose power is not above a value.
+
+    Args:
+        value (int): positive number.
+        exponent (int): exponent of the power, 1 or more.
+
+    Returns:
+        int: root of the value, rounded down.
+    """
+    if value.bit_length() <= 52:
+        # Floats are exact enough for a start that is off by one at most
+        root: int = round(value ** (1.0 / exponent))
+        while root > 0 and root**exponent > value:
+            root -= 1
+        while (root + 1) ** exponent <= value:
+            root += 1
+        return root
+
+    # Newton's method, from a power of 2 above the root
+    root = 1 << -(-value.bit_length() // exponent)
+    while True:
+        smaller: int = ((exponent - 1) * root + value // root ** (exponent - 1)) // exponent
+        if smaller >= root:
+            return root
+        root = smaller
+
+
+class Decomposer:
+    """
+    Search expressions for large values, from the combinations of a finished model.
+
+    A target is written as 'a * b ± c' or 'b ^ a ± c', where 'a' and the
+    remainder 'c' come from the table. For products, 'b' is the quotient
+    of the target by 'a' (or the next number); for powers, it is the
+    nearest root. The remainder is then looked up, so every candidate
+    only takes a few lookups.
+
+    When 'b' is not in the table, it is decomposed in turn, up to a number
+    of nested levels: 'a * b * c ± d' takes one. A quotient can only be
+    decomposed into products if it is within reach of the levels left
+    (the largest value of the table, to the power of one more than the
+    levels), so only the factors large enough for that are tried.
+
+    Levels are searched in order, so a good expression is found early,
+    and deeper ones only need to beat it: factors are tried from the
+    cheapest ones, and the search stops at those that can not lead to a
+    cheaper expression.
+
+    The expressions are valid, but not necessarily the cheapest ones.
+
+    Args:
+        mymodel (onedigit.Model): model for the digit, run to convergence.
+
+    Raises:
+        ValueError: when the model has no combinations.
+    """
+
+    def __init__(self, mymodel: onedigit.Model) -> None:
+        self.table = {v: c for v, c in mymodel.state.items() if v >= 1}
+        if not self.table:
+            raise ValueError("the model has no combinations")
+        self.model = mymodel
+        self.ops = set(mymodel.ops)
+        self.max_value = max(self.table)
+
+        # Joint digits are always available, whatever the size of the table
+        expr = str(mymodel.digit)
+        for cost in range(1, MAX_JOINT_DIGITS + 1):
+            value = int(expr)
+            if value not in self.table or self.table[value].cost > cost:
+                self.table[value] = onedigit.Combo(value=value, cost=cost, expr_full=expr, expr_simple=expr)
+            expr += str(mymodel.digit)
+
+        # Factors of every cost, sorted by value
+        by_cost: dict[int, list[int]] = {}
+        for value, combo in self.table.items():
+            if value >= 2:
+                by_cost.setdefault(combo.cost, []).append(value)
+        self.factors = [(cost, sorted(values)) for cost, values in sorted(by_cost.items())]
+
+        self.exponents = sorted(
+            (v for v in self.table if 2 <= v <= onedigit.powers.MAX_EXPONENT), key=lambda v: self.table[v].cost
+        )
+        self.deadline = 0.0
+
+        # Target of the current search, and its best expression so far (kept if the time runs out)
+        self.target = 0
+        self.best: onedigit.Combo | None = None
+
+    def search(self, target: int, *, time_budget: float = 1.0, max_depth: int = MAX_DEPTH) -> onedigit.Combo | None:
+        """
+        Find the cheapest expression for a target, within a time budget.
+
+        Args:
+            target (int): positive value.
+            time_budget (float, optional): wall-clock seconds the search may run, 0 for no limit. Defaults to 1.
+            max_depth (int, optional): number of nested levels to try. Defaults to MAX_DEPTH.
+
+        Raises:
+            ValueError: when the target is not a positive integer.
+
+        Returns:
+            onedigit.Combo: cheapest combination found, or None if there is none.
+        """
+        if not isinstance(target, int) or isinstance(target, bool) or target < 1:
+            raise ValueError("the target must be a positive integer")
+        if target in self.table:
+            return self.table[target]
+
+        started = time.monotonic()
+        self.deadline = started + time_budget if time_budget else 0.0
+        self.target, self.best = target, None
+        try:
+            for depth in range(max_depth + 1):
+                self._search(target, depth, self.best.cost if self.best else NO_LIMIT)
+                logger.debug(f"{target} up to depth {depth}: {self.best}")
+        except TimeoutError:
+            logger.info(f"search for {target} stopped after {time.monotonic() - started:.3f} seconds.")
+        return self.best
+
+    def _search(self, target: int, depth: int, limit: int) -> onedigit.Combo | None:
+        """Find an expression for a target that costs less than a limit, with some nested levels."""
+        if self.deadline and time.monotonic() >= self.deadline:
+            raise TimeoutError
+        combo = self.table.get(target)
+        if combo is not None:
+            return combo if combo.cost < limit else None
+
+        best: onedigit.Combo | None = None
+
+        if "*" in self.ops:
+            # Factors whose quotient the levels left can reach
+            smallest = target // self.max_value ** (depth + 1)
+            for cost, values in self.factors:
+                if cost + 1 >= limit:
+                    break
+                # From the largest factors, whose quotients are the easiest to reach
+                for a in reversed(values[bisect.bisect_left(values, smallest) : bisect.bisect_right(values, target)]):
+                    # The quotient, and the next number
+                    q = target // a
+                    for b in (q, q + 1):
+                        best = self._try(self.table[a], b, target - a * b, "*", depth, limit, best)
+                        limit = self._improve(target, best, limit)
+
+        if "^" in self.ops:
+            # Without levels left, the base has to be in the table
+            bits = target.bit_length() - 1 if depth == 0 else 0
+            for e in self.exponents:
+                exponent = self.table[e]
+                if exponent.cost + 1 >= limit:
+                    break
+                if e * self.max_value.bit_length() < bits:
+                    continue
+                # The nearest roots below and above the target
+                root = integer_root(target, e)
+                for b in (root, root + 1):
+                    if b >= 2:
+                        best = self._try(exponent, b, target - b**e, "^", depth, limit, best)
+                        limit = self._improve(target, best, limit)
+
+        return best
+
+    def _improve(self, target: int, best: onedigit.Combo | None, limit: int) -> int:
+        """Get the cost limit after trying a candidate, and keep the best expression of the target searched."""
+        if best is None:
+            return limit
+        if target == self.target and (self.best is None or best.cost < self.best.cost):
+            self.best = best
+        return best.cost
+
+    def _try(
+        self,
+        known: onedigit.Combo,
+        operand: int,
+        difference: int,
+        op: str,
+        depth: int,
+        limit: int,
+        best: onedigit.Combo | None,
+    ) -> onedigit.Combo | None:
+        """Get the cheapest of the best combination and 'known op operand', plus a difference."""
+        add_op, rest = "", None
+        if difference:
+            add_op = "+" if difference > 0 else "-"
+            rest = self.table.get(abs(difference))
+            if add_op not in self.ops or rest is None:
+                return best
+
+        # The operand has to leave room for the rest of the expression
+        operand_limit = limit - known.cost - (rest.cost if rest else 0)
+        if operand_limit <= 1 or operand < 1:
+            return best
+        combo = self.table.get(operand)
+        if combo is None and depth > 0:
+            combo = self._search(operand, depth - 1, operand_limit)
+        if combo is None or combo.cost >= operand_limit:
+            return best
+
+        # Products put the known factor first, powers need the base first
+        combo = known.binary_operation(combo, op) if op == "*" else combo.binary_operation(known, op)
+        if rest is not None:
+            combo = combo.binary_operation(rest, add_op)
+        return combo
+
+
+def decompose(
+    mymodel: onedigit.Model, target: int, *, time_budget: float = 1.0, max_depth: int = MAX_DEPTH
+) -> onedigit.Combo | None:
+    """
+    Find an expression for a value far beyond a model, by decomposing it against the model.
+
+    See 'Decomposer' for the forms that are tried. To query many values,
+    build one 'Decomposer' and call its 'search' method instead.
+
+    Args:
+        mymodel (onedigit.Model): model for the digit, run to convergence.
+        target (int): positive value.
+        time_budget (float, optional): wall-clock seconds the search may run, 0 for no limit. Defaults to 1.
+        max_depth (int, optional): number of nested levels to try. Defaults to MAX_DEPTH.
+
+    Raises:
+        ValueError: when the model has no combinations, or the target is not valid.
+
+    Returns:
+        onedigit.Combo: cheapest combination found, or None if there is none.
+    """
+    return Decomposer(mymodel).search(target, time_budget=time_budget, max_depth=max_depth)
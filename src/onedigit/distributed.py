@@ -0,0 +1,389 @@
+"""Spread the rounds of a simulation across workers, connected over TCP."""
+
+import concurrent.futures
+import json
+import socket
+import socketserver
+import struct
+import time
+from typing import Any
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+DEFAULT_PORT = 7337
+
+# Messages are JSON documents, preceded by their length
+_LENGTH = struct.Struct("!I")
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    """
+    Send a message over a connection.
+
+    Args:
+        sock (socket.socket): connected socket.
+        message (dict[str, Any]): message to send, it must be JSON serializable.
+    """
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Read a number of bytes from a connection."""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock: socket.socket) -> dict[str, Any]:
+    """
+    Receive a message from a connection.
+
+    Args:
+        sock (socket.socket): connected socket.
+
+    Raises:
+        ConnectionError: if the connection is closed before a full message arrives.
+
+    Returns:
+        dict[str, Any]: message received.
+    """
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    message: dict[str, Any] = json.loads(_recv_exactly(sock, size).decode("utf-8"))
+    return message
+
+
+def _pack(combos: list[onedigit.Combo]) -> list[list[Any]]:
+    """Represent combinations compactly, as lists of their fields."""
+    return [[c.value, c.cost, c.expr_full, c.expr_simple] for c in combos]
+
+
+def _unpack(rows: list[list[Any]]) -> list[onedigit.Combo]:
+    """Rebuild combinations represented by '_pack'."""
+    return [onedigit.Combo(value=r[0], cost=r[1], expr_full=r[2], expr_simple=r[3]) for r in rows]
+
+
+# ------------------------------------------------------------
+# Worker
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    """
+    Serve one coordinator over a persistent connection.
+
+    Messages handled:
+        load:  replace the model with the one sent ('model', see 'Model.asdict').
+        round: apply the combinations in 'delta' to the model, then run the
+               pairs for first operands in positions ['start', 'stop') and
+               reply with the best combination found for each value.
+        stop:  close the connection.
+    """
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        mymodel: onedigit.Model | None = None
+        known: list[onedigit.Combo] = []
+
+        while True:
+            try:
+                message = recv_message(sock)
+            except (ConnectionError, OSError):
+                return
+
+            match message.get("cmd"):
+                case "load":
+                    mymodel = onedigit.Model.fromdict(message["model"])
+                    known = sorted(mymodel.state.values(), key=lambda c: c.value)
+                    send_message(sock, {"ok": True})
+
+                case "round":
+                    if mymodel is None:
+                        send_message(sock, {"error": "no model loaded"})
+                        continue
+                    if message["delta"]:
+                        for combo in _unpack(message["delta"]):
+                            mymodel.state[combo.value] = combo
+                        known = sorted(mymodel.state.values(), key=lambda c: c.value)
+
+                    buffer = onedigit.RoundBuffer(mymodel)
+                    pairs = mymodel.stats.pairs
+                    mymodel.run_pairs(known, buffer, message["start"], message["stop"])
+                    send_message(
+                        sock,
+                        {"found": _pack(list(buffer.found.values())), "pairs": mymodel.stats.pairs - pairs},
+                    )
+
+                case "stop":
+                    return
+
+                case _:
+                    send_message(sock, {"error": f"unknown command {message.get('cmd')}"})
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """TCP server that runs simulation work for a coordinator."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        super().__init__((host, port), _WorkerHandler)
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+    """
+    Run a worker until it is interrupted.
+
+    Args:
+        host (str, optional): address to listen on. Defaults to localhost.
+        port (int, optional): port to listen on. Defaults to 7337.
+    """
+    with WorkerServer(host, port) as server:
+        logger.info(f"worker listening on {host}:{port}.")
+        server.serve_forever()
+
+
+# ------------------------------------------------------------
+# Coordinator
+class _Connection:
+    """Persistent connection to a worker, and the version of the model it holds."""
+
+    def __init__(self, address: tuple[str, int], timeout: float) -> None:
+        self.address = address
+        self.timeout = timeout
+        self.sock: socket.socket | None = None
+        self.version: int | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.version = None
+
+    def request(self, message: dict[str, Any]) -> dict[str, Any]:
+        if self.sock is None:
+            self.sock = socket.create_connection(self.address, timeout=self.timeout)
+            self.version = None
+        send_message(self.sock, message)
+        reply = recv_message(self.sock)
+        if "error" in reply:
+            raise ConnectionError(f"worker {self} failed: {reply['error']}")
+        return reply
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Split an address in the form 'host:port'.
+
+    The port is optional, and defaults to 7337.
+
+    Raises:
+        ValueError: if the port is not a number.
+
+    Returns:
+        tuple[str, int]: host and port.
+    """
+    host, _, port = address.strip().rpartition(":")
+    if not host:
+        return port, DEFAULT_PORT
+    return host, int(port)
+
+
+class Coordinator:
+    """
+    Split rounds of a simulation across workers.
+
+    The first operands of each round (see 'Model.run_pairs') are split in
+    one contiguous range per worker. Workers keep a copy of the model,
+    which is kept in sync by sending the combinations that changed in the
+    previous round. A worker that fails has its range sent to another
+    worker (or run locally if none is left), and it is reconnected, with
+    a full copy of the model, in the next round.
+
+    Partial results are merged in the order of their ranges, so the state
+    is identical to the one produced by 'Model.simulate'.
+
+    Args:
+        addresses (list[str]): workers, in the form 'host:port'.
+        timeout (float, optional): seconds to wait for a worker. Defaults to 300.
+    """
+
+    def __init__(self, addresses: list[str], *, timeout: float = 300.0) -> None:
+        if not addresses:
+            raise ValueError("at least one worker is needed")
+        self.connections = [_Connection(parse_address(a), timeout) for a in addresses]
+        self.version = 0
+        self.delta: list[onedigit.Combo] = []
+        self._packed_delta: list[list[Any]] = []
+        self._model_dict: dict[str, Any] = {}
+
+    def _needs_load(self) -> bool:
+        """Check if any worker needs a full copy of the model."""
+        return any(conn.version is None or conn.version < self.version - 1 for conn in self.connections)
+
+    def close(self) -> None:
+        """Close the connection to every worker, and let them wait for another coordinator."""
+        for conn in self.connections:
+            if conn.sock is not None:
+                try:
+                    send_message(conn.sock, {"cmd": "stop"})
+                except OSError:
+                    pass
+            conn.close()
+
+    def __enter__(self) -> "Coordinator":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _run_range(self, conn: _Connection, start: int, stop: int) -> tuple[list[onedigit.Combo], int]:
+        """Run a range of first operands on a worker, bringing its model up to date first."""
+        delta: list[list[Any]] = []
+        if conn.version is not None and conn.version == self.version - 1:
+            delta = self._packed_delta
+        elif conn.version != self.version:
+            conn.request({"cmd": "load", "model": self._model_dict})
+        conn.version = self.version
+
+        reply = conn.request({"cmd": "round", "delta": delta, "start": start, "stop": stop})
+        return _unpack(reply["found"]), reply["pairs"]
+
+    def _attempt(
+        self, conn: _Connection, ranges: list[tuple[int, int]]
+    ) -> list[tuple[list[onedigit.Combo], int] | None]:
+        """Run ranges in order on a worker, returning None for those left when the worker failed."""
+        results: list[tuple[list[onedigit.Combo], int] | None] = [None] * len(ranges)
+        for k, (start, stop) in enumerate(ranges):
+            try:
+                results[k] = self._run_range(conn, start, stop)
+            except (OSError, ConnectionError, ValueError, KeyError) as e:
+                logger.warning(f"worker {conn} failed, its work will be retried: {e}")
+                conn.close()
+                break
+        return results
+
+    def simulate(self, mymodel: onedigit.Model) -> int:
+        """
+        Run one round of the simulation across the workers.
+
+        Args:
+            mymodel (onedigit.Model): model to advance.
+
+        Returns:
+            int: number of values that were updated.
+        """
+        known = sorted(mymodel.state.values(), key=lambda c: c.value)
+
+        # Workers catch up with the changes of the last round, or get the whole model
+        self._packed_delta = _pack(self.delta)
+        self._model_dict = mymodel.asdict() if self._needs_load() else {}
+
+        # Ranges with a similar number of pairs, split as for the 'threads' engine
+        ranges = onedigit.threads.split_ranges(len(known), len(self.connections))
+
+        results: list[tuple[list[onedigit.Combo], int] | None] = [None] * len(ranges)
+        pending = list(range(len(ranges)))
+        alive = list(self.connections)
+
+        while pending:
+            # One task per worker, so that a connection is never used by two threads
+            shares = {conn: pending[j :: len(alive)] for j, conn in enumerate(alive)}
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(alive))) as pool:
+                futures = {
+                    conn: pool.submit(self._attempt, conn, [ranges[i] for i in share])
+                    for conn, share in shares.items()
+                    if share
+                }
+            failed = []
+            for conn, future in futures.items():
+                for i, result in zip(shares[conn], future.result()):
+                    results[i] = result
+                    if result is None:
+                        failed.append(i)
+            failed.sort()
+
+            alive = [conn for conn in alive if conn.sock is not None]
+            pending = failed
+            if pending and alive and not self._model_dict:
+                self._model_dict = mymodel.asdict()
+            if pending and not alive:
+                logger.warning(f"no workers left, running {len(pending)} ranges locally.")
+                for i in pending:
+                    buffer = onedigit.RoundBuffer(mymodel)
+                    pairs = mymodel.stats.pairs
+                    mymodel.run_pairs(known, buffer, *ranges[i])
+                    results[i] = (list(buffer.found.values()), mymodel.stats.pairs - pairs)
+                    mymodel.stats.pairs = pairs
+                pending = []
+
+        # Merge in the order of the ranges
+        buffer = onedigit.RoundBuffer(mymodel)
+        for i, result in enumerate(results):
+            if result is None:
+                raise RuntimeError(f"range {ranges[i]} of first operands has no result after the retries")
+            found, pairs = result
+            mymodel.stats.pairs += pairs
+            for combo in found:
+                buffer.state_update(combo)
+
+        mymodel.apply_round(buffer)
+        mymodel.stats.complete = True
+
+        self.version += 1
+        self.delta = list(buffer.found.values())
+        return len(self.delta)
+
+
+def advance(mymodel: onedigit.Model, workers: list[str], max_steps: int = 10) -> onedigit.Model:
+    """
+    Perform iterations over a onedigit model, using remote workers.
+
+    Results are identical to 'simple.advance'. Progress is recorded in
+    'mymodel.stats'.
+
+    Args:
+        mymodel (onedigit.Model): model at the begining of the simulation.
+        workers (list[str]): workers to use, in the form 'host:port'.
+        max_steps (int): maximum number of steps (iterations) to run. Defaults to 10.
+
+    Returns:
+        onedigit.Model: reference to the updated model.
+    """
+    logger.debug(f"distributed.advance(mymodel={mymodel}, workers={workers}, max_steps={max_steps})")
+
+    start = time.monotonic()
+    stats = mymodel.stats
+    stats.stop_reason = "max_steps"
+    stats.certified = False
+
+    with Coordinator(workers) as coordinator:
+        for step in range(1, max_steps + 1):
+            updates = coordinator.simulate(mymodel)
+            stats.rounds += 1
+            stats.updates += updates
+
+            if updates == 0:
+                logger.info(f"stopping early as state does not advance past {step} iterations.")
+                stats.stop_reason = "converged"
+                break
+            if onedigit.goals.fixpoint_certificate(mymodel, coordinator.delta):
+                logger.info(f"iteration {step} found {updates} new combinations, and no other round can improve them.")
+                stats.stop_reason = "converged"
+                stats.certified = True
+                break
+            logger.info(f"iteration {step} found {updates} new combinations.")
+
+    stats.elapsed += time.monotonic() - start
+    return mymodel
@@ -0,0 +1,157 @@
+"""Goals that end a simulation early, and a check that proves a simulation reached its fixed point."""
+
+import bisect
+import re
+from collections.abc import Iterable
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+_COST_GOAL = re.compile(r"cost\s*<=\s*(\d+)")
+
+
+def parse_goal(text: str) -> int:
+    """
+    Parse a goal, 'coverage' or 'cost<=K' (see 'GoalTracker').
+
+    Args:
+        text (str): goal to parse.
+
+    Raises:
+        ValueError: when the goal is not valid.
+
+    Returns:
+        int: largest cost values can have to count for the goal, 0 for any cost.
+    """
+    text = text.strip()
+    if text == "coverage":
+        return 0
+    if match := _COST_GOAL.fullmatch(text):
+        cost = int(match.group(1))
+        if cost < 1:
+            raise ValueError("the cost of a goal must be a positive number")
+        return cost
+    raise ValueError(f"unknown goal '{text}', use 'coverage' or 'cost<=K'")
+
+
+class GoalTracker:
+    """
+    Follow how far a simulation is from a goal, as improvements are found.
+
+    Goals:
+        coverage: every value from 1 to 'max_value' has a combination.
+        cost<=K:  every value from 1 to 'max_value' has a combination of cost K or less.
+
+    Improvements (see 'Model.simulate_iter') are counted as they arrive,
+    so the simulation can stop in the middle of the round that reaches
+    the goal. The costs are then the best found so far, not the best
+    possible ones.
+
+    Args:
+        mymodel (onedigit.Model): model the simulation runs on.
+        goal (str): goal to reach, as described above.
+
+    Raises:
+        ValueError: when the goal is not valid.
+    """
+
+    def __init__(self, mymodel: onedigit.Model, goal: str) -> None:
+        self.model = mymodel
+        self.goal = goal
+        self.cost = parse_goal(goal)
+
+        # Values from 1 to 'max_value' still missing
+        self.missing = 0
+        self.recount()
+
+    @property
+    def limit(self) -> int:
+        """Largest cost a value can have to count for the goal."""
+        return self.cost or self.model.max_cost
+
+    def recount(self) -> None:
+        """Count the missing values from the state of the model (say, after its limits changed)."""
+        mymodel, limit = self.model, self.limit
+        reached = sum(1 for v, c in mymodel.state.items() if 1 <= v <= mymodel.max_value and c.cost <= limit)
+        self.missing = mymodel.max_value - reached
+
+    def update(self, found: onedigit.Improvement) -> bool:
+        """
+        Account for an improvement.
+
+        Args:
+            found (onedigit.Improvement): combination accepted by a round.
+
+        Returns:
+            bool: True if the goal is reached.
+        """
+        limit = self.limit
+        if found.new_cost <= limit and not (0 < found.old_cost <= limit):
+            self.missing -= 1
+        return self.reached
+
+    @property
+    def reached(self) -> bool:
+        """True if the goal is reached."""
+        return self.missing <= 0
+
+
+def fixpoint_certificate(mymodel: onedigit.Model, changed: Iterable[onedigit.Combo]) -> bool:
+    """
+    Check, without running a round, that the next round would find nothing.
+
+    It must be called right after a round that tried every pair of the
+    state it started from, with the combinations that round changed.
+    Pairs of combinations that did not change were tried then, and the
+    state only gets cheaper, so they can not improve it. Anything new
+    needs an operand that changed, so only those pairs are tried, and
+    only with partners cheap enough for the result to improve a value
+    that is not closed (see 'Model.useful_cost').
+
+    Late rounds change few combinations, and mostly costly ones, so the
+    check visits a small fraction of the pairs of a round. It stops at
+    the first improvement; a round is needed then.
+
+    Args:
+        mymodel (onedigit.Model): model after the round.
+        changed (Iterable[onedigit.Combo]): combinations changed by the round.
+
+    Returns:
+        bool: True if the model is proven to be at its fixed point.
+    """
+    unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(mymodel.ops)
+    # Costlier candidates can only be for closed values (see 'Model.useful_cost')
+    state, max_value, max_cost = mymodel.state, mymodel.max_value, mymodel.useful_cost()
+
+    def improves(candidate: onedigit.Combo) -> bool:
+        value, cost = candidate.value, candidate.cost
+        current = state.get(value)
+        return cost <= max_cost and 1 <= value <= max_value and (current is None or cost < current.cost)
+
+    # Combinations by cost, so partners are taken from the cheapest up
+    by_cost = sorted(state.values(), key=lambda c: c.cost)
+    costs = [c.cost for c in by_cost]
+
+    pairs = 0
+    try:
+        for combo1 in changed:
+            for op in unary_ops:
+                if improves(combo1.unary_operation(op=op)):
+                    return False
+
+            if not (ordered_ops or unordered_ops):
+                continue
+            partners = by_cost[: bisect.bisect_right(costs, max_cost - combo1.cost)]
+            pairs += len(partners)
+            for combo2 in partners:
+                first, second = (combo1, combo2) if combo1.value >= combo2.value else (combo2, combo1)
+                for op in ordered_ops:
+                    if improves(first.binary_operation(second, op)):
+                        return False
+                for op in unordered_ops:
+                    if improves(combo1.binary_operation(combo2, op)) or improves(combo2.binary_operation(combo1, op)):
+                        return False
+        return True
+    finally:
+        mymodel.stats.pairs += pairs
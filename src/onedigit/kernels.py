@@ -0,0 +1,365 @@
+"""Set-at-a-time kernels that replace the per-pair loop for some operations."""
+
+import array
+import functools
+import math
+from collections.abc import Callable, Iterator
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Candidate values (as a bitset), and how to build the combination of one of them
+Candidates = tuple[int, Callable[[int], onedigit.Combo]]
+
+
+def to_bits(values: list[int]) -> int:
+    """
+    Build a bitset, as an integer, with a bit set for each value.
+
+    Args:
+        values (list[int]): non-negative values.
+
+    Returns:
+        int: integer where bit 'v' is set for every value 'v'.
+    """
+    if not values:
+        return 0
+    buf = bytearray(max(values) // 8 + 1)
+    for v in values:
+        buf[v >> 3] |= 1 << (v & 7)
+    return int.from_bytes(buf, "little")
+
+
+def members(bits: int) -> Iterator[int]:
+    """
+    List the values in a bitset.
+
+    Bits are located with string searches over the binary representation,
+    so the cost follows the size of the set rather than the largest value.
+
+    Args:
+        bits (int): bitset, as built by 'to_bits'.
+
+    Yields:
+        int: values in the set, from largest to smallest.
+    """
+    text = bin(bits)
+    top = len(text) - 1
+    pos = text.find("1", 2)
+    while pos != -1:
+        yield top - pos
+        pos = text.find("1", pos + 1)
+
+
+@functools.lru_cache(maxsize=4)
+def smallest_factors(limit: int) -> array.array:  # type: ignore[type-arg]
+    """
+    Build a table with the smallest prime factor of every number up to a limit.
+
+    Multiples of each prime are set with slice assignments, from the
+    largest prime to the smallest, so the smallest factor is the one left.
+
+    Args:
+        limit (int): largest number in the table.
+
+    Returns:
+        array.array: entry 'n' is the smallest prime factor of 'n' (or 'n', for 0, 1 and primes).
+    """
+    spf = array.array("I", range(limit + 1))
+    root = math.isqrt(limit)
+    primes = [p for p in range(2, root + 1) if all(p % q for q in range(2, math.isqrt(p) + 1))]
+    for p in reversed(primes):
+        count = len(range(p * p, limit + 1, p))
+        spf[p * p :: p] = array.array("I", [p]) * count
+    return spf
+
+
+def divisors(n: int, spf: array.array) -> list[int]:  # type: ignore[type-arg]
+    """
+    List the divisors of a number.
+
+    Args:
+        n (int): positive number, at most the limit of 'spf'.
+        spf (array.array): table built by 'smallest_factors'.
+
+    Returns:
+        list[int]: divisors of 'n', in no particular order.
+    """
+    result = [1]
+    while n > 1:
+        p, e = spf[n], 0
+        while n % p == 0:
+            n //= p
+            e += 1
+        result = [d * p**k for d in result for k in range(e + 1)]
+    return result
+
+
+class CostClass:
+    """
+    Combinations of a round that share the same cost.
+
+    Args:
+        combos (list[Combo]): combinations with the same cost.
+    """
+
+    def __init__(self, combos: list[onedigit.Combo]) -> None:
+        self.combos = {c.value: c for c in combos}
+        self.values = sorted(self.combos)
+        self.bits = to_bits(self.values)
+        self._divisors: dict[int, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.combos)
+
+    def divisors(self, spf: array.array) -> dict[int, list[int]]:  # type: ignore[type-arg]
+        """Divisors of every value of the class, computed on first use."""
+        if not self._divisors:
+            self._divisors = {v: divisors(v, spf) for v in self.values}
+        return self._divisors
+
+
+class KernelContext:
+    """
+    Information about a round, shared by the kernels.
+
+    Args:
+        limit (int): largest value the model retains.
+        largest (int): largest value of a combination in the round.
+    """
+
+    def __init__(self, limit: int, largest: int) -> None:
+        self.limit = limit
+        self.largest = largest
+
+    @property
+    def spf(self) -> array.array:  # type: ignore[type-arg]
+        """Smallest prime factors of the values of the round."""
+        return smallest_factors(max(self.limit, self.largest))
+
+
+# ------------------------------------------------------------
+# Addition and subtraction, as shifts over bitsets
+def sum_kernel(class1: CostClass, class2: CostClass, context: KernelContext) -> Candidates:
+    """
+    Add every value of a class to every value of another one.
+
+    The bitset of the larger class is shifted by each value of the
+    smaller one, so there is one shift and one 'or' per value, instead
+    of one operation per pair.
+    """
+    small, large = (class1, class2) if len(class1) <= len(class2) else (class2, class1)
+    bits, acc = large.bits, 0
+    for v in small.values:
+        acc |= bits << v
+
+    def build(value: int) -> onedigit.Combo:
+        for v, combo in small.combos.items():
+            other = large.combos.get(value - v)
+            if other is not None:
+                # Larger operand first, as in 'Model.run_pairs'
+                if combo.value >= other.value:
+                    return combo.binary_operation(other, "+")
+                return other.binary_operation(combo, "+")
+        raise ValueError(f"{value} is not a sum of the classes")
+
+    return acc, build
+
+
+def difference_kernel(class1: CostClass, class2: CostClass, context: KernelContext) -> Candidates:
+    """Subtract every value of the second class from the values of the first one that are not smaller."""
+    bits, acc = class1.bits, 0
+    for v in class2.values:
+        acc |= bits >> v
+
+    def build(value: int) -> onedigit.Combo:
+        for v, combo in class2.combos.items():
+            other = class1.combos.get(value + v)
+            if other is not None:
+                return other.binary_operation(combo, "-")
+        raise ValueError(f"{value} is not a difference of the classes")
+
+    return acc, build
+
+
+# ------------------------------------------------------------
+# Multiplication and division, over multiples and divisors
+def product_kernel(class1: CostClass, class2: CostClass, context: KernelContext) -> Candidates:
+    """
+    Multiply the values of two classes, up to the largest value of the model.
+
+    Values of the second class are sorted, so each first operand stops at
+    the last multiple within the limit. Only products that are in range
+    are visited.
+    """
+    found: dict[int, tuple[onedigit.Combo, onedigit.Combo]] = {}
+    same = class1 is class2
+    for a in class1.values:
+        combo1, bound = class1.combos[a], context.limit // a
+        for b in class2.values:
+            if b > bound or (same and b > a):
+                break
+            if a * b not in found:
+                # Larger operand first, as in 'Model.run_pairs'
+                combo2 = class2.combos[b]
+                found[a * b] = (combo1, combo2) if a >= b else (combo2, combo1)
+
+    def build(value: int) -> onedigit.Combo:
+        combo1, combo2 = found[value]
+        return combo1.binary_operation(combo2, "*")
+
+    return to_bits(list(found)), build
+
+
+def quotient_kernel(class1: CostClass, class2: CostClass, context: KernelContext) -> Candidates:
+    """
+    Divide the values of the first class by the values of the second one, when exact.
+
+    For each value of the first class, only its divisors are looked up in
+    the second class, instead of testing every pair.
+    """
+    found: dict[int, tuple[onedigit.Combo, onedigit.Combo]] = {}
+    for a, divs in class1.divisors(context.spf).items():
+        combo1 = class1.combos[a]
+        for b in divs:
+            combo2 = class2.combos.get(b)
+            if combo2 is not None and a // b not in found:
+                found[a // b] = (combo1, combo2)
+
+    def build(value: int) -> onedigit.Combo:
+        combo1, combo2 = found[value]
+        return combo1.binary_operation(combo2, "/")
+
+    return to_bits(list(found)), build
+
+
+onedigit.operators.register_kernel("+", sum_kernel)
+onedigit.operators.register_kernel("-", difference_kernel)
+onedigit.operators.register_kernel("*", product_kernel)
+onedigit.operators.register_kernel("/", quotient_kernel)
+
+
+def kernel_ops(ops: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Select the operations that have a kernel.
+
+    Args:
+        ops (tuple[str, ...]): names of operations.
+
+    Returns:
+        tuple[str, ...]: those with a kernel registered.
+    """
+    return tuple(op for op in ops if onedigit.operators.OPERATORS[op].kernel is not None)
+
+
+def run_kernels(
+    mymodel: onedigit.Model,
+    known: list[onedigit.Combo],
+    new_combos: onedigit.RoundBuffer,
+    ops: tuple[str, ...] | None = None,
+) -> int:
+    """
+    Apply operations to every pair of combinations of a round, using their kernels.
+
+    Combinations are grouped by cost, and pairs of cost classes are visited
+    by the cost of their results, cheapest first, so a value is only kept
+    the first time it is reached. Each kernel gives the values it reaches
+    as a bitset, and combinations (and their expressions) are only built
+    for values that improve on the state of the model.
+
+    Kernels of commutative operations run once for each pair of classes,
+    the others run with the classes in both orders.
+
+    The costs found are the same as with 'Model.run_pairs' for these
+    operations; when several pairs reach a value at the same cost, the
+    expression kept may be a different one.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round.
+        new_combos (RoundBuffer): buffer receiving the new combinations.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to
+            the operations of the model that have a kernel.
+
+    Raises:
+        ValueError: when one of the operations has no kernel.
+
+    Returns:
+        int: number of updates.
+    """
+    return sum(1 for _ in iter_kernels(mymodel, known, new_combos, ops))
+
+
+def iter_kernels(
+    mymodel: onedigit.Model,
+    known: list[onedigit.Combo],
+    new_combos: onedigit.RoundBuffer,
+    ops: tuple[str, ...] | None = None,
+) -> Iterator[onedigit.Improvement]:
+    """
+    Apply operations to every pair of combinations of a round, producing improvements as they are found.
+
+    Same as 'run_kernels'.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round.
+        new_combos (RoundBuffer): buffer receiving the new combinations.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to
+            the operations of the model that have a kernel.
+
+    Raises:
+        ValueError: when one of the operations has no kernel.
+
+    Yields:
+        Improvement: combinations accepted by the buffer.
+    """
+    if ops is None:
+        ops = kernel_ops(mymodel.ops)
+    # Operators and their kernels, picked once for the whole round
+    kernels = []
+    for op in ops:
+        operator = onedigit.operators.OPERATORS[op]
+        if operator.kernel is None:
+            raise ValueError(f"operation '{operator.name}' has no kernel")
+        kernels.append((operator, operator.kernel))
+
+    by_cost: dict[int, list[onedigit.Combo]] = {}
+    for combo in known:
+        by_cost.setdefault(combo.cost, []).append(combo)
+    classes = {cost: CostClass(combos) for cost, combos in by_cost.items()}
+    context = KernelContext(mymodel.max_value, max((c.value for c in known), default=0))
+
+    # Values already reached at each cost, before the kernels run
+    reached: dict[int, list[int]] = {}
+    for combo in known:
+        reached.setdefault(combo.cost, []).append(combo.value)
+    for combo in new_combos.found.values():
+        reached.setdefault(combo.cost, []).append(combo.value)
+
+    in_range = (1 << (mymodel.max_value + 1)) - 2
+    covered = 0
+    # Costlier candidates can only be for closed values (see 'Model.useful_cost')
+    for total in range(1, mymodel.useful_cost() + 1):
+        covered |= to_bits(reached.get(total, []))
+
+        for cost1 in range(1, total // 2 + 1):
+            cost2 = total - cost1
+            if cost1 not in classes or cost2 not in classes:
+                continue
+            class1, class2 = classes[cost1], classes[cost2]
+
+            for operator, kernel in kernels:
+                if operator.commutative or cost1 == cost2:
+                    directions = [(class1, class2)]
+                else:
+                    directions = [(class1, class2), (class2, class1)]
+
+                for first, second in directions:
+                    bits, build = kernel(first, second, context)
+                    fresh = bits & in_range & ~covered
+                    for value in members(fresh):
+                        if found := new_combos.offer(build(value)):
+                            yield found
+                    covered |= fresh
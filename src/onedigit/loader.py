@@ -0,0 +1,358 @@
+"""Incremental loading of model snapshots stored as JSON."""
+
+import json
+import re
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Keys of a model, besides its combinations
+MODEL_KEYS = ("digit", "max_value", "max_cost")
+
+CHUNK_SIZE = 1 << 16
+
+# Separator between combinations, and the whitespace around it
+_SEPARATOR = re.compile(r"[ \t\r\n]*([,\]])[ \t\r\n]*")
+
+
+class SnapshotReader:
+    """
+    Read a JSON model snapshot (see 'Model.asdict') without decoding it all at once.
+
+    The document is read in chunks. Scalar keys of the model are stored in
+    'header' as they are found, and the 'combinations' array is decoded
+    one element at a time by 'combinations()'.
+
+    Snapshots written by 'Model.asdict' have every model key before the
+    combinations, so the header is complete before the first combination
+    is produced.
+
+    Args:
+        fp (TextIO): file object opened in text mode.
+        chunk_size (int, optional): number of characters to read at a time.
+    """
+
+    header: dict[str, Any]
+
+    def __init__(self, fp: TextIO, *, chunk_size: int = CHUNK_SIZE) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+        self._started = False
+        self._pending: str | None = None
+        self.header = {}
+
+    # ------------------------------------------------------------
+    # Low level parsing over a moving buffer
+    def _fill(self) -> bool:
+        """Read another chunk from the file, dropping the consumed part of the buffer."""
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace, and return the next character ('' at the end of the file)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of 'chars'."""
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"invalid snapshot: expected one of '{chars}' but found '{c}'")
+        self._pos += 1
+        return c
+
+    def _decode(self) -> Any:
+        """Decode the next JSON value, reading more of the file as needed."""
+        self._peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f"invalid snapshot: {e}") from e
+
+            # A number could continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    # ------------------------------------------------------------
+    def _next_key(self) -> str | None:
+        """Move to the next key of the model object, or return None after the last one."""
+        if not self._started:
+            self._expect("{")
+            self._started = True
+            if self._peek() == "}":
+                self._pos += 1
+                return None
+        elif self._expect(",}") == "}":
+            return None
+
+        key = self._decode()
+        if not isinstance(key, str):
+            raise ValueError("invalid snapshot: keys must be strings")
+        self._expect(":")
+        return key
+
+    def read_header(self) -> dict[str, Any]:
+        """
+        Read the model keys up to the start of the combinations.
+
+        Returns:
+            dict[str, Any]: model keys found so far.
+        """
+        while True:
+            key = self._next_key()
+            if key is None or key == "combinations":
+                self._pending = key
+                return self.header
+            self.header[key] = self._decode()
+
+    def combinations(self) -> Iterator[dict[str, Any]]:
+        """
+        Decode the combinations, one at a time.
+
+        Keys that follow the combinations are added to 'header' once the
+        iterator is exhausted.
+
+        Raises:
+            ValueError: if the document is not a valid snapshot.
+
+        Yields:
+            dict[str, Any]: dictionary representation of a combination.
+        """
+        if not self._started:
+            self.read_header()
+        if self._pending != "combinations":
+            raise ValueError("input dictionary is missing key combinations")
+
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+        else:
+            raw_decode = self._decoder.raw_decode
+            while True:
+                buf, pos = self._buf, self._pos
+
+                # Fast path: decode every complete element in the buffer with one call.
+                # If the cut falls inside a string, decoding fails and elements are
+                # decoded one at a time instead.
+                cut = buf.rfind("},", pos)
+                if cut > pos:
+                    try:
+                        objs = json.loads("[" + buf[pos : cut + 1] + "]")
+                    except json.JSONDecodeError:
+                        objs = None
+                    if objs is not None:
+                        self._pos = cut + 2
+                        self._peek()
+                        yield from objs
+                        continue
+
+                try:
+                    obj, end = raw_decode(buf, pos)
+                    sep = _SEPARATOR.match(buf, end)
+                except json.JSONDecodeError as e:
+                    if self._fill():
+                        continue
+                    raise ValueError(f"invalid snapshot: {e}") from e
+
+                if sep is None or sep.end() == len(buf):
+                    # The separator may be in the next chunk
+                    if self._fill():
+                        continue
+                    if sep is None:
+                        raise ValueError("invalid snapshot: combinations are not terminated")
+
+                self._pos = sep.end()
+                yield obj
+                if sep.group(1) == "]":
+                    break
+
+        # Remaining keys of the model
+        while (key := self._next_key()) is not None:
+            self.header[key] = self._decode()
+
+
+def _batched(items: Iterator[Any], size: int) -> Iterator[list[Any]]:
+    """Group the items of an iterator in lists of up to 'size' elements."""
+    batch: list[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validate(batch: list[Any]) -> None:
+    """
+    Check a batch of combination dictionaries.
+
+    The common case is checked in one pass over the batch. Only when that
+    fails, each element goes through 'Combo.fromdict' to report the error.
+
+    Raises:
+        ValueError: when one of the dictionaries is not valid.
+    """
+    valid = all(
+        type(d) is dict
+        and type(d.get("value")) is int
+        and type(d.get("cost")) is int
+        and type(d.get("expr_full")) is str
+        and type(d.get("expr_simple")) is str
+        for d in batch
+    )
+    if not valid:
+        for d in batch:
+            if not isinstance(d, dict):
+                raise ValueError(f"combinations must be dictionaries, but found '{type(d).__name__}'")
+            onedigit.Combo.fromdict(d)
+
+
+def check_ops(snapshot_ops: Any, ops: tuple[str, ...] | None) -> None:
+    """
+    Check the operations recorded in a snapshot.
+
+    Args:
+        snapshot_ops (Any): value of the 'ops' key of the snapshot.
+        ops (tuple[str, ...], optional): operations requested. Defaults to accepting any.
+
+    Raises:
+        ValueError: when the operations are not valid, or differ from the ones requested.
+    """
+    if not isinstance(snapshot_ops, list | tuple) or not all(isinstance(op, str) for op in snapshot_ops):
+        raise ValueError("invalid snapshot: ops must be a list of operations")
+    if ops is not None and set(snapshot_ops) != set(ops):
+        raise ValueError(f"snapshot uses operations {' '.join(snapshot_ops)}, but {' '.join(ops)} were requested")
+
+
+def validated_batches(reader: SnapshotReader, *, batch_size: int = 4096) -> Iterator[list[dict[str, Any]]]:
+    """
+    Decode the combinations of a snapshot in validated batches.
+
+    Args:
+        reader (SnapshotReader): reader of the snapshot.
+        batch_size (int, optional): number of combinations validated at a time.
+
+    Raises:
+        ValueError: when a combination is not valid.
+
+    Yields:
+        list[dict[str, Any]]: dictionary representations of combinations.
+    """
+    for batch in _batched(reader.combinations(), batch_size):
+        _validate(batch)
+        yield batch
+
+
+def load_model(
+    fp: TextIO,
+    *,
+    digit: int = 0,
+    max_value: int = 0,
+    max_cost: int = 0,
+    ops: tuple[str, ...] | None = None,
+    batch_size: int = 4096,
+) -> onedigit.Model:
+    """
+    Load a model from a JSON snapshot, keeping only the combinations needed.
+
+    Combinations are decoded and validated in batches, and added to the
+    state directly. Those above 'max_value' or 'max_cost' are dropped as
+    they are read, so memory use follows what is kept rather than the size
+    of the file. When combinations are sorted by value, and every key of
+    the model comes before them (both as written by 'Model.asdict'),
+    reading stops at the first value above 'max_value'.
+
+    Args:
+        fp (TextIO): file object with the snapshot, opened in text mode.
+        digit (int, optional): expected digit. Defaults to accepting any digit.
+        max_value (int, optional): largest value to keep. Defaults to the one in the snapshot.
+        max_cost (int, optional): largest cost to keep. Defaults to the one in the snapshot.
+        ops (tuple[str, ...], optional): operations the model must use. Defaults to accepting any.
+        batch_size (int, optional): number of combinations validated at a time.
+
+    Raises:
+        ValueError: when the snapshot is not valid, or is for a different digit or operations.
+
+    Returns:
+        onedigit.Model: the model described by the snapshot.
+    """
+    logger.debug(f"load_model(digit={digit}, max_value={max_value}, max_cost={max_cost})")
+
+    reader = SnapshotReader(fp)
+    header = reader.read_header()
+
+    if digit and "digit" in header and header["digit"] != digit:
+        raise ValueError(f"snapshot is for digit={header['digit']}, but digit={digit} was requested")
+    if "ops" in header:
+        check_ops(header["ops"], ops)
+
+    value_limit, cost_limit = max_value, max_cost
+    # Keys may follow the combinations (in any order, it is still valid JSON): without
+    # all of them, the whole file is read, so that none is missed
+    header_complete = all(k in header for k in (*MODEL_KEYS, "ops"))
+
+    state: dict[int, onedigit.Combo] = {}
+    in_order, last_value, stop = True, 0, False
+    for batch in validated_batches(reader, batch_size=batch_size):
+        for d in batch:
+            value, cost = d["value"], d["cost"]
+            in_order = in_order and value > last_value
+            last_value = value
+
+            if value_limit and value > value_limit:
+                # Values are sorted, so no other value is needed
+                stop = in_order and header_complete
+                if stop:
+                    break
+                continue
+            if cost_limit and cost > cost_limit:
+                continue
+
+            state[value] = onedigit.Combo(
+                value=value, cost=cost, expr_full=d["expr_full"], expr_simple=d["expr_simple"]
+            )
+        if stop:
+            break
+
+    for k in MODEL_KEYS:
+        if k not in header:
+            raise ValueError(f"input dictionary is missing key {k}")
+    if digit and header["digit"] != digit:
+        raise ValueError(f"snapshot is for digit={header['digit']}, but digit={digit} was requested")
+    snapshot_ops = header.get("ops", onedigit.operators.ALL_OPS)
+    check_ops(snapshot_ops, ops)
+
+    mymodel = onedigit.Model(digit=header["digit"], ops=tuple(snapshot_ops))
+    mymodel.max_value = min(header["max_value"], value_limit) if value_limit else header["max_value"]
+    mymodel.max_cost = min(header["max_cost"], cost_limit) if cost_limit else header["max_cost"]
+    mymodel.state = state
+
+    logger.info(f"loaded {len(state)} combinations for digit {mymodel.digit}.")
+    return mymodel
@@ -0,0 +1,106 @@
+"""Streaming merge of model snapshots for the same digit."""
+
+import heapq
+import itertools
+import json
+from collections.abc import Iterator, Sequence
+from typing import Any, TextIO
+
+import onedigit
+from onedigit.loader import MODEL_KEYS, SnapshotReader, check_ops, validated_batches
+
+logger = onedigit.get_logger(__name__)
+
+
+def _sorted_combinations(reader: SnapshotReader, name: str) -> Iterator[dict[str, Any]]:
+    """
+    Produce the combinations of a snapshot, checking they are valid and sorted by value.
+
+    Raises:
+        ValueError: when a combination is not valid, or values are not increasing.
+    """
+    last_value = 0
+    for batch in validated_batches(reader, batch_size=1024):
+        for d in batch:
+            if d["value"] <= last_value:
+                raise ValueError(f"combinations in '{name}' are not sorted by value ({d['value']} after {last_value})")
+            last_value = d["value"]
+            yield d
+
+
+def merge_snapshots(inputs: Sequence[TextIO], output: TextIO, *, names: list[str] | None = None) -> int:
+    """
+    Merge snapshots of models for the same digit, keeping the cheapest combination of every value.
+
+    Snapshots are read incrementally (see 'onedigit.loader.SnapshotReader'),
+    and their combinations, which 'Model.asdict' sorts by value, go through
+    a k-way merge. The result is written as it is produced, so memory use
+    does not depend on the number or the size of the inputs.
+
+    The merged model has the largest 'max_value' and 'max_cost' of the
+    inputs. When several inputs have a value at the same cost, the one
+    from the earliest input is kept.
+
+    Args:
+        inputs (Sequence[TextIO]): snapshots, opened in text mode.
+        output (TextIO): file receiving the merged snapshot, opened in text mode.
+        names (list[str], optional): names of the inputs, used in errors. Defaults to their position.
+
+    Raises:
+        ValueError: when a snapshot is not valid, or the snapshots are for
+            different digits or operations.
+
+    Returns:
+        int: number of combinations written.
+    """
+    if not inputs:
+        raise ValueError("at least one snapshot is needed")
+    if names is None:
+        names = [f"input {i}" for i in range(len(inputs))]
+    logger.debug(f"merge_snapshots(inputs={names})")
+
+    readers = [SnapshotReader(fp) for fp in inputs]
+    headers = [reader.read_header() for reader in readers]
+
+    # Every snapshot describes the same kind of model
+    for name, header in zip(names, headers):
+        for k in MODEL_KEYS:
+            if k not in header:
+                raise ValueError(f"snapshot '{name}' is missing key {k} before its combinations")
+        check_ops(header.get("ops", onedigit.operators.ALL_OPS), None)
+    first = headers[0]
+    ops = list(first.get("ops", onedigit.operators.ALL_OPS))
+    for name, header in zip(names[1:], headers[1:]):
+        if header["digit"] != first["digit"]:
+            raise ValueError(f"snapshot '{name}' is for digit={header['digit']}, but '{names[0]}' has {first['digit']}")
+        if set(header.get("ops", onedigit.operators.ALL_OPS)) != set(ops):
+            raise ValueError(f"snapshot '{name}' uses operations other than those of '{names[0]}'")
+
+    # Same layout as 'Model.asdict'
+    head = {
+        "digit": first["digit"],
+        "max_cost": max(h["max_cost"] for h in headers),
+        "max_value": max(h["max_value"] for h in headers),
+        "ops": ops,
+    }
+    encoder = json.JSONEncoder()
+    output.write(encoder.encode(head)[:-1] + ', "combinations": [')
+
+    streams = [_sorted_combinations(reader, name) for reader, name in zip(readers, names)]
+    merged = heapq.merge(*streams, key=lambda d: d["value"])
+
+    has_ops = ["ops" in header for header in headers]
+    count = 0
+    for _, group in itertools.groupby(merged, key=lambda d: d["value"]):
+        best = min(group, key=lambda d: d["cost"])
+        combo = {k: best[k] for k in ["value", "cost", "expr_full", "expr_simple"]}
+        output.write((", " if count else "") + encoder.encode(combo))
+        count += 1
+
+    # The operations were compared before the combinations
+    for name, header, had_ops in zip(names, headers, has_ops):
+        if not had_ops and "ops" in header:
+            raise ValueError(f"snapshot '{name}' has key ops after its combinations")
+    output.write("]}")
+    logger.info(f"merged {len(inputs)} snapshots into {count} combinations for digit {first['digit']}.")
+    return count
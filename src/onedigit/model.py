@@ -3,14 +3,22 @@
 # Needed so classes can make self references to their type
 from __future__ import annotations
 
+import bisect
 import dataclasses
+import itertools
 import math
+import sys
+import time
+from collections.abc import Generator, Iterator
 from typing import Any, List
 
 import onedigit
 
 logger = onedigit.get_logger(__name__)
 
+# Ways to run a round (see 'Model.simulate')
+ENGINES = ("pairs", "kernels", "propagate", "specialized", "threads", "shards")
+
 
 @dataclasses.dataclass
 class Combo:
@@ -257,23 +265,138 @@ class Combo:
         return Combo(value=rc_val, cost=cost, expr_full=rc_expr_full, expr_simple=rc_expr_simple)
 
 
+@dataclasses.dataclass
+class RunStats:
+    """
+    Progress information about the simulation of a Model.
+
+    Args:
+        rounds (int): number of rounds that were run.
+        updates (int): number of combinations updated across all rounds.
+        pairs (int): number of operand pairs that were evaluated.
+        elapsed (float): wall-clock seconds spent running rounds.
+        complete (bool): False if the last round was cut short.
+        stop_reason (str): why the last run stopped.
+        certified (bool): True if the last run converged without a round to confirm it
+            (see 'onedigit.goals.fixpoint_certificate').
+        peak_memory (int): largest estimate of memory used by a round, in bytes.
+        degradations (list[str]): steps taken to stay within a memory budget.
+    """
+
+    rounds: int = 0
+    updates: int = 0
+    pairs: int = 0
+    elapsed: float = 0.0
+    complete: bool = True
+    stop_reason: str = ""
+    certified: bool = False
+    peak_memory: int = 0
+    degradations: list[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class Improvement:
+    """
+    A combination accepted during a round of the simulation.
+
+    Args:
+        value (int): value of the combination.
+        old_cost (int): cost of the combination it replaces, 0 if the value was not known.
+        new_cost (int): cost of the new combination.
+        combo (Combo): the new combination.
+    """
+
+    value: int
+    old_cost: int
+    new_cost: int
+    combo: Combo
+
+
+class RoundBuffer:
+    """
+    Combinations found during a round of the simulation.
+
+    Candidates are checked against the state of the model and against
+    what was already found in the round, but they are kept apart from
+    the state. That way the state stays unchanged (and consistent for
+    readers) until the round is applied with 'Model.apply_round()'.
+
+    Args:
+        base (Model): model the round runs on.
+    """
+
+    base: Model
+    found: dict[int, Combo]
+
+    def __init__(self, base: Model) -> None:
+        self.base = base
+        self.found = {}
+
+    def offer(self, candidate: Combo) -> Improvement | None:
+        """
+        Attempt addition of a single combination to the round.
+
+        Same rules as 'Model.state_update', checked against the state of
+        the model and the combinations found so far in the round.
+
+        Args:
+            candidate (Combo): combination to add
+
+        Returns:
+            Improvement | None: the improvement, if the update was valid.
+        """
+        base = self.base
+        if candidate.cost > base.max_cost:
+            return None
+
+        value, cost = candidate.value, candidate.cost
+
+        # Are we keeping track of this value?
+        if not (1 <= value <= base.max_value):
+            return None
+
+        # There was no improvement in cost
+        current = self.found.get(value) or base.state.get(value)
+        if (current is not None) and (current.cost <= cost):
+            return None
+
+        self.found[value] = candidate
+        return Improvement(value, current.cost if current is not None else 0, cost, candidate)
+
+    def state_update(self, candidate: Combo) -> bool:
+        """
+        Attempt addition of a single combination to the round (see 'offer').
+
+        Args:
+            candidate (Combo): combination to add
+
+        Returns:
+            bool: True if the update was valid.
+        """
+        return self.offer(candidate) is not None
+
+
 class Model:
     """Model the space for expressions using a single digit."""
 
     digit: int
     max_value: int = 0
     max_cost: int = 0
+    ops: tuple[str, ...]
     state: dict[int, Combo]
+    stats: RunStats
 
-    def __init__(self, digit: int) -> None:
+    def __init__(self, digit: int, *, ops: tuple[str, ...] | None = None) -> None:
         """
         Build a model for the game simulation.
 
         Args:
             digit (int): digit to use when creating expresions
+            ops (tuple[str, ...], optional): operations the simulation can
+                use (see 'onedigit.operators'). Defaults to all of them.
 
         Raises:
-            ValueError: if digit value is out of range [1,9]
+            ValueError: if digit value is out of range [1,9], or an operation is not known.
         """
         logger.debug("Model.__init__()")
 
@@ -281,7 +404,18 @@ class Model:
             raise ValueError("digit must be an integer between 1 and 9, inclusive.")
         self.digit = digit
 
+        if ops is None:
+            ops = onedigit.operators.ALL_OPS
+        for op in ops:
+            if op not in onedigit.operators.OPERATORS:
+                raise ValueError(f"unknown operation '{op}'")
+        self.ops = tuple(op for op in onedigit.operators.ALL_OPS if op in ops)
+
         self.state = {}
+        self.stats = RunStats()
+
+        # True while the state dictionary is shared with a snapshot
+        self._shared = False
 
     def seed(self, *, max_value: int = 0, max_cost: int = 0) -> None:
         """
@@ -304,6 +438,7 @@ class Model:
         if not isinstance(max_cost, int) or not (1 <= max_cost <= 30):
             raise ValueError("maximum cost must be a positive number below 30.")
         self.max_cost = max_cost
+        self._own_state()
 
         # Set up the digit for the simulation
         self.state[self.digit] = Combo(value=self.digit, cost=1, expr_full=str(self.digit), expr_simple=str(self.digit))
@@ -328,13 +463,62 @@ class Model:
         Returns:
             Model: a new Model object
         """
-        new_model = Model(digit=self.digit)
+        new_model = Model(digit=self.digit, ops=self.ops)
         new_model.digit = self.digit
         new_model.max_value = self.max_value
         new_model.max_cost = self.max_cost
         new_model.state = self.state.copy()
+        new_model.stats = dataclasses.replace(self.stats, degradations=self.stats.degradations.copy())
+        return new_model
+
+    def snapshot(self) -> Model:
+        """
+        Create a read-only view of the current state of the model.
+
+        The snapshot shares the state dictionary with this model, so it
+        takes constant time. The state is copy-on-write: the first change
+        made through this model after a snapshot (a round, a merge, an
+        update) works on a private copy. So the snapshot keeps a consistent
+        view, even while the simulation advances in another thread.
+
+        Snapshots must not be changed. Changing the state of either model
+        directly (say, 'model.state[value] = combo') bypasses the copy.
+
+        Returns:
+            Model: a new Model object sharing the current state.
+        """
+        new_model = self.view()
+        self._shared = True
         return new_model
 
+    def view(self) -> Model:
+        """
+        Create a view of the current state of the model, for reads that end before the model changes.
+
+        Unlike 'snapshot', this model does not take a copy of its state on
+        the next change, so the view is only consistent until then. Rounds
+        use views for work that is done before they are applied (such as
+        the ranges of 'onedigit.threads.iter_threads').
+
+        Views must not be changed.
+
+        Returns:
+            Model: a new Model object sharing the current state.
+        """
+        new_model = Model(digit=self.digit, ops=self.ops)
+        new_model.max_value = self.max_value
+        new_model.max_cost = self.max_cost
+        new_model.state = self.state
+        new_model.stats = dataclasses.replace(self.stats, degradations=self.stats.degradations.copy())
+        new_model._shared = True
+        return new_model
+
+    def _own_state(self) -> None:
+        """Take a private copy of the state, if it is shared with a snapshot."""
+        if self._shared:
+            self.state = self.state.copy()
+            self._shared = False
+
     @classmethod
     def fromdict(cls, input: dict[str, Any]) -> Model:
         """
@@ -344,6 +528,9 @@ class Model:
         object from a dictionary are used during object serialization. That
         functionality is used when taking snapshots of a Model simulation.
 
+        Dictionaries without 'ops' (written before operations could be
+        selected) are for models that use all of them.
+
         Args:
             input (dict): dictionary representation of the object
 
@@ -354,7 +541,7 @@ class Model:
             if k not in input:
                 raise ValueError(f"input dictionary is missing key {k}")
 
-        new_model = Model(digit=input["digit"])
+        new_model = Model(digit=input["digit"], ops=tuple(input.get("ops", onedigit.operators.ALL_OPS)))
         new_model.digit = input["digit"]
         new_model.max_value = input["max_value"]
         new_model.max_cost = input["max_cost"]
@@ -406,9 +593,128 @@ class Model:
         if (value in self.state) and (self.state[value].cost <= cost):
             return False
 
+        self._own_state()
         self.state[value] = candidate
         return True
 
+    def useful_cost(self) -> int:
+        """
+        Get the largest cost a candidate can have and still improve the model.
+
+        Every value has a lower bound on its cost (see 'onedigit.bounds').
+        A value is closed once its combination costs as much as its bound,
+        or, if it has none, when its bound is above 'max_cost'. Candidates
+        for closed values are never accepted, so only the open values
+        matter: a candidate that costs as much as the costliest of them
+        ('max_cost' + 1 for a value without a combination) can not improve
+        anything. Engines that visit pairs by cost skip those candidates.
+
+        If a combination costs less than its bound (say, it was found with
+        a larger 'max_value'), the bounds do not hold for this model, and
+        'max_cost' is used.
+
+        Returns:
+            int: largest useful cost, 0 when every value is closed.
+        """
+        lower = onedigit.bounds.cost_bounds(self.digit, self.max_value, self.max_cost, self.ops).lower
+        state, max_cost = self.state, self.max_cost
+        useful = 0
+        for value in range(1, self.max_value + 1):
+            combo = state.get(value)
+            cost = combo.cost if combo is not None else max_cost + 1
+            if cost < lower[value]:
+                return max_cost
+            if cost > lower[value]:
+                useful = max(useful, cost - 1)
+                if useful >= max_cost:
+                    return max_cost
+        return useful
+
+    def memory_usage(self, *, extra_combos: int = 0) -> int:
+        """
+        Estimate the memory used by the state of the model, in bytes.
+
+        The size of combinations is averaged over a sample, so the estimate
+        is cheap to calculate even for large states.
+
+        Args:
+            extra_combos (int, optional): number of additional combinations
+                to account for (say, candidates produced during a round).
+
+        Returns:
+            int: approximate number of bytes.
+        """
+        sample = list(itertools.islice(self.state.values(), 64))
+        if not sample:
+            return sys.getsizeof(self.state)
+
+        combo_size = sum(
+            sys.getsizeof(c) + sys.getsizeof(c.__dict__) + sys.getsizeof(c.expr_full) + sys.getsizeof(c.expr_simple)
+            for c in sample
+        ) // len(sample)
+
+        return sys.getsizeof(self.state) + (len(self.state) + extra_combos) * combo_size
+
+    def round_memory(self) -> int:
+        """
+        Estimate the peak memory used by a round of the simulation, in bytes.
+
+        A round keeps the state, plus a buffer with one combination for every
+        update found. The number of updates is projected from the last round.
+        If the state is shared with a snapshot, applying the round also makes
+        a copy of the state dictionary.
+
+        Returns:
+            int: approximate number of bytes.
+        """
+        growth = self.stats.updates // self.stats.rounds if self.stats.rounds else len(self.state)
+        growth = min(growth, len(self.state), self.max_value)
+        entry_size = sys.getsizeof(self.state) // max(1, len(self.state))
+        state_copy = sys.getsizeof(self.state) if self._shared else 0
+        return self.memory_usage(extra_combos=growth) + growth * entry_size + state_copy
+
+    def shrink(self, max_memory: int) -> list[str]:
+        """
+        Drop combinations until a round fits within a memory budget.
+
+        Combinations with the highest cost go first, as they are the least
+        useful to build other combinations. 'max_cost' is lowered as they
+        are removed, so they are not found again. If only the cheapest
+        combinations are left, the range of values is halved instead.
+
+        Args:
+            max_memory (int): memory budget, in bytes.
+
+        Returns:
+            list[str]: description of each step taken.
+        """
+        steps: list[str] = []
+
+        while self.state and self.round_memory() > max_memory:
+            if self.max_cost > 1:
+                self.max_cost -= 1
+                kept = {v: c for v, c in self.state.items() if c.cost <= self.max_cost}
+                steps.append(
+                    f"max_cost lowered to {self.max_cost}, dropping {len(self.state) - len(kept)} combinations"
+                )
+            elif self.max_value > 1:
+                self.max_value //= 2
+                kept = {v: c for v, c in self.state.items() if v <= self.max_value}
+                steps.append(
+                    f"max_value lowered to {self.max_value}, dropping {len(self.state) - len(kept)} combinations"
+                )
+            else:
+                break
+
+            # A new dictionary, as dictionaries do not release memory when entries are deleted
+            self.state = kept
+            self._shared = False
+
+        for step in steps:
+            logger.warning(f"memory budget: {step}")
+
+        return steps
+
     def state_merge(self, extra: Model) -> None:
         """
         Merge combinations from a separate Model into the current model.
@@ -418,8 +724,14 @@ class Model:
 
         Args:
             extra (Model): model with combinations to be added to this model
+
+        Raises:
+            ValueError: when the models use different operations.
         """
         logger.debug("Model.state_merge()")
+        if extra.ops != self.ops:
+            raise ValueError(f"cannot merge a model using operations {extra.ops} into one using {self.ops}")
+        self._own_state()
 
         for combo2 in extra.get_valid_combos():
             val2, cost2 = combo2.value, combo2.cost
@@ -432,49 +744,300 @@ class Model:
             ):
                 self.state[val2] = combo2
 
-    def simulate(self) -> int:
+    def apply_round(self, buffer: RoundBuffer) -> None:
+        """
+        Add the combinations found during a round to the state.
+
+        Args:
+            buffer (RoundBuffer): combinations found during the round.
+        """
+        if buffer.found:
+            self._own_state()
+            self.state.update(buffer.found)
+
+    def simulate(self, *, deadline: float = 0.0, engine: str = "pairs") -> int:
         """
         Run one round of the simulation.
 
         The function takes all existing combinations, and applies
         operations that generate new values, and stores them in a
-        separate object. Once all initial values are processed, we
-        merge combinations from the new object. That prevents recursive
-        loops, and let us determine liveness.
+        separate buffer. Once all initial values are processed, we
+        merge combinations from the buffer. That prevents recursive
+        loops, and let us determine liveness. The state is not copied,
+        and it does not change until the round is over.
+
+        When a deadline is given, pairs are scheduled by the cost of
+        their operands (cheapest first), so the most valuable
+        combinations are found early. The round stops when the deadline
+        passes, and the combinations found up to then are merged. The
+        state is consistent either way; 'stats.complete' tells if the
+        round was cut short.
+
+        Engines:
+            pairs:   every operation is tried on every pair of combinations.
+            kernels: operations with a kernel (see 'onedigit.kernels') are
+                     applied to whole sets of combinations at once, and the
+                     rest are tried pair by pair. Costs are the same as with
+                     'pairs', but ties may keep a different expression.
+            propagate: combinations are settled cheapest first (see
+                     'onedigit.propagate'), so the round reaches the state
+                     that 'pairs' converges to, and the next round finds
+                     nothing.
+            specialized: the round of 'pairs', with a loop specialized
+                     for each operation (see 'onedigit.specialized'). The
+                     results are identical. With a deadline, pairs are
+                     visited by value rather than by cost.
+            threads: the round of 'pairs', with the first operands split
+                     across threads (see 'onedigit.threads'). The state is
+                     identical. Threads only run in parallel on a
+                     free-threaded build; otherwise the round runs as with
+                     'pairs'.
+            shards:  the round of 'pairs', split by ranges of result values
+                     (see 'onedigit.shards'), so shards never produce the
+                     same value. The state is identical. Shards run across
+                     threads on a free-threaded build.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+            engine (str, optional): how to run the round. Defaults to 'pairs'.
+
+        Raises:
+            ValueError: when the engine is not known.
 
         Returns:
             int: number of values that were updated
         """
+        return sum(1 for _ in self.simulate_iter(deadline=deadline, engine=engine))
+
+    def simulate_iter(self, *, deadline: float = 0.0, engine: str = "pairs") -> Generator[Improvement, None, None]:
+        """
+        Run one round of the simulation, producing improvements as they are found.
+
+        Same as 'simulate', but every combination accepted by the round is
+        produced as soon as it is found. A value may improve more than once
+        in a round; 'old_cost' is then the cost found earlier in the round.
+        The state of the model only changes once the round is over, or the
+        caller stops iterating: what was found up to then is applied, and
+        'stats.complete' is False.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+            engine (str, optional): how to run the round (see 'simulate'). Defaults to 'pairs'.
+
+        Raises:
+            ValueError: when the engine is not known.
+
+        Yields:
+            Improvement: combinations accepted by the round.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine '{engine}', use one of {', '.join(ENGINES)}")
+
+        if engine == "propagate":
+            self.stats.complete = False
+            self.stats.complete = yield from onedigit.propagate.propagate_iter(self, deadline=deadline)
+            return
+
         known = list(self.state.values())
         known.sort(key=lambda c: c.value)
-        new_combos = self.copy()
+        new_combos = RoundBuffer(self)
+
+        complete = False
+        try:
+            ops = self.ops
+            if engine == "kernels":
+                fast_ops = onedigit.kernels.kernel_ops(ops)
+                yield from onedigit.kernels.iter_kernels(self, known, new_combos, fast_ops)
+                ops = tuple(op for op in ops if op not in fast_ops)
+
+            if engine == "specialized":
+                complete = yield from onedigit.specialized.iter_specialized(
+                    self, known, new_combos, ops, deadline=deadline
+                )
+            elif engine == "shards":
+                complete = yield from onedigit.shards.iter_shards(self, known, new_combos, ops, deadline=deadline)
+            elif engine == "threads" and onedigit.threads.thread_count() > 1:
+                complete = yield from onedigit.threads.iter_threads(self, known, new_combos, ops, deadline=deadline)
+            elif deadline:
+                complete = yield from self._iter_by_cost(known, new_combos, deadline, ops=ops)
+            else:
+                yield from self.iter_pairs(known, new_combos, ops=ops)
+                complete = True
+        finally:
+            self.apply_round(new_combos)
+            self.stats.complete = complete
+
+    def run_pairs(
+        self,
+        known: list[Combo],
+        new_combos: RoundBuffer,
+        start: int = 0,
+        stop: int | None = None,
+        *,
+        ops: tuple[str, ...] | None = None,
+    ) -> int:
+        """
+        Apply all operations for a range of first operands.
+
+        The range refers to positions in 'known'. Running consecutive
+        ranges, one after another, on the same buffer gives the same
+        result as running the whole list at once. This is how a round
+        can be split across workers.
+
+        Args:
+            known (list[Combo]): combinations at the start of the round, sorted by value.
+            new_combos (RoundBuffer): buffer receiving the new combinations.
+            start (int, optional): position of the first operand to use. Defaults to 0.
+            stop (int, optional): position after the last operand to use. Defaults to the end of 'known'.
+            ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+
+        Returns:
+            int: number of updates.
+        """
+        return sum(1 for _ in self.iter_pairs(known, new_combos, start, stop, ops=ops))
+
+    def iter_pairs(
+        self,
+        known: list[Combo],
+        new_combos: RoundBuffer,
+        start: int = 0,
+        stop: int | None = None,
+        *,
+        ops: tuple[str, ...] | None = None,
+    ) -> Iterator[Improvement]:
+        """
+        Apply all operations for a range of first operands, producing improvements as they are found.
 
-        updates = 0
-        for combo1 in known:
-            # Unary operations
+        Same as 'run_pairs'.
+
+        Args:
+            known (list[Combo]): combinations at the start of the round, sorted by value.
+            new_combos (RoundBuffer): buffer receiving the new combinations.
+            start (int, optional): position of the first operand to use. Defaults to 0.
+            stop (int, optional): position after the last operand to use. Defaults to the end of 'known'.
+            ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+
+        Yields:
+            Improvement: combinations accepted by the buffer.
+        """
+        unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(self.ops if ops is None else ops)
+        index = onedigit.powers.power_index(self.max_value)
+        # Without binary operations, there are no pairs to visit
+        values = [c.value for c in known] if (ordered_ops or unordered_ops) else []
+        offer = new_combos.offer
+
+        for combo1 in known[start:stop]:
+            value1 = combo1.value
+
+            # Unary operations, on operands with a result in range
             #   !:    factorial
             #   sqrt: square root
-            for op in ["!", "sqrt"]:
-                updates += new_combos.state_update(combo1.unary_operation(op=op))
-
-            for combo2 in known:
+            for op in unary_ops:
+                if index.unary_in_range(op, value1):
+                    if found := offer(combo1.unary_operation(op=op)):
+                        yield found
+
+            # Second operands are sorted by value, so those an operation can use are a prefix
+            bounds = [(op, index.bound(op, value1)) for op in unordered_ops]
+            largest = max([value1] * bool(ordered_ops) + [bound for _, bound in bounds], default=0)
+            operands2 = known[: bisect.bisect_right(values, largest)]
+            self.stats.pairs += len(operands2)
+
+            for combo2 in operands2:
+                value2 = combo2.value
                 # We only run cases where combo1 >= combo2
                 #   + and * are commutative
                 #   / and - are not commutative, but problem deals with
                 #           positive integers, so it does not make sense
                 #           to run cases where combo1 < combo2
-                for op in ["+", "-", "*", "/"]:
-                    if combo1.value >= combo2.value:
-                        updates += new_combos.state_update(combo1.binary_operation(combo2, op))
+                if value1 >= value2:
+                    for op in ordered_ops:
+                        if found := offer(combo1.binary_operation(combo2, op)):
+                            yield found
+
+                # We need to run both cases (combo1 > combo2, and combo2 > combo1),
+                # up to the largest exponent in range for ^
+                for op, bound in bounds:
+                    if value2 <= bound:
+                        if found := offer(combo1.binary_operation(combo2, op)):
+                            yield found
+
+    def _iter_by_cost(
+        self,
+        known: list[Combo],
+        new_combos: RoundBuffer,
+        deadline: float,
+        *,
+        ops: tuple[str, ...] | None = None,
+    ) -> Generator[Improvement, None, bool]:
+        """
+        Run the operations of a round, ordered by the cost of the operands.
 
-                # We need to run both cases (combo1 > combo2, and combo2 > combo1)
-                #   ^
-                for op in ["^"]:
-                    updates += new_combos.state_update(combo1.binary_operation(combo2, op))
+        Combinations are grouped by cost, and pairs of groups are visited
+        in order of their combined cost. Pairs whose combined cost is
+        above 'max_cost' are never visited, as their results would be
+        discarded anyway.
 
-        self.state_merge(new_combos)
+        Args:
+            known (list[Combo]): combinations at the start of the round, sorted by value.
+            new_combos (RoundBuffer): buffer receiving the new combinations.
+            deadline (float): time (as given by 'time.monotonic()') at which to stop.
+            ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
 
-        return updates
+        Yields:
+            Improvement: combinations accepted by the buffer.
+
+        Returns:
+            bool: True if all pairs were visited.
+        """
+        unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(self.ops if ops is None else ops)
+
+        index = onedigit.powers.power_index(self.max_value)
+        by_cost: dict[int, list[Combo]] = {}
+        for combo in known:
+            by_cost.setdefault(combo.cost, []).append(combo)
+        values_by_cost = {cost: [c.value for c in group] for cost, group in by_cost.items()}
+
+        # Costlier candidates can only be for closed values
+        offer = new_combos.offer
+        for total in range(1, self.useful_cost() + 1):
+            for combo1 in by_cost.get(total, []):
+                for op in unary_ops:
+                    if index.unary_in_range(op, combo1.value):
+                        if found := offer(combo1.unary_operation(op=op)):
+                            yield found
+
+            for cost1 in range(1, total):
+                group2 = by_cost.get(total - cost1, [])
+                if not group2 or not (ordered_ops or unordered_ops):
+                    continue
+                values2 = values_by_cost[total - cost1]
+
+                for combo1 in by_cost.get(cost1, []):
+                    if time.monotonic() >= deadline:
+                        return False
+                    value1 = combo1.value
+
+                    # As in 'iter_pairs', only the prefix of second operands some operation can use
+                    bounds = [(op, index.bound(op, value1)) for op in unordered_ops]
+                    largest = max([value1] * bool(ordered_ops) + [bound for _, bound in bounds], default=0)
+                    operands2 = group2[: bisect.bisect_right(values2, largest)]
+                    self.stats.pairs += len(operands2)
+
+                    for combo2 in operands2:
+                        value2 = combo2.value
+                        if value1 >= value2:
+                            for op in ordered_ops:
+                                if found := offer(combo1.binary_operation(combo2, op)):
+                                    yield found
+                        for op, bound in bounds:
+                            if value2 <= bound:
+                                if found := offer(combo1.binary_operation(combo2, op)):
+                                    yield found
+
+        return True
 
     def get_valid_combos(self) -> List[Combo]:
         """
@@ -500,5 +1063,24 @@ class Model:
         for num in sorted(self.state.keys()):
             state.append(self.state[num].asdict())
 
-        obj = {"digit": self.digit, "max_cost": self.max_cost, "max_value": self.max_value, "combinations": state}
+        obj = {
+            "digit": self.digit,
+            "max_cost": self.max_cost,
+            "max_value": self.max_value,
+            "ops": list(self.ops),
+            "combinations": state,
+        }
         return obj
+
+    def columns(self) -> onedigit.Columns:
+        """
+        Get the combinations of the model as typed columns.
+
+        The columns (value, cost, op, operand1, operand2) support the
+        buffer protocol, so analysis tools can use them without creating
+        an object per combination. See 'onedigit.columns'.
+
+        Returns:
+            onedigit.Columns: combinations of the model, sorted by value.
+        """
+        return onedigit.columns.to_columns(self)
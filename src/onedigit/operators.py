@@ -0,0 +1,119 @@
+"""Registry of the operations that can be used in expressions."""
+
+import dataclasses
+import re
+from collections.abc import Callable
+from typing import Any
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+
+@dataclasses.dataclass
+class Operator:
+    """
+    An operation the simulation can apply.
+
+    Args:
+        name (str): name used by 'Combo.unary_operation' and 'Combo.binary_operation'.
+        symbol (str): symbol used to select it (see 'parse_ops').
+        arity (int): number of operands (1 or 2).
+        ordered (bool): for binary operations, only apply them when the
+            first operand is at least as large as the second one.
+        commutative (bool): for binary operations, the order of the operands does not matter.
+        kernel (Callable, optional): fast path that applies the operation
+            to whole sets of combinations (see 'onedigit.kernels').
+    """
+
+    name: str
+    symbol: str
+    arity: int
+    ordered: bool = False
+    commutative: bool = False
+    kernel: Callable[..., Any] | None = None
+
+
+# Every operation, in the order they are tried in a round
+OPERATORS: dict[str, Operator] = {
+    op.name: op
+    for op in [
+        Operator(name="!", symbol="!", arity=1),
+        Operator(name="sqrt", symbol="√", arity=1),
+        Operator(name="+", symbol="+", arity=2, ordered=True, commutative=True),
+        Operator(name="-", symbol="-", arity=2, ordered=True),
+        Operator(name="*", symbol="*", arity=2, ordered=True, commutative=True),
+        Operator(name="/", symbol="/", arity=2, ordered=True),
+        Operator(name="^", symbol="^", arity=2),
+    ]
+}
+
+ALL_OPS = tuple(OPERATORS)
+
+_TOKEN = re.compile(r"\s*(sqrt|[!√+\-*/^])\s*,?")
+
+
+def parse_ops(text: str) -> tuple[str, ...]:
+    """
+    Parse a selection of operations, such as '+-*/' or '+ - * / sqrt'.
+
+    Operations are given by their symbol; the square root can also be
+    given as 'sqrt'. Spaces and commas are ignored.
+
+    Args:
+        text (str): operations to select. Empty selects all of them.
+
+    Raises:
+        ValueError: when the text has something other than operations.
+
+    Returns:
+        tuple[str, ...]: names of the selected operations, in the order of 'OPERATORS'.
+    """
+    if not text.strip():
+        return ALL_OPS
+
+    symbols = {op.symbol: op.name for op in OPERATORS.values()} | {"sqrt": "sqrt"}
+    selected, pos = set(), 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"unknown operation at '{text[pos:]}', use some of {''.join(symbols)}")
+        selected.add(symbols[match.group(1)])
+        pos = match.end()
+    return tuple(name for name in ALL_OPS if name in selected)
+
+
+def split_ops(ops: tuple[str, ...]) -> tuple[list[str], list[str], list[str]]:
+    """
+    Split operations by the way a round applies them.
+
+    Args:
+        ops (tuple[str, ...]): names of operations.
+
+    Returns:
+        tuple[list[str], list[str], list[str]]: unary operations, binary
+        operations applied with the larger operand first, and binary
+        operations applied with the operands in both orders.
+    """
+    operators = [OPERATORS[op] for op in ops]
+    return (
+        [o.name for o in operators if o.arity == 1],
+        [o.name for o in operators if o.arity == 2 and o.ordered],
+        [o.name for o in operators if o.arity == 2 and not o.ordered],
+    )
+
+
+def register_kernel(name: str, kernel: Callable[..., Any]) -> None:
+    """
+    Register the fast path of an operation.
+
+    Args:
+        name (str): name of the operation.
+        kernel (Callable): function that applies it to whole sets of combinations.
+
+    Raises:
+        ValueError: when the operation is not known.
+    """
+    if name not in OPERATORS:
+        raise ValueError(f"unknown operation '{name}'")
+    OPERATORS[name].kernel = kernel
@@ -0,0 +1,358 @@
+"""Estimates of the work, time and memory of a simulation, and the choice of the engine to run it."""
+
+import dataclasses
+import json
+import math
+from typing import Any, TextIO
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Largest value of the pilot run that projects the size of the model
+PILOT_VALUE = 1000
+
+# Engines measured by the benchmark harness ('threads' runs the rounds of 'pairs')
+MEASURED_ENGINES = ("pairs", "kernels", "propagate", "specialized", "shards")
+
+# Measured with 'onedigit benchmark' on one core of an x86-64 host, with CPython 3.11
+DEFAULT_CALIBRATION: dict[str, dict[str, float]] = {
+    "pairs": {"coefficient": 2.54e-6, "exponent": 1.07, "bytes_per_combo": 346.0},
+    "kernels": {"coefficient": 4.22e-5, "exponent": 0.51, "bytes_per_combo": 726.0},
+    "propagate": {"coefficient": 1.02e-6, "exponent": 0.89, "bytes_per_combo": 714.0},
+    "specialized": {"coefficient": 3.76e-6, "exponent": 0.63, "bytes_per_combo": 526.0},
+    "shards": {"coefficient": 1.78e-5, "exponent": 0.62, "bytes_per_combo": 839.0},
+}
+
+
+@dataclasses.dataclass
+class EngineModel:
+    """
+    How long an engine takes for some work, and the memory it needs.
+
+    Args:
+        coefficient (float): seconds for a round of one pair.
+        exponent (float): how the time grows with the number of pairs.
+        bytes_per_combo (float): peak memory of a run, for every combination of the model.
+    """
+
+    coefficient: float
+    exponent: float
+    bytes_per_combo: float
+
+    def seconds(self, pairs: int) -> float:
+        """
+        Estimate the time to run rounds with a number of pairs.
+
+        Args:
+            pairs (int): pairs of combinations across all rounds (see 'round_pairs').
+
+        Returns:
+            float: wall-clock seconds.
+        """
+        return self.coefficient * math.pow(max(1, pairs), self.exponent)
+
+
+class Calibration:
+    """
+    Models of the engines, as measured by the benchmark harness (see 'onedigit.benchmark').
+
+    Args:
+        engines (dict[str, EngineModel]): model of every measured engine.
+        source (str, optional): where the measurements come from. Defaults to the built-in ones.
+    """
+
+    def __init__(self, engines: dict[str, EngineModel], *, source: str = "built-in") -> None:
+        self.engines = engines
+        self.source = source
+
+    @classmethod
+    def default(cls) -> "Calibration":
+        """
+        Get the calibration shipped with the package.
+
+        Returns:
+            Calibration: built-in measurements.
+        """
+        return cls.fromdict({"engines": DEFAULT_CALIBRATION})
+
+    @classmethod
+    def fromdict(cls, input: dict[str, Any], *, source: str = "built-in") -> "Calibration":
+        """
+        Create a calibration from a dictionary, as written by 'asdict'.
+
+        Args:
+            input (dict[str, Any]): dictionary with an 'engines' key.
+            source (str, optional): where the measurements come from. Defaults to the built-in ones.
+
+        Raises:
+            ValueError: when the dictionary is not valid.
+
+        Returns:
+            Calibration: the calibration.
+        """
+        engines = input.get("engines") if isinstance(input, dict) else None
+        if not isinstance(engines, dict) or not engines:
+            raise ValueError("a calibration needs measurements for at least one engine")
+        models: dict[str, EngineModel] = {}
+        for engine, fields in engines.items():
+            if engine not in onedigit.model.ENGINES:
+                raise ValueError(f"unknown engine '{engine}' in the calibration")
+            try:
+                models[engine] = EngineModel(
+                    **{k: float(fields[k]) for k in ("coefficient", "exponent", "bytes_per_combo")}
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"measurements of engine '{engine}' are not valid: {e}") from e
+        return cls(models, source=source)
+
+    @classmethod
+    def load(cls, fp: TextIO, *, source: str = "") -> "Calibration":
+        """
+        Read a calibration from a JSON file.
+
+        Args:
+            fp (TextIO): file object, opened in text mode.
+            source (str, optional): where the measurements come from. Defaults to the name of the file.
+
+        Raises:
+            ValueError: when the file is not a valid calibration.
+
+        Returns:
+            Calibration: the calibration.
+        """
+        try:
+            input = json.load(fp)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"not a JSON file: {e}") from e
+        return cls.fromdict(input, source=source or getattr(fp, "name", "file"))
+
+    def asdict(self) -> dict[str, Any]:
+        """
+        Create a dictionary representation of the calibration.
+
+        Returns:
+            dict[str, Any]: dictionary with the model of every engine.
+        """
+        return {"engines": {engine: dataclasses.asdict(model) for engine, model in self.engines.items()}}
+
+
+@dataclasses.dataclass
+class Estimate:
+    """
+    Work, time and memory of a simulation with one engine.
+
+    Args:
+        engine (str): engine that runs the rounds.
+        pairs (int): pairs of combinations across all rounds.
+        seconds (float): wall-clock seconds.
+        memory (int): peak memory, in bytes.
+    """
+
+    engine: str
+    pairs: int
+    seconds: float
+    memory: int
+
+
+@dataclasses.dataclass
+class Plan:
+    """
+    Estimates for a simulation, and the engine chosen to run it.
+
+    Args:
+        combinations (int): projected number of combinations of the model.
+        rounds (int): projected number of rounds.
+        estimates (list[Estimate]): estimate for every available engine, fastest first.
+        engine (str): engine chosen.
+        notes (list[str]): warnings about the run (budgets that will be hit).
+        calibration (str): where the measurements come from.
+    """
+
+    combinations: int
+    rounds: int
+    estimates: list[Estimate]
+    engine: str
+    notes: list[str] = dataclasses.field(default_factory=list)
+    calibration: str = "built-in"
+
+    def describe(self) -> str:
+        """
+        Describe the plan, one line for every engine.
+
+        Returns:
+            str: text of the plan.
+        """
+        lines = [
+            f"about {self.combinations} combinations, {self.rounds} rounds ({self.calibration} calibration)",
+            f"{'engine':<12} {'pairs':>10} {'time':>12} {'memory':>10}",
+        ]
+        for e in self.estimates:
+            selected = "  <- selected" if e.engine == self.engine else ""
+            lines.append(
+                f"{e.engine:<12} {e.pairs:>10.3g} {format_seconds(e.seconds):>12} {e.memory / 2**20:>8.1f}MB{selected}"
+            )
+        return "\n".join(lines + self.notes)
+
+
+def format_seconds(seconds: float) -> str:
+    """
+    Format a duration with the largest unit that keeps it readable.
+
+    Args:
+        seconds (float): duration.
+
+    Returns:
+        str: formatted duration, such as '3.2 s' or '1.5 days'.
+    """
+    for unit, size in (("days", 86400), ("hours", 3600), ("min", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f} {unit}"
+    return f"{seconds:.2g} s"
+
+
+def round_pairs(sizes: list[int], engine: str) -> int:
+    """
+    Count the pairs of combinations a simulation visits, from the size of the model at every round.
+
+    This is the unit of work of the calibration: each round visits every
+    pair of combinations once, except for 'propagate', which settles the
+    whole model in a single pass over its final combinations.
+
+    Args:
+        sizes (list[int]): number of combinations at the start of every round, and at the end.
+        engine (str): engine that runs the rounds.
+
+    Returns:
+        int: number of pairs.
+    """
+    if not sizes:
+        return 0
+    if engine == "propagate":
+        return sizes[-1] * (sizes[-1] + 1) // 2
+    return sum(n * (n + 1) // 2 for n in sizes[:-1]) or sizes[-1] * (sizes[-1] + 1) // 2
+
+
+def pilot(
+    digit: int, *, max_value: int, max_cost: int, max_steps: int, ops: tuple[str, ...] | None = None
+) -> list[int]:
+    """
+    Run a small simulation, and get the size of the model at every round.
+
+    The 'specialized' engine runs the same rounds as 'pairs', and only
+    visits the pairs whose cost fits, so it is the quickest to measure.
+
+    Args:
+        digit (int): digit to use.
+        max_value (int): largest value of the pilot.
+        max_cost (int): largest cost of a combination.
+        max_steps (int): largest number of rounds.
+        ops (tuple[str, ...], optional): operations to use. Defaults to all of them.
+
+    Returns:
+        list[int]: number of combinations at the start of every round, and at the end.
+    """
+    mymodel = onedigit.Model(digit=digit, ops=ops)
+    mymodel.seed(max_value=max_value, max_cost=max_cost)
+    sizes = [len(mymodel.state)]
+    for _ in range(max_steps):
+        updates = mymodel.simulate(engine="specialized")
+        sizes.append(len(mymodel.state))
+        if not updates:
+            break
+    return sizes
+
+
+def plan_run(
+    digit: int,
+    *,
+    max_value: int,
+    max_cost: int,
+    max_steps: int,
+    ops: tuple[str, ...] | None = None,
+    time_budget: float = 0.0,
+    max_memory: float = 0.0,
+    calibration: Calibration | None = None,
+) -> Plan:
+    """
+    Estimate the work, time and memory of a simulation with every engine, and choose the fastest one.
+
+    A pilot run on values up to PILOT_VALUE gives the size of the model
+    at every round, which is scaled to 'max_value'. As larger values need
+    more digits, the projection errs on the large side. The calibration
+    turns the pairs of every round into time and memory. Engines whose
+    peak memory is above 'max_memory' are only chosen if none fits (the
+    model is then shrunk as the simulation runs, see 'Model.shrink').
+
+    The estimates are for a fresh model: a model loaded from a file has
+    fewer rounds left.
+
+    Args:
+        digit (int): digit to use.
+        max_value (int): largest value of the simulation.
+        max_cost (int): largest cost of a combination.
+        max_steps (int): largest number of rounds.
+        ops (tuple[str, ...], optional): operations to use. Defaults to all of them.
+        time_budget (float, optional): wall-clock seconds the simulation may run. Defaults to no limit.
+        max_memory (float, optional): megabytes a round may use. Defaults to no limit.
+        calibration (Calibration, optional): models of the engines. Defaults to the built-in ones.
+
+    Raises:
+        ValueError: when the parameters are not valid, or the calibration has none of the engines it estimates.
+
+    Returns:
+        Plan: the plan.
+    """
+    logger.debug(
+        f"plan_run(digit={digit}, max_value={max_value}, max_cost={max_cost}, max_steps={max_steps}, ops={ops}, "
+        f"time_budget={time_budget}, max_memory={max_memory})"
+    )
+    if max_steps < 1:
+        raise ValueError("max_steps must be a positive number")
+    calibration = calibration or Calibration.default()
+    engines = [e for e in MEASURED_ENGINES if e in calibration.engines]
+    if not engines:
+        raise ValueError(f"the calibration has no measurements for any of {', '.join(MEASURED_ENGINES)}")
+
+    pilot_value = min(max_value, PILOT_VALUE)
+    sizes = pilot(digit, max_value=pilot_value, max_cost=max_cost, max_steps=max_steps, ops=ops)
+    scale = max_value / pilot_value
+    sizes = [min(max_value, math.ceil(n * scale)) for n in sizes]
+
+    estimates = []
+    for engine in engines:
+        model = calibration.engines[engine]
+        pairs = round_pairs(sizes, engine)
+        estimates.append(Estimate(engine, pairs, model.seconds(pairs), int(model.bytes_per_combo * sizes[-1])))
+
+    # Threads run the rounds of 'pairs', in parallel only on a free-threaded build
+    threads = onedigit.threads.thread_count()
+    pairs_estimate = next((e for e in estimates if e.engine == "pairs"), None)
+    if threads > 1 and pairs_estimate is not None:
+        estimates.append(
+            Estimate("threads", pairs_estimate.pairs, pairs_estimate.seconds / threads, pairs_estimate.memory)
+        )
+    estimates.sort(key=lambda e: e.seconds)
+
+    notes = []
+    memory_limit = max_memory * 2**20
+    fitting = [e for e in estimates if not memory_limit or e.memory <= memory_limit]
+    chosen = fitting[0] if fitting else estimates[0]
+    if not fitting:
+        notes.append(
+            f"no engine fits within {max_memory} MB: the model will be shrunk, and the results will be incomplete"
+        )
+    if time_budget and chosen.seconds > time_budget:
+        notes.append(
+            f"the run is expected to take {format_seconds(chosen.seconds)}: "
+            f"it will stop at the time budget ({format_seconds(time_budget)}) with the best combinations found by then"
+        )
+
+    return Plan(
+        combinations=sizes[-1],
+        rounds=len(sizes) - 1 if chosen.engine != "propagate" else 1,
+        estimates=estimates,
+        engine=chosen.engine,
+        notes=notes,
+        calibration=calibration.source,
+    )
@@ -0,0 +1,117 @@
+"""Index of the operands for which exponentiation, square roots and factorials stay within range."""
+
+import functools
+import math
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Largest exponent 'Combo.binary_operation' accepts
+MAX_EXPONENT = 40
+# Largest number 'Combo.unary_operation' takes the factorial of
+MAX_FACTORIAL = 20
+
+
+class PowerIndex:
+    """
+    Operands that give a result from 1 to 'max_value' for '^', 'sqrt' and '!'.
+
+    For '^', the largest exponent of every base whose square is in range
+    is kept; larger bases only have exponent 1. As values are sorted in a
+    round, the exponents that fit for a base are a prefix of them, so
+    loops can stop there instead of computing powers (and large integers)
+    that would be discarded.
+
+    Args:
+        max_value (int): largest value of a result.
+    """
+
+    def __init__(self, max_value: int) -> None:
+        self.max_value = max_value
+
+        # Largest exponent of bases from 2 up to the square root of 'max_value'
+        self._exponents: dict[int, int] = {}
+        for base in range(2, math.isqrt(max_value) + 1):
+            exponent, power = 1, base
+            while power * base <= max_value and exponent < MAX_EXPONENT:
+                exponent, power = exponent + 1, power * base
+            self._exponents[base] = exponent
+
+        # Perfect squares in range, and their roots
+        self.squares = {root * root: root for root in range(1, math.isqrt(max_value) + 1)}
+
+        # Numbers whose factorial is in range, and their factorials
+        self.factorials = {}
+        for n in range(0, MAX_FACTORIAL + 1):
+            if math.factorial(n) > max_value:
+                break
+            self.factorials[n] = math.factorial(n)
+
+    def max_exponent(self, base: int) -> int:
+        """
+        Get the largest exponent for which a power of a base is in range.
+
+        Args:
+            base (int): base of the power.
+
+        Returns:
+            int: largest exponent, 0 if there is none.
+        """
+        if base == 1:
+            return MAX_EXPONENT
+        if base < 1 or base > self.max_value:
+            return 0
+        return self._exponents.get(base, 1)
+
+    def unary_in_range(self, op: str, value: int) -> bool:
+        """
+        Check if a unary operation on a value gives a result in range.
+
+        Args:
+            op (str): operation ('!' or 'sqrt').
+            value (int): operand.
+
+        Returns:
+            bool: True if the result is in range, or the operation is not indexed.
+        """
+        match op:
+            case "!":
+                return value in self.factorials
+            case "sqrt":
+                if value > self.max_value:
+                    # Operands out of range (such as the digit itself) may still have a root in range
+                    root = math.isqrt(value)
+                    return root * root == value and root <= self.max_value
+                return value in self.squares
+            case _:
+                return True
+
+    def bound(self, op: str, value1: int) -> float:
+        """
+        Get the largest second operand for which a binary operation gives a result in range.
+
+        Args:
+            op (str): operation.
+            value1 (int): first operand.
+
+        Returns:
+            float: largest second operand, infinite if the operation is not indexed.
+        """
+        if op == "^":
+            return self.max_exponent(value1)
+        return math.inf
+
+
+@functools.lru_cache(maxsize=8)
+def power_index(max_value: int) -> PowerIndex:
+    """
+    Get the index for a range of values, reusing it across rounds.
+
+    Args:
+        max_value (int): largest value of a result.
+
+    Returns:
+        PowerIndex: index for the range.
+    """
+    return PowerIndex(max_value)
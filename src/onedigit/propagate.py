@@ -0,0 +1,265 @@
+"""Cheapest-first propagation of improvements, reaching the fixed point in a single pass."""
+
+import heapq
+import time
+from collections.abc import Generator, Iterator
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+
+class Propagator:
+    """
+    Find the cheapest combination of every value, in the style of Knuth's generalization of Dijkstra's algorithm.
+
+    The cost of a combination is the sum of the costs of its operands, so
+    it is never below them. Candidates wait in a priority queue, ordered by
+    cost, and the cheapest one is settled next: its cost can not improve
+    any more. A settled value is combined with every settled value whose
+    cost fits within 'max_cost', and the results that improve on what is
+    known go to the queue. Every pair is visited once, when its second
+    operand is settled, and expressions are always built from settled
+    operands, so they never carry a costlier sub-expression.
+
+    The operands of every settled combination are kept, along with a
+    reverse index from each value to the values derived from it. When a
+    value improves after it was settled (see 'improve'), the combinations
+    derived from it are rebuilt and queued again, and so on down the chain.
+
+    Costs match those 'Model.simulate' converges to. When several
+    expressions have the same cost, a different one may be kept.
+
+    Args:
+        mymodel (onedigit.Model): model to propagate over. Its combinations are the starting candidates.
+    """
+
+    def __init__(self, mymodel: onedigit.Model) -> None:
+        self.model = mymodel
+        self.unary_ops, self.ordered_ops, self.unordered_ops = onedigit.operators.split_ops(mymodel.ops)
+
+        # Settled combinations, by value and by cost
+        self.settled: dict[int, onedigit.Combo] = {}
+        self.by_cost: dict[int, list[onedigit.Combo]] = {}
+        # Operation and operands of every settled combination (empty for literals)
+        self.derivation: dict[int, tuple[str, int, int]] = {}
+        # Values derived from each value
+        self.dependents: dict[int, set[int]] = {}
+
+        # Candidates: (cost, order of arrival, combination, derivation)
+        self._queue: list[tuple[int, int, onedigit.Combo, tuple[str, int, int]]] = []
+        self._best: dict[int, int] = {}
+        self._count = 0
+        # True if the last run settled every candidate
+        self.complete = True
+
+        for combo in mymodel.state.values():
+            self._push(combo, ("", 0, 0), check_range=False)
+
+    def _push(self, combo: onedigit.Combo, derivation: tuple[str, int, int], check_range: bool = True) -> None:
+        """Queue a candidate, if it is valid and cheaper than anything known for its value."""
+        value, cost = combo.value, combo.cost
+        if check_range and not (1 <= value <= self.model.max_value and cost <= self.model.max_cost):
+            return
+        if cost >= self._best.get(value, cost + 1):
+            return
+        self._best[value] = cost
+        self._count += 1
+        heapq.heappush(self._queue, (cost, self._count, combo, derivation))
+
+    def _combine(self, combo1: onedigit.Combo) -> None:
+        """Apply every operation to a newly settled combination, and the settled ones it fits with."""
+        for op in self.unary_ops:
+            self._push(combo1.unary_operation(op=op), (op, combo1.value, 0))
+
+        stats = self.model.stats
+        value1 = combo1.value
+        for cost2 in range(1, self.model.max_cost - combo1.cost + 1):
+            group = self.by_cost.get(cost2, [])
+            stats.pairs += len(group)
+            for combo2 in group:
+                value2 = combo2.value
+                for op in self.ordered_ops:
+                    if value1 >= value2:
+                        self._push(combo1.binary_operation(combo2, op), (op, value1, value2))
+                    else:
+                        self._push(combo2.binary_operation(combo1, op), (op, value2, value1))
+                for op in self.unordered_ops:
+                    self._push(combo1.binary_operation(combo2, op), (op, value1, value2))
+                    if value1 != value2:
+                        self._push(combo2.binary_operation(combo1, op), (op, value2, value1))
+
+    def _rebuild(self, value: int) -> None:
+        """Queue the combination of a value again, from the current combinations of its operands."""
+        op, operand1, operand2 = self.derivation[value]
+        combo1 = self.settled[operand1]
+        if op in self.unary_ops:
+            self._push(combo1.unary_operation(op=op), (op, operand1, 0))
+        else:
+            self._push(combo1.binary_operation(self.settled[operand2], op), (op, operand1, operand2))
+
+    def _settle(self, combo: onedigit.Combo, derivation: tuple[str, int, int]) -> None:
+        """Make a combination the final one for its value."""
+        value = combo.value
+        previous = self.settled.get(value)
+        if previous is not None:
+            # The value improved after it was settled
+            self.by_cost[previous.cost].remove(previous)
+            for operand in self.derivation[value][1:]:
+                self.dependents.get(operand, set()).discard(value)
+
+        self.settled[value] = combo
+        self.by_cost.setdefault(combo.cost, []).append(combo)
+        self.derivation[value] = derivation
+        op, operand1, operand2 = derivation
+        if op:
+            self.dependents.setdefault(operand1, set()).add(value)
+            if op not in self.unary_ops:
+                self.dependents.setdefault(operand2, set()).add(value)
+
+        if previous is not None:
+            for dependent in list(self.dependents.get(value, ())):
+                self._rebuild(dependent)
+        self._combine(combo)
+
+    def improve(self, combo: onedigit.Combo) -> bool:
+        """
+        Offer a combination found elsewhere (say, in another snapshot).
+
+        It is queued as a literal, if it is cheaper than what is known for
+        its value. The next 'run' propagates it to the values derived from it.
+
+        Args:
+            combo (onedigit.Combo): combination to offer.
+
+        Returns:
+            bool: True if the combination was queued.
+        """
+        count = self._count
+        self._push(combo, ("", 0, 0))
+        return self._count > count
+
+    def run(self, *, deadline: float = 0.0) -> bool:
+        """
+        Settle candidates, cheapest first, until none is left.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which to stop. Defaults to no deadline.
+
+        Returns:
+            bool: True if every candidate was settled.
+        """
+        for _ in self.settle_iter(deadline=deadline):
+            pass
+        return self.complete
+
+    def settle_iter(self, *, deadline: float = 0.0) -> Iterator[onedigit.Combo]:
+        """
+        Settle candidates, cheapest first, producing each combination as it is settled.
+
+        Same as 'run'; once done, 'complete' tells if every candidate was settled.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which to stop. Defaults to no deadline.
+
+        Yields:
+            onedigit.Combo: combinations, as they are settled.
+        """
+        queue, best = self._queue, self._best
+        self.complete = False
+        popped = 0
+        while queue:
+            popped += 1
+            if deadline and popped % 64 == 0 and time.monotonic() >= deadline:
+                return
+            cost, _, combo, derivation = heapq.heappop(queue)
+            if cost > best.get(combo.value, cost):
+                # A cheaper candidate was queued after this one
+                continue
+            current = self.settled.get(combo.value)
+            if current is not None and current.cost <= cost:
+                continue
+            self._settle(combo, derivation)
+            yield combo
+        self.complete = True
+
+    def results(self) -> dict[int, onedigit.Combo]:
+        """
+        Get the best combination known for every value.
+
+        Settled combinations are final. After a run cut short, candidates
+        still in the queue are included too: they are valid, but may not be
+        the cheapest.
+
+        Returns:
+            dict[int, onedigit.Combo]: combinations indexed by value.
+        """
+        found = dict(self.settled)
+        for cost, _, combo, _ in self._queue:
+            current = found.get(combo.value)
+            if cost == self._best.get(combo.value) and (current is None or cost < current.cost):
+                found[combo.value] = combo
+        return found
+
+
+def propagate(mymodel: onedigit.Model, *, deadline: float = 0.0) -> tuple[int, bool]:
+    """
+    Bring a model to its fixed point in a single pass (see 'Propagator').
+
+    Combinations of the model are only replaced by cheaper ones.
+
+    Args:
+        mymodel (onedigit.Model): model to update.
+        deadline (float, optional): time (as given by 'time.monotonic()')
+            at which to stop. Defaults to no deadline.
+
+    Returns:
+        tuple[int, bool]: number of values updated, and True if the pass was complete.
+    """
+    updates = 0
+    improvements = propagate_iter(mymodel, deadline=deadline)
+    while True:
+        try:
+            next(improvements)
+            updates += 1
+        except StopIteration as stop:
+            return updates, bool(stop.value)
+
+
+def propagate_iter(mymodel: onedigit.Model, *, deadline: float = 0.0) -> Generator[onedigit.Improvement, None, bool]:
+    """
+    Bring a model to its fixed point in a single pass, producing improvements as they are found.
+
+    Same as 'propagate'. Settled combinations are final, so they are
+    produced as soon as they are settled; after a pass cut short, the
+    candidates still queued come last. The model is updated once the
+    pass is over, or the caller stops iterating.
+
+    Args:
+        mymodel (onedigit.Model): model to update.
+        deadline (float, optional): time (as given by 'time.monotonic()')
+            at which to stop. Defaults to no deadline.
+
+    Yields:
+        onedigit.Improvement: combinations that replace those of the model.
+
+    Returns:
+        bool: True if the pass was complete.
+    """
+    logger.debug(f"propagate(mymodel={mymodel})")
+
+    propagator = Propagator(mymodel)
+    buffer = onedigit.RoundBuffer(mymodel)
+    try:
+        for combo in propagator.settle_iter(deadline=deadline):
+            if found := buffer.offer(combo):
+                yield found
+        if not propagator.complete:
+            for combo in propagator.results().values():
+                if found := buffer.offer(combo):
+                    yield found
+    finally:
+        mymodel.apply_round(buffer)
+    return propagator.complete
@@ -0,0 +1,230 @@
+"""Rounds that only visit the work likely to improve the model, based on what earlier rounds found."""
+
+import dataclasses
+import math
+import time
+from collections.abc import Generator, Iterator
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+
+@dataclasses.dataclass
+class Yield:
+    """
+    Work done for an operation and cost bucket, and what came out of it.
+
+    Args:
+        pairs (int): number of operands (or pairs of operands) visited.
+        improvements (int): number of combinations that improved the round.
+    """
+
+    pairs: int = 0
+    improvements: int = 0
+
+    def rate(self) -> float:
+        """
+        Get the number of improvements per 10k pairs.
+
+        Returns:
+            float: improvements per 10k pairs, infinite if no pair was visited.
+        """
+        if not self.pairs:
+            return math.inf
+        return self.improvements * 10_000 / self.pairs
+
+
+class AdaptiveScheduler:
+    """
+    Run rounds of a simulation, skipping work that is not expected to help.
+
+    Two things are skipped:
+
+    - Pairs where neither operand changed in the previous round. Their
+      results were already tried, and the state only gets cheaper, so
+      they cannot improve it again. Skipping them keeps rounds exact.
+    - Operations whose yield, for a cost bucket (the cost of their
+      results), was below 'min_yield' improvements per 10k pairs the last
+      time they ran. This is a guess, so it may miss combinations.
+
+    Once a round finds nothing, and work was skipped since the last full
+    round, a full round (see 'Model.simulate') verifies the result. The
+    simulation only converges when a full round finds nothing, so the
+    final costs are the same as without the scheduler (the expressions
+    kept on ties may differ). The yields are measured again after each
+    full round.
+
+    Args:
+        mymodel (onedigit.Model): model to advance.
+        min_yield (float, optional): improvements per 10k pairs below which an
+            operation is skipped for a cost bucket. Defaults to 1.
+        min_pairs (int, optional): pairs an operation must have visited, for its
+            yield to be trusted. Defaults to 10k.
+        engine (str, optional): engine for full rounds (see 'Model.simulate'). Defaults to 'pairs'.
+    """
+
+    def __init__(
+        self, mymodel: onedigit.Model, *, min_yield: float = 1.0, min_pairs: int = 10_000, engine: str = "pairs"
+    ) -> None:
+        self.model = mymodel
+        self.min_yield = min_yield
+        self.min_pairs = min_pairs
+        self.engine = engine
+
+        # Values that changed in the last round (None when all of them must be used)
+        self.delta: set[int] | None = None
+        # Yield of the last time each (operation, cost of the results) ran
+        self.yields: dict[tuple[str, int], Yield] = {}
+        # True if nothing was skipped, other than pairs of unchanged operands, since the last full round
+        self.exact = True
+        self.verifications = 0
+
+    def _skip(self, key: tuple[str, int]) -> bool:
+        """Check if an operation is skipped for a cost bucket."""
+        last = self.yields.get(key)
+        return last is not None and last.pairs >= self.min_pairs and last.rate() < self.min_yield
+
+    def simulate(self, *, deadline: float = 0.0) -> int:
+        """
+        Run one round of the simulation.
+
+        When the round finds nothing, but work was skipped, a full round
+        runs right after it, as part of the same step.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+
+        Returns:
+            int: number of values that were updated.
+        """
+        return sum(1 for _ in self.simulate_iter(deadline=deadline))
+
+    def simulate_iter(self, *, deadline: float = 0.0) -> Generator[onedigit.Improvement, None, None]:
+        """
+        Run one round of the simulation, producing improvements as they are found.
+
+        Same as 'simulate' (see also 'Model.simulate_iter').
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+
+        Yields:
+            onedigit.Improvement: combinations accepted by the round.
+        """
+        updates = 0
+        for found in self._adaptive_round(deadline):
+            updates += 1
+            yield found
+        if updates or not self.model.stats.complete or self.exact:
+            return
+
+        logger.info("round found nothing after skipping work, verifying with a full round.")
+        yield from self.verify_iter(deadline=deadline)
+
+    def verify(self, *, deadline: float = 0.0) -> int:
+        """
+        Run a full round of the simulation, and measure yields again.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+
+        Returns:
+            int: number of values that were updated.
+        """
+        return sum(1 for _ in self.verify_iter(deadline=deadline))
+
+    def verify_iter(self, *, deadline: float = 0.0) -> Iterator[onedigit.Improvement]:
+        """
+        Run a full round of the simulation, and measure yields again, producing improvements as they are found.
+
+        Args:
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which the round must stop. Defaults to no deadline.
+
+        Yields:
+            onedigit.Improvement: combinations accepted by the round.
+        """
+        mymodel = self.model
+        before = mymodel.snapshot()
+        try:
+            yield from mymodel.simulate_iter(deadline=deadline, engine=self.engine)
+        finally:
+            self.verifications += 1
+            self.delta = {v for v, c in mymodel.state.items() if before.state.get(v) is not c}
+            self.yields = {}
+            self.exact = mymodel.stats.complete
+
+    def _adaptive_round(self, deadline: float) -> Iterator[onedigit.Improvement]:
+        """Run a round over the pairs with a changed operand, skipping low yield work, producing improvements."""
+        mymodel = self.model
+        stats = mymodel.stats
+        delta = self.delta
+
+        by_cost: dict[int, list[onedigit.Combo]] = {}
+        changed: dict[int, list[onedigit.Combo]] = {}
+        for combo in mymodel.state.values():
+            by_cost.setdefault(combo.cost, []).append(combo)
+            if delta is None or combo.value in delta:
+                changed.setdefault(combo.cost, []).append(combo)
+
+        unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(mymodel.ops)
+        new_combos = onedigit.RoundBuffer(mymodel)
+        offer = new_combos.offer
+        round_yields: dict[tuple[str, int], Yield] = {}
+        skipped = 0
+        complete = False
+
+        try:
+            for total in range(1, mymodel.max_cost + 1):
+                for op in unary_ops:
+                    if self._skip((op, total)):
+                        skipped += 1
+                        continue
+                    found = round_yields.setdefault((op, total), Yield())
+                    for combo1 in changed.get(total, []):
+                        if improvement := offer(combo1.unary_operation(op=op)):
+                            found.improvements += 1
+                            yield improvement
+                    found.pairs += len(changed.get(total, []))
+
+                for cost1 in range(1, total):
+                    group1, group2 = by_cost.get(cost1, []), by_cost.get(total - cost1, [])
+                    changed2 = changed.get(total - cost1, [])
+                    if not group1 or not group2:
+                        continue
+
+                    for op in ordered_ops + unordered_ops:
+                        if self._skip((op, total)):
+                            skipped += 1
+                            continue
+                        ordered = op in ordered_ops
+                        found = round_yields.setdefault((op, total), Yield())
+
+                        for combo1 in group1:
+                            if deadline and time.monotonic() >= deadline:
+                                return
+                            # Pairs need at least one operand that changed
+                            partners = group2 if (delta is None or combo1.value in delta) else changed2
+                            for combo2 in partners:
+                                if ordered and combo1.value < combo2.value:
+                                    continue
+                                if improvement := offer(combo1.binary_operation(combo2, op)):
+                                    found.improvements += 1
+                                    yield improvement
+                            found.pairs += len(partners)
+            complete = True
+
+        finally:
+            mymodel.apply_round(new_combos)
+            stats.complete = complete
+            stats.pairs += sum(y.pairs for y in round_yields.values())
+
+            self.delta = set(new_combos.found)
+            self.yields.update(round_yields)
+            self.exact = self.exact and complete and not skipped
+            if skipped:
+                logger.debug(f"round skipped {skipped} groups of low yield work.")
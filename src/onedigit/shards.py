@@ -0,0 +1,382 @@
+"""Rounds split by ranges of result values, so shards never share a value."""
+
+import bisect
+import concurrent.futures
+import hashlib
+import threading
+import time
+from collections.abc import Generator, Iterator
+from typing import Any
+
+import onedigit
+from onedigit.specialized import UNARY_FUNCTIONS, Hits
+
+logger = onedigit.get_logger(__name__)
+
+# Shards per thread: more shards balance the load and check the deadline more often
+SHARDS_PER_THREAD = 8
+
+
+def split_values(max_value: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Split the values from 1 to 'max_value' in ranges of the same width.
+
+    Args:
+        max_value (int): largest value of a result.
+        parts (int): number of ranges wanted.
+
+    Returns:
+        list[tuple[int, int]]: non empty ranges (lowest, highest), both included, in order.
+    """
+    parts = max(1, min(parts, max_value))
+    bounds = [1 + max_value * k // parts for k in range(parts + 1)]
+    return [(low, high - 1) for low, high in zip(bounds[:-1], bounds[1:])]
+
+
+class ShardedRound:
+    """
+    A round of the simulation, split in shards that each own a range of result values.
+
+    A shard only visits the pairs of combinations whose result can land
+    in its range: for every first operand, the partners of '+', '-' and
+    '*' are a slice of the values, found by bisection, and those of '/'
+    are its divisors. So no two shards produce the same value, and their
+    combinations are added to the round without merging them.
+
+    Within a shard, candidates are tried in the order of
+    'Model.iter_pairs', so the state after the round is identical to the
+    one of the 'pairs' engine.
+
+    A shard only depends on the combinations at the start of the round,
+    so shards can run in any order, and one that is lost can be run
+    again on its own. Finished shards are kept in 'results', and can be
+    saved with 'checkpoint' to be restored in another process.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round, sorted by value.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+        shards (int, optional): number of shards. Defaults to SHARDS_PER_THREAD for every thread
+            (see 'onedigit.threads.thread_count').
+    """
+
+    def __init__(
+        self,
+        mymodel: onedigit.Model,
+        known: list[onedigit.Combo],
+        ops: tuple[str, ...] | None = None,
+        *,
+        shards: int = 0,
+    ) -> None:
+        self.model = mymodel
+        self.known = known
+        self.ops = mymodel.ops if ops is None else ops
+        self.values = [c.value for c in known]
+        self.costs = [c.cost for c in known]
+        self.shards = split_values(mymodel.max_value, shards or onedigit.threads.thread_count() * SHARDS_PER_THREAD)
+
+        unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(self.ops)
+        self.unary = [(u, op, UNARY_FUNCTIONS[op]) for u, op in enumerate(unary_ops)]
+        self.binary = ordered_ops + unordered_ops
+        self.index = onedigit.powers.power_index(mymodel.max_value)
+
+        # Costlier candidates can only be for closed values (see 'Model.useful_cost')
+        self.max_cost = mymodel.useful_cost()
+
+        # Values of the combinations up to each cost, sorted, and their positions
+        self.partners: list[tuple[list[int], list[int]]] = []
+        for limit in range(self.max_cost + 1):
+            positions = [j for j, c in enumerate(self.costs) if c <= limit]
+            self.partners.append(([self.values[j] for j in positions], positions))
+
+        # Divisors of every value, sorted, and the position of every value
+        self.divisors: list[list[int]] = []
+        self.positions: dict[int, int] = {}
+        if "/" in self.ops and known:
+            spf = onedigit.kernels.smallest_factors(max(mymodel.max_value, self.values[-1]))
+            self.divisors = [sorted(onedigit.kernels.divisors(v, spf)) for v in self.values]
+            self.positions = {v: j for j, v in enumerate(self.values)}
+
+        # Combinations found by every finished shard, and the pairs it visited
+        self.results: dict[int, dict[int, onedigit.Combo]] = {}
+        self.pairs: dict[int, int] = {}
+
+    def pending(self) -> list[int]:
+        """
+        List the shards that did not run yet.
+
+        Returns:
+            list[int]: positions of the shards, in order.
+        """
+        return [i for i in range(len(self.shards)) if i not in self.results]
+
+    def discard(self, shard: int) -> None:
+        """
+        Drop the results of a shard, so it runs again.
+
+        Args:
+            shard (int): position of the shard.
+        """
+        self.results.pop(shard, None)
+        self.pairs.pop(shard, None)
+
+    def run_shard(self, shard: int) -> dict[int, onedigit.Combo]:
+        """
+        Apply all operations to the pairs of combinations whose result is in the range of a shard.
+
+        Args:
+            shard (int): position of the shard.
+
+        Returns:
+            dict[int, Combo]: cheapest combination found for every value of the range.
+        """
+        low, high = self.shards[shard]
+        known, values, costs = self.known, self.values, self.costs
+        max_cost, binary = self.max_cost, self.binary
+
+        # Cheapest cost known for every value of the range (above 'max_cost' if none)
+        best = [max_cost + 1] * (high - low + 1)
+        for j in range(bisect.bisect_left(values, low), bisect.bisect_right(values, high)):
+            best[values[j] - low] = costs[j]
+
+        found: dict[int, onedigit.Combo] = {}
+        pairs = 0
+        hits: Hits = []
+        for i, combo1 in enumerate(known):
+            a, cost1 = values[i], costs[i]
+            for u, _, function in self.unary:
+                v = function(a)
+                if low <= v <= high and cost1 < best[v - low]:
+                    hits.append((-1, u, v, cost1))
+
+            if cost1 < max_cost:
+                pairs += self._binary_hits(i, low, high, best, hits)
+
+            if not hits:
+                continue
+
+            # Same order as 'Model.iter_pairs': unary operations, then partners by value, then operations
+            hits.sort()
+            for j, k, v, cost in hits:
+                if cost >= best[v - low]:
+                    continue
+                if j < 0:
+                    found[v] = combo1.unary_operation(op=self.unary[k][1])
+                else:
+                    found[v] = combo1.binary_operation(known[j], binary[k])
+                best[v - low] = cost
+            hits.clear()
+
+        self.results[shard] = found
+        self.pairs[shard] = pairs
+        return found
+
+    def _binary_hits(self, i: int, low: int, high: int, best: list[int], hits: Hits) -> int:
+        """Add the candidates of a first operand whose result is in a range, and get the number of pairs visited."""
+        bisect_left, bisect_right = bisect.bisect_left, bisect.bisect_right
+        costs = self.costs
+        a, cost1 = self.values[i], costs[i]
+        # Only partners whose cost leaves the result within 'max_cost'
+        values, positions = self.partners[self.max_cost - cost1]
+        pairs = 0
+        for k, op in enumerate(self.binary):
+            # Partners no larger than the first operand (except for '^'), with a result in range
+            match op:
+                case "+":
+                    start, stop = bisect_left(values, low - a), bisect_right(values, min(a, high - a))
+                case "-":
+                    start, stop = bisect_left(values, a - high), bisect_right(values, min(a, a - low))
+                case "*":
+                    start, stop = bisect_left(values, -(-low // a)), bisect_right(values, min(a, high // a))
+                case "/":
+                    divisors = self.divisors[i]
+                    smallest, largest = a // (high + 1) + 1, a // low
+                    for b in divisors[bisect_left(divisors, smallest) : bisect_right(divisors, largest)]:
+                        j = self.positions.get(b, -1)
+                        if j >= 0:
+                            pairs += 1
+                            v, cost = a // b, cost1 + costs[j]
+                            if cost < best[v - low]:
+                                hits.append((j, k, v, cost))
+                    continue
+                case _:
+                    # Exponents in range for the base, as in 'Model.iter_pairs'
+                    stop = bisect_right(values, self.index.bound(op, a))
+                    pairs += stop
+                    for t in range(stop):
+                        v = a ** values[t]
+                        if v > high:
+                            if a > 1:
+                                break
+                            continue
+                        j = positions[t]
+                        cost = cost1 + costs[j]
+                        if v >= low and cost < best[v - low]:
+                            hits.append((j, k, v, cost))
+                    continue
+
+            pairs += max(0, stop - start)
+            for t in range(start, stop):
+                if op == "+":
+                    v = a + values[t]
+                elif op == "-":
+                    v = a - values[t]
+                else:
+                    v = a * values[t]
+                j = positions[t]
+                cost = cost1 + costs[j]
+                if cost < best[v - low]:
+                    hits.append((j, k, v, cost))
+        return pairs
+
+    def run(self, *, threads: int = 1, deadline: float = 0.0) -> Iterator[int]:
+        """
+        Run the shards that did not run yet.
+
+        With more than one thread, shards run in a pool, and are produced
+        in order as soon as the shards before them are done. Threads only
+        run in parallel on a free-threaded build (see 'onedigit.threads').
+
+        With a deadline, shards that did not start by then are skipped,
+        and stay pending.
+
+        Args:
+            threads (int, optional): number of threads. Defaults to 1.
+            deadline (float, optional): time (as given by 'time.monotonic()')
+                at which to stop. Defaults to no deadline.
+
+        Yields:
+            int: position of every shard that finished.
+        """
+        pending = self.pending()
+        if threads <= 1:
+            for shard in pending:
+                if deadline and time.monotonic() >= deadline:
+                    return
+                self.run_shard(shard)
+                yield shard
+            return
+
+        stop = threading.Event()
+
+        def run_one(shard: int) -> bool:
+            if stop.is_set() or (deadline and time.monotonic() >= deadline):
+                return False
+            self.run_shard(shard)
+            return True
+
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="onedigit-shard")
+        try:
+            futures = [(shard, pool.submit(run_one, shard)) for shard in pending]
+            for shard, future in futures:
+                if future.result():
+                    yield shard
+        finally:
+            # The caller may stop iterating: shards still waiting are dropped
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def fingerprint(self) -> str:
+        """
+        Identify the round, by the model and the combinations at its start.
+
+        Returns:
+            str: hexadecimal digest.
+        """
+        m = self.model
+        digest = hashlib.sha256(f"{m.digit},{m.max_value},{m.max_cost},{self.ops},{self.shards}".encode())
+        digest.update(repr((self.values, self.costs)).encode())
+        return digest.hexdigest()
+
+    def checkpoint(self) -> dict[str, Any]:
+        """
+        Save the finished shards.
+
+        Returns:
+            dict[str, Any]: JSON serializable dictionary, to be given to 'restore'.
+        """
+        return {
+            "fingerprint": self.fingerprint(),
+            "shards": {
+                str(shard): {"pairs": self.pairs[shard], "combinations": [c.asdict() for c in found.values()]}
+                for shard, found in sorted(self.results.items())
+            },
+        }
+
+    def restore(self, input: dict[str, Any]) -> None:
+        """
+        Restore the finished shards of a checkpoint of the same round.
+
+        Args:
+            input (dict[str, Any]): dictionary written by 'checkpoint'.
+
+        Raises:
+            ValueError: when the checkpoint is not valid, or it is for another round.
+        """
+        if input.get("fingerprint") != self.fingerprint():
+            raise ValueError("the checkpoint is for another round")
+        results: dict[int, dict[int, onedigit.Combo]] = {}
+        pairs: dict[int, int] = {}
+        try:
+            for key, shard in input["shards"].items():
+                position = int(key)
+                low, high = self.shards[position]
+                combos = [onedigit.Combo.fromdict(d) for d in shard["combinations"]]
+                if any(not low <= c.value <= high for c in combos):
+                    raise ValueError(f"shard {position} has values out of its range")
+                results[position] = {c.value: c for c in combos}
+                pairs[position] = int(shard["pairs"])
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ValueError(f"the checkpoint is not valid: {e}") from e
+        self.results.update(results)
+        self.pairs.update(pairs)
+
+
+def iter_shards(
+    mymodel: onedigit.Model,
+    known: list[onedigit.Combo],
+    new_combos: onedigit.RoundBuffer,
+    ops: tuple[str, ...] | None = None,
+    *,
+    shards: int = 0,
+    threads: int = 0,
+    deadline: float = 0.0,
+) -> Generator[onedigit.Improvement, None, bool]:
+    """
+    Apply all operations to every pair of combinations of a round, split in shards of result values.
+
+    See 'ShardedRound'. The combinations of every shard are added to
+    'new_combos' in the order of the shards, as soon as the shards before
+    them are done. Only the best combination found for every value is
+    produced, so there are fewer improvements than with 'Model.iter_pairs'.
+
+    With a deadline, shards that did not start by then are skipped. The
+    combinations found by the other shards are valid.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round, sorted by value.
+        new_combos (RoundBuffer): buffer receiving the new combinations.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+        shards (int, optional): number of shards. Defaults to SHARDS_PER_THREAD for every thread.
+        threads (int, optional): number of threads. Defaults to 'onedigit.threads.thread_count()'.
+        deadline (float, optional): time (as given by 'time.monotonic()')
+            at which the round must stop. Defaults to no deadline.
+
+    Yields:
+        Improvement: combinations accepted by the buffer.
+
+    Returns:
+        bool: True if all shards ran.
+    """
+    threads = threads or onedigit.threads.thread_count()
+    sharded = ShardedRound(mymodel, known, ops, shards=shards or threads * SHARDS_PER_THREAD)
+    logger.debug(f"iter_shards(threads={threads}, shards={len(sharded.shards)})")
+
+    offer = new_combos.offer
+    for shard in sharded.run(threads=threads, deadline=deadline):
+        mymodel.stats.pairs += sharded.pairs[shard]
+        for combo in sharded.results[shard].values():
+            if found := offer(combo):
+                yield found
+    return not sharded.pending()
@@ -1,6 +1,9 @@
 """Functionality for easy access. It schedules the operations that calculate the combinations."""
 
 import json
+import os
+import time
+from collections.abc import Generator
 
 import onedigit
 
@@ -8,7 +11,21 @@ logger = onedigit.get_logger(__name__)
 
 
 def calculate(
-    digit: int, *, max_value: int = 9999, max_cost: int = 10, max_steps: int = 10, input_json: str
+    digit: int,
+    *,
+    max_value: int = 9999,
+    max_cost: int = 10,
+    max_steps: int = 10,
+    input_json: str = "",
+    input_filename: str = "",
+    time_budget: float = 0.0,
+    max_memory: float = 0.0,
+    workers: list[str] | None = None,
+    engine: str = "pairs",
+    ops: str = "",
+    adaptive: bool = False,
+    goal: str = "",
+    warm_start: bool = False,
 ) -> onedigit.Model | None:
     """
     Run a simple calculation.
@@ -19,44 +36,110 @@ def calculate(
         max_cost (int, optional): maximum cost a combination can have to be remembered. Defaults to 10.
         max_steps (int, optional): maximum number of steps (iterations) to run. Defaults to 10.
         input_json (str, optional): JSON model data. Defaults to empty.
+        input_filename (str, optional): JSON file with model data, loaded incrementally. Defaults to empty.
+        time_budget (float, optional): wall-clock seconds the simulation may run. Defaults to no limit.
+        max_memory (float, optional): megabytes a round of the simulation may use. Defaults to no limit.
+        workers (list[str], optional): addresses ('host:port') of workers to spread rounds across.
+            Defaults to running locally.
+        engine (str, optional): how to run each round (see 'Model.simulate'). Defaults to 'pairs'.
+        ops (str, optional): operations to use, such as '+-*/' (see 'onedigit.parse_ops').
+            Defaults to all of them.
+        adaptive (bool, optional): skip work that is not expected to help (see 'onedigit.schedule').
+            Defaults to False.
+        goal (str, optional): stop once it is reached, 'coverage' or 'cost<=K' (see 'onedigit.goals').
+            Defaults to running until the simulation converges.
+        warm_start (bool, optional): start from the expressions of an approximate run (see
+            'onedigit.approximate'). Defaults to False.
+
+    Raises:
+        ValueError: when the operations or the goal are not valid.
 
     Returns:
         onedigit.Model: model object, or None if there is a failure.
     """
-    logger.debug(f"calculate(digit={digit}, max_value={max_value}, max_cost={max_cost}, max_steps={max_steps})")
+    logger.debug(
+        f"calculate(digit={digit}, max_value={max_value}, max_cost={max_cost}, max_steps={max_steps}, "
+        f"time_budget={time_budget}, max_memory={max_memory}, workers={workers}, engine={engine}, ops={ops}, adaptive={adaptive}, goal={goal}, warm_start={warm_start})"
+    )
 
-    mymodel = get_model(digit=digit, max_value=max_value, max_cost=max_cost, input_json=input_json)
+    mymodel = get_model(
+        digit=digit,
+        max_value=max_value,
+        max_cost=max_cost,
+        input_json=input_json,
+        input_filename=input_filename,
+        ops=onedigit.parse_ops(ops),
+    )
     if not mymodel:
         return None
 
-    mymodel = advance(mymodel=mymodel, max_steps=max_steps)
+    if warm_start and not {"+", "-", "*"}.issubset(mymodel.ops):
+        logger.warning("warm_start needs addition, subtraction and multiplication, and is not used.")
+    elif warm_start:
+        bounds = onedigit.approximate.approximate(
+            digit, mymodel.max_value, table_value=min(mymodel.max_value, 10_000), ops=mymodel.ops
+        )
+        logger.info(f"warm start added {bounds.warm_start(mymodel)} combinations.")
+
+    if workers:
+        if time_budget or max_memory or engine != "pairs" or adaptive or goal:
+            logger.warning("time_budget, max_memory, engine, adaptive and goal are not used when running with workers.")
+        mymodel = onedigit.distributed.advance(mymodel=mymodel, workers=workers, max_steps=max_steps)
+    else:
+        mymodel = advance(
+            mymodel=mymodel,
+            max_steps=max_steps,
+            time_budget=time_budget,
+            max_memory=max_memory,
+            engine=engine,
+            adaptive=adaptive,
+            goal=goal,
+        )
     if not mymodel:
         return None
 
     return mymodel
 
 
-def get_model(digit: int, *, max_value: int = 9999, max_cost: int = 2, input_json: str = "") -> onedigit.Model | None:
+def get_model(
+    digit: int,
+    *,
+    max_value: int = 9999,
+    max_cost: int = 2,
+    input_json: str = "",
+    input_filename: str = "",
+    ops: tuple[str, ...] | None = None,
+) -> onedigit.Model | None:
     """
     Obtain an initial model.
 
     If valid JSON data is provided, the model is built from it.
     Otherwise a fresh model is created.
 
+    A JSON file is loaded incrementally (see 'onedigit.loader'), keeping
+    only combinations within 'max_value' and 'max_cost'. Files ending in
+    '.sqlite' are read from a store (see 'onedigit.store'). If the file
+    cannot be used, a fresh model is created.
+
+    Models that use other operations than 'ops' are not used.
+
     Args:
         digit (int): digit to use
         max_value (int, optional): largest value to remember. Defaults to 9999.
         max_cost (int, optional): maximum cost a combination can have to be remembered. Defaults to 10.
         input_json (str, optional): JSON text that represents a model. Defaults to empty.
+        input_filename (str, optional): JSON file (or store) that represents a model. Defaults to empty.
+        ops (tuple[str, ...], optional): operations the model uses. Defaults to all of them.
 
     Returns:
         onedigit.Model: a model, or None.
     """
     logger.debug(
-        f"get_model(digit={digit}, max_value={max_value}, max_cost={max_cost}, input_json={len(input_json)} chars)"
+        f"get_model(digit={digit}, max_value={max_value}, max_cost={max_cost}, input_json={len(input_json)} chars, "
+        f"input_filename={input_filename}, ops={ops})"
     )
     # Build a blank model
-    mymodel = onedigit.Model(digit=digit)
+    mymodel = onedigit.Model(digit=digit, ops=ops)
 
     # Parse the input JSON
     if mymodel and input_json:
@@ -69,10 +152,34 @@ def get_model(digit: int, *, max_value: int = 9999, max_cost: int = 2, input_jso
                 mymodel2 = onedigit.Model.fromdict(input=input_dict)
             except ValueError as e:
                 logger.error("failed to import model:", e)
-        if mymodel2.digit == digit:
-            mymodel = mymodel2
-        else:
+        if mymodel2.digit != digit:
             logger.error(f"requested model for digit={digit}, ignoring imported model as it has digit={mymodel2.digit}")
+        elif mymodel2.ops != mymodel.ops:
+            logger.error(
+                f"requested model for operations {mymodel.ops}, ignoring imported model as it uses {mymodel2.ops}"
+            )
+        else:
+            mymodel = mymodel2
+
+    # Load the input file
+    if mymodel and input_filename:
+        try:
+            if input_filename.endswith(onedigit.store.SUFFIXES):
+                if not os.path.exists(input_filename):
+                    raise FileNotFoundError(input_filename)
+                with onedigit.store.ModelStore(input_filename) as store:
+                    mymodel = store.read(digit, max_value=max_value, max_cost=max_cost, ops=mymodel.ops)
+            else:
+                with open(input_filename, mode="r", encoding="utf-8") as input_fp:
+                    mymodel = onedigit.loader.load_model(
+                        input_fp, digit=digit, max_value=max_value, max_cost=max_cost, ops=mymodel.ops
+                    )
+        except FileNotFoundError:
+            logger.error(f"The input file '{input_filename}' does not exist.")
+        except PermissionError:
+            logger.error(f"No permissions to open the input file '{input_filename}'.")
+        except ValueError as e:
+            logger.error(f"failed to import model from '{input_filename}', simulation will use a fresh model: {e}")
 
     if not mymodel:
         logger.error("unable to build a model")
@@ -84,29 +191,202 @@ def get_model(digit: int, *, max_value: int = 9999, max_cost: int = 2, input_jso
     return mymodel
 
 
-def advance(mymodel: onedigit.Model, max_steps: int = 10) -> onedigit.Model:
+def advance(
+    mymodel: onedigit.Model,
+    max_steps: int = 10,
+    *,
+    time_budget: float = 0.0,
+    max_memory: float = 0.0,
+    engine: str = "pairs",
+    adaptive: bool = False,
+    goal: str = "",
+) -> onedigit.Model:
     """
     Perform iterations over a onedigit model.
 
     This function will stop earlier than the number of steps,
-    if there is no change in state after an iteration.
+    if there is no change in state after an iteration. After a round
+    with changes, a cheap check on the costs may prove that no other
+    round can change the state (see 'onedigit.goals.fixpoint_certificate'),
+    which saves the round that would confirm it; 'stats.certified' is
+    then True. A complete pass of the 'propagate' engine needs no check.
+
+    With a goal, the simulation stops as soon as it is reached, even in
+    the middle of a round, and the reason to stop is 'goal'.
+
+    With a time budget, rounds schedule the cheapest operands first, and
+    the simulation stops once the budget is spent. The model is left in
+    a consistent state, with the best combinations found so far.
+
+    With a memory budget, the model is shrunk before any round that is
+    projected to go over it (see 'Model.shrink'). The simulation gets
+    slower and less complete, instead of running out of memory. The
+    steps taken are listed in 'mymodel.stats.degradations'.
+
+    When adaptive, rounds only visit pairs with an operand that changed,
+    and skip operations that stopped finding improvements. A full round
+    confirms convergence, so the final costs are the same (see
+    'onedigit.schedule.AdaptiveScheduler').
+
+    Progress is recorded in 'mymodel.stats'.
 
     Args:
         mymodel (onedigit.Model): model at the begining of the simulation.
         max_steps (int): maximum number of steps (iterations) to run. Defaults to 10.
+        time_budget (float, optional): wall-clock seconds the simulation may run. Defaults to no limit.
+        max_memory (float, optional): megabytes a round of the simulation may use. Defaults to no limit.
+        engine (str, optional): how to run each round (see 'Model.simulate'). Defaults to 'pairs'.
+        adaptive (bool, optional): skip work that is not expected to help. Defaults to False.
+        goal (str, optional): stop once it is reached, 'coverage' or 'cost<=K' (see
+            'onedigit.goals.GoalTracker'). Defaults to running until the simulation converges.
+
+    Raises:
+        ValueError: when the goal is not valid.
 
     Returns:
         onedigit.Model: reference to the updated model.
     """
-    logger.debug(f"simple.advance(mymodel={mymodel}, max_steps={max_steps})")
+    improvements = advance_iter(
+        mymodel,
+        max_steps,
+        time_budget=time_budget,
+        max_memory=max_memory,
+        engine=engine,
+        adaptive=adaptive,
+        goal=goal,
+    )
+    for _ in improvements:
+        pass
+    return mymodel
+
+
+def advance_iter(
+    mymodel: onedigit.Model,
+    max_steps: int = 10,
+    *,
+    time_budget: float = 0.0,
+    max_memory: float = 0.0,
+    engine: str = "pairs",
+    adaptive: bool = False,
+    goal: str = "",
+) -> Generator[onedigit.Improvement, None, None]:
+    """
+    Perform iterations over a onedigit model, producing improvements as they are found.
+
+    Same as 'advance', but every combination accepted by a round is
+    produced as soon as it is found (see 'Model.simulate_iter'), so the
+    caller can report progress, or write results, while the search goes
+    on. Each round is applied to the model when it ends. If the caller
+    stops iterating, the current round is applied with what it found, and
+    the reason to stop is 'interrupted'.
+
+    Args:
+        mymodel (onedigit.Model): model at the begining of the simulation.
+        max_steps (int): maximum number of steps (iterations) to run. Defaults to 10.
+        time_budget (float, optional): wall-clock seconds the simulation may run. Defaults to no limit.
+        max_memory (float, optional): megabytes a round of the simulation may use. Defaults to no limit.
+        engine (str, optional): how to run each round (see 'Model.simulate'). Defaults to 'pairs'.
+        adaptive (bool, optional): skip work that is not expected to help. Defaults to False.
+        goal (str, optional): stop once it is reached, 'coverage' or 'cost<=K'. Defaults to
+            running until the simulation converges.
+
+    Raises:
+        ValueError: when the goal is not valid.
+
+    Yields:
+        onedigit.Improvement: combinations accepted by each round.
+    """
+    logger.debug(
+        f"simple.advance(mymodel={mymodel}, max_steps={max_steps}, time_budget={time_budget}, "
+        f"max_memory={max_memory}, engine={engine}, adaptive={adaptive}, goal={goal})"
+    )
+
+    start = time.monotonic()
+    deadline = (start + time_budget) if time_budget > 0 else 0.0
+    memory_limit = int(max_memory * 1024 * 1024)
+
+    stats = mymodel.stats
+    stats.stop_reason = "max_steps"
+    stats.certified = False
+    scheduler = onedigit.schedule.AdaptiveScheduler(mymodel, engine=engine) if adaptive else None
+    tracker = onedigit.goals.GoalTracker(mymodel, goal) if goal else None
 
     # Run a few steps
-    for step in range(1, max_steps + 1):
-        updates = mymodel.simulate()
-        if updates == 0:
-            logger.info(f"stopping early as state does not advance past {step} iterations.")
-            break
-        else:
+    try:
+        for step in range(1, max_steps + 1):
+            if deadline and time.monotonic() >= deadline:
+                stats.stop_reason = "time_budget"
+                break
+
+            if memory_limit:
+                stats.degradations.extend(mymodel.shrink(memory_limit))
+                stats.peak_memory = max(stats.peak_memory, mymodel.round_memory())
+
+            if tracker is not None:
+                tracker.recount()
+                if tracker.reached:
+                    logger.info(f"goal '{goal}' is reached before iteration {step}.")
+                    stats.stop_reason = "goal"
+                    break
+
+            # No candidate can improve a model whose values all reached their lower bound
+            if mymodel.useful_cost() == 0:
+                logger.info(f"every value is closed before iteration {step}.")
+                stats.stop_reason = "converged"
+                stats.certified = True
+                break
+
+            if scheduler is not None:
+                improvements = scheduler.simulate_iter(deadline=deadline)
+            else:
+                improvements = mymodel.simulate_iter(deadline=deadline, engine=engine)
+            updates = 0
+            changed: dict[int, onedigit.Combo] = {}
+            try:
+                for found in improvements:
+                    updates += 1
+                    changed[found.value] = found.combo
+                    yield found
+                    if tracker is not None and tracker.update(found):
+                        break
+            finally:
+                improvements.close()
+                stats.rounds += 1
+                stats.updates += updates
+
+            if tracker is not None and tracker.reached:
+                logger.info(f"iteration {step} reached goal '{goal}' after finding {updates} new combinations.")
+                stats.stop_reason = "goal"
+                break
+            if not stats.complete:
+                logger.info(f"iteration {step} ran out of time after finding {updates} new combinations.")
+                stats.stop_reason = "time_budget"
+                break
+            if updates == 0:
+                logger.info(f"stopping early as state does not advance past {step} iterations.")
+                stats.stop_reason = "converged"
+                break
+            # A complete pass of 'propagate' ends at the fixed point. Rounds that
+            # skipped work may have missed pairs the certificate relies on.
+            if (scheduler is None and engine == "propagate") or (
+                (scheduler is None or scheduler.exact)
+                and onedigit.goals.fixpoint_certificate(mymodel, changed.values())
+            ):
+                logger.info(f"iteration {step} found {updates} new combinations, and no other round can improve them.")
+                stats.stop_reason = "converged"
+                stats.certified = True
+                break
             logger.info(f"iteration {step} found {updates} new combinations.")
 
-    return mymodel
+    except GeneratorExit:
+        stats.stop_reason = "interrupted"
+        raise
+
+    finally:
+        stats.elapsed += time.monotonic() - start
+        logger.info(
+            f"simulation stopped ({stats.stop_reason}{', certified' if stats.certified else ''}) after {stats.rounds} rounds, "
+            f"{stats.pairs} pairs and {stats.elapsed:.3f} seconds."
+        )
+        if stats.degradations:
+            logger.info(f"simulation degraded {len(stats.degradations)} times to stay within the memory budget.")
@@ -0,0 +1,246 @@
+"""Pure Python loops specialized for each operation, giving the same rounds as 'Model.run_pairs'."""
+
+import bisect
+import math
+import time
+from collections.abc import Callable, Generator
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Candidates that may improve the round: (partner position, operation position, value, cost)
+Hits = list[tuple[int, int, int, int]]
+
+# Loop over the partners of a first operand for a binary operation:
+# (value1, cost1, partners, values, costs, best, max_value, operation position, hits)
+BinaryLoop = Callable[[int, int, list[int], list[int], list[int], list[int], int, int, Hits], None]
+
+
+def _add(
+    a: int,
+    cost1: int,
+    partners: list[int],
+    values: list[int],
+    costs: list[int],
+    best: list[int],
+    max_value: int,
+    k: int,
+    hits: Hits,
+) -> None:
+    for j in partners:
+        v = a + values[j]
+        if v > max_value:
+            break
+        if cost1 + costs[j] < best[v]:
+            hits.append((j, k, v, cost1 + costs[j]))
+
+
+def _subtract(
+    a: int,
+    cost1: int,
+    partners: list[int],
+    values: list[int],
+    costs: list[int],
+    best: list[int],
+    max_value: int,
+    k: int,
+    hits: Hits,
+) -> None:
+    for j in partners:
+        v = a - values[j]
+        if 1 <= v <= max_value and cost1 + costs[j] < best[v]:
+            hits.append((j, k, v, cost1 + costs[j]))
+
+
+def _multiply(
+    a: int,
+    cost1: int,
+    partners: list[int],
+    values: list[int],
+    costs: list[int],
+    best: list[int],
+    max_value: int,
+    k: int,
+    hits: Hits,
+) -> None:
+    for j in partners:
+        v = a * values[j]
+        if v > max_value:
+            break
+        if cost1 + costs[j] < best[v]:
+            hits.append((j, k, v, cost1 + costs[j]))
+
+
+def _divide(
+    a: int,
+    cost1: int,
+    partners: list[int],
+    values: list[int],
+    costs: list[int],
+    best: list[int],
+    max_value: int,
+    k: int,
+    hits: Hits,
+) -> None:
+    for j in partners:
+        b = values[j]
+        if a % b == 0:
+            v = a // b
+            if v <= max_value and cost1 + costs[j] < best[v]:
+                hits.append((j, k, v, cost1 + costs[j]))
+
+
+def _power(
+    a: int,
+    cost1: int,
+    partners: list[int],
+    values: list[int],
+    costs: list[int],
+    best: list[int],
+    max_value: int,
+    k: int,
+    hits: Hits,
+) -> None:
+    for j in partners:
+        b = values[j]
+        # Same limit on the exponent as 'Combo.binary_operation'
+        if b > 40:
+            break
+        v = a**b
+        if v > max_value:
+            if a > 1:
+                break
+            continue
+        if cost1 + costs[j] < best[v]:
+            hits.append((j, k, v, cost1 + costs[j]))
+
+
+def _factorial(a: int) -> int:
+    # Same limit as 'Combo.unary_operation'
+    return math.factorial(a) if 0 <= a <= 20 else 0
+
+
+def _square_root(a: int) -> int:
+    root = math.isqrt(a) if a >= 0 else 0
+    return root if root * root == a else 0
+
+
+BINARY_LOOPS: dict[str, BinaryLoop] = {"+": _add, "-": _subtract, "*": _multiply, "/": _divide, "^": _power}
+UNARY_FUNCTIONS: dict[str, Callable[[int], int]] = {"!": _factorial, "sqrt": _square_root}
+
+
+def iter_specialized(
+    mymodel: onedigit.Model,
+    known: list[onedigit.Combo],
+    new_combos: onedigit.RoundBuffer,
+    ops: tuple[str, ...] | None = None,
+    *,
+    deadline: float = 0.0,
+) -> Generator[onedigit.Improvement, None, bool]:
+    """
+    Apply all operations to every pair of combinations of a round, producing improvements as they are found.
+
+    The round is the same as 'Model.iter_pairs': same combinations, in the
+    same order, so the state, the expressions kept on ties and the
+    improvements produced are identical. It is faster because:
+
+    - Values and costs are read from plain lists, and each operation has
+      its own loop, with the operation chosen once per first operand.
+    - Only the values are calculated in the loops. Combinations (and their
+      expressions) are built for the few candidates that are cheaper than
+      what is known for their value.
+    - Partners whose cost is too high for the result to be kept are not
+      visited. For the ordered operations, only partners no larger than
+      the first operand are (a triangle of the pairs), and loops whose
+      results only grow stop once they pass 'max_value'.
+
+    For each first operand, the candidates found by the loops are sorted
+    in the order 'Model.iter_pairs' would try them, and checked again
+    against the round as it goes, which keeps the results identical.
+
+    With a deadline, the round stops between two first operands once it
+    passes. The combinations found up to then are valid.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round, sorted by value.
+        new_combos (RoundBuffer): buffer receiving the new combinations.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+        deadline (float, optional): time (as given by 'time.monotonic()')
+            at which the round must stop. Defaults to no deadline.
+
+    Raises:
+        ValueError: when an operation has no specialized loop.
+
+    Yields:
+        Improvement: combinations accepted by the buffer.
+
+    Returns:
+        bool: True if all pairs were visited.
+    """
+    unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(mymodel.ops if ops is None else ops)
+    for op in unary_ops + ordered_ops + unordered_ops:
+        if op not in BINARY_LOOPS and op not in UNARY_FUNCTIONS:
+            raise ValueError(f"operation '{op}' has no specialized loop")
+    binary_ops = ordered_ops + unordered_ops
+    unary = [(u, UNARY_FUNCTIONS[op]) for u, op in enumerate(unary_ops)]
+    ordered = [(k, BINARY_LOOPS[op]) for k, op in enumerate(ordered_ops)]
+    unordered = [(k, BINARY_LOOPS[op]) for k, op in enumerate(unordered_ops, start=len(ordered_ops))]
+
+    # Costlier candidates can only be for closed values (see 'Model.useful_cost')
+    max_value, max_cost = mymodel.max_value, mymodel.useful_cost()
+    values = [c.value for c in known]
+    costs = [c.cost for c in known]
+
+    # Cheapest cost known for every value, in the state or in the round (above 'max_cost' if none)
+    best = [max_cost + 1] * (max_value + 1)
+    for combos in (mymodel.state, new_combos.found):
+        for value, combo in combos.items():
+            if 1 <= value <= max_value:
+                best[value] = min(best[value], combo.cost)
+
+    # Positions of the combinations up to each cost, sorted by value
+    partners_by_cost = [[j for j, c in enumerate(costs) if c <= limit] for limit in range(max_cost + 1)]
+
+    offer = new_combos.offer
+    stats = mymodel.stats
+    hits: Hits = []
+    for i, combo1 in enumerate(known):
+        if deadline and time.monotonic() >= deadline:
+            return False
+
+        a, cost1 = values[i], costs[i]
+        for u, function in unary:
+            v = function(a)
+            if 1 <= v <= max_value and cost1 < best[v]:
+                hits.append((-1, u, v, cost1))
+
+        if binary_ops and cost1 < max_cost:
+            partners = partners_by_cost[max_cost - cost1]
+            stats.pairs += len(partners)
+            if ordered:
+                smaller = partners[: bisect.bisect_right(partners, i)]
+                for k, loop in ordered:
+                    loop(a, cost1, smaller, values, costs, best, max_value, k, hits)
+            for k, loop in unordered:
+                loop(a, cost1, partners, values, costs, best, max_value, k, hits)
+
+        if not hits:
+            continue
+
+        # Same order as 'Model.iter_pairs': unary operations, then partners by value, then operations
+        hits.sort()
+        for j, k, v, cost in hits:
+            if cost >= best[v]:
+                continue
+            if j < 0:
+                candidate = combo1.unary_operation(op=unary_ops[k])
+            else:
+                candidate = combo1.binary_operation(known[j], binary_ops[k])
+            if found := offer(candidate):
+                best[v] = cost
+                yield found
+        hits.clear()
+
+    return True
@@ -0,0 +1,250 @@
+"""Models stored in an SQLite database, indexed for range and cost queries."""
+
+import itertools
+import sqlite3
+from collections.abc import Iterator
+from typing import Any
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# File names handled as stores by the command line
+SUFFIXES = (".sqlite", ".sqlite3")
+
+# Rows sent to the database at a time
+BATCH_SIZE = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    digit INTEGER PRIMARY KEY,
+    ops TEXT NOT NULL,
+    max_value INTEGER NOT NULL,
+    max_cost INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS combinations (
+    digit INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    cost INTEGER NOT NULL,
+    expr_full TEXT NOT NULL,
+    expr_simple TEXT NOT NULL,
+    PRIMARY KEY (digit, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS combinations_cost ON combinations (digit, cost);
+"""
+
+# Keep the cheapest combination of every value
+_UPSERT = """
+INSERT INTO combinations (digit, value, cost, expr_full, expr_simple) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (digit, value) DO UPDATE SET
+    cost = excluded.cost, expr_full = excluded.expr_full, expr_simple = excluded.expr_simple
+WHERE excluded.cost < combinations.cost
+"""
+
+# Limits cover every model written for the digit
+_UPSERT_MODEL = """
+INSERT INTO models (digit, ops, max_value, max_cost) VALUES (?, ?, ?, ?)
+ON CONFLICT (digit) DO UPDATE SET
+    max_value = max(max_value, excluded.max_value), max_cost = max(max_cost, excluded.max_cost)
+"""
+
+
+class ModelStore:
+    """
+    Combinations of models for several digits, in an SQLite database.
+
+    Every digit has one row in 'models' (operations and limits), and
+    one row per value in 'combinations', indexed by (digit, value) and by
+    (digit, cost). Queries on ranges of values or costs read only the
+    rows they need, without building a 'Model'.
+
+    Writing a model only replaces a combination with a cheaper one, so
+    runs can write to the same store as they go, in any order. The limits
+    of a digit are the largest ones written.
+
+    Args:
+        filename (str): database file, created if it does not exist.
+
+    Raises:
+        ValueError: when the file is not an SQLite database.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        try:
+            with self.connection:
+                self.connection.executescript(_SCHEMA)
+        except sqlite3.DatabaseError as e:
+            self.connection.close()
+            raise ValueError(f"'{filename}' is not a model store: {e}") from e
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> "ModelStore":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def header(self, digit: int) -> dict[str, Any]:
+        """
+        Get the operations and limits stored for a digit.
+
+        Args:
+            digit (int): digit of the model.
+
+        Raises:
+            ValueError: when the store has no model for the digit.
+
+        Returns:
+            dict[str, Any]: 'digit', 'ops', 'max_value', 'max_cost' and the number of 'combinations'.
+        """
+        row = self.connection.execute(
+            "SELECT ops, max_value, max_cost FROM models WHERE digit = ?",
+            (digit,),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"the store has no model for digit={digit}")
+        (count,) = self.connection.execute("SELECT count(*) FROM combinations WHERE digit = ?", (digit,)).fetchone()
+        return {
+            "digit": digit,
+            "ops": tuple(row[0].split()),
+            "max_value": row[1],
+            "max_cost": row[2],
+            "combinations": count,
+        }
+
+    def digits(self) -> list[int]:
+        """
+        Get the digits with a model in the store.
+
+        Returns:
+            list[int]: digits, in order.
+        """
+        return [digit for (digit,) in self.connection.execute("SELECT digit FROM models ORDER BY digit")]
+
+    def write(self, mymodel: onedigit.Model, *, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Write the combinations of a model, keeping the cheapest of every value.
+
+        The whole model is written in a single transaction, with rows sent
+        in batches.
+
+        Args:
+            mymodel (onedigit.Model): model to write.
+            batch_size (int, optional): number of rows sent at a time.
+
+        Raises:
+            ValueError: when the store has a model for the digit with other operations.
+
+        Returns:
+            int: number of combinations added or replaced.
+        """
+        logger.debug(f"write(mymodel={mymodel}, filename={self.filename})")
+
+        ops = " ".join(mymodel.ops)
+        row = self.connection.execute("SELECT ops FROM models WHERE digit = ?", (mymodel.digit,)).fetchone()
+        if row is not None and set(row[0].split()) != set(mymodel.ops):
+            raise ValueError(f"the store uses operations {row[0]} for digit={mymodel.digit}, but the model uses {ops}")
+
+        digit = mymodel.digit
+        rows = ((digit, c.value, c.cost, c.expr_full, c.expr_simple) for c in mymodel.state.values())
+        with self.connection:
+            self.connection.execute(_UPSERT_MODEL, (digit, ops, mymodel.max_value, mymodel.max_cost))
+            changes = self.connection.total_changes
+            while batch := list(itertools.islice(rows, batch_size)):
+                self.connection.executemany(_UPSERT, batch)
+            changes = self.connection.total_changes - changes
+
+        logger.info(f"stored {changes} combinations for digit {digit} in '{self.filename}'.")
+        return changes
+
+    def query(
+        self, digit: int, *, min_value: int = 1, max_value: int = 0, max_cost: int = 0
+    ) -> Iterator[onedigit.Combo]:
+        """
+        Get the combinations of a digit within a range of values and costs.
+
+        Args:
+            digit (int): digit of the model.
+            min_value (int, optional): smallest value. Defaults to 1.
+            max_value (int, optional): largest value. Defaults to no limit.
+            max_cost (int, optional): largest cost. Defaults to no limit.
+
+        Yields:
+            onedigit.Combo: combinations, sorted by value.
+        """
+        sql = "SELECT value, cost, expr_full, expr_simple FROM combinations WHERE digit = ? AND value >= ?"
+        params = [digit, min_value]
+        if max_value:
+            sql += " AND value <= ?"
+            params.append(max_value)
+        if max_cost:
+            sql += " AND cost <= ?"
+            params.append(max_cost)
+        sql += " ORDER BY value"
+
+        for value, cost, expr_full, expr_simple in self.connection.execute(sql, params):
+            yield onedigit.Combo(value=value, cost=cost, expr_full=expr_full, expr_simple=expr_simple)
+
+    def unreachable(self, digit: int, *, min_value: int = 1, max_value: int = 0, max_cost: int = 0) -> Iterator[int]:
+        """
+        Get the values of a digit that have no combination within a cost.
+
+        Args:
+            digit (int): digit of the model.
+            min_value (int, optional): smallest value. Defaults to 1.
+            max_value (int, optional): largest value. Defaults to the one stored for the digit.
+            max_cost (int, optional): largest cost. Defaults to no limit.
+
+        Raises:
+            ValueError: when the store has no model for the digit.
+
+        Yields:
+            int: values without a combination, in order.
+        """
+        max_value = max_value or self.header(digit)["max_value"]
+        sql = "SELECT value FROM combinations WHERE digit = ? AND value BETWEEN ? AND ?"
+        params = [digit, min_value, max_value]
+        if max_cost:
+            sql += " AND cost <= ?"
+            params.append(max_cost)
+        sql += " ORDER BY value"
+
+        expected = min_value
+        for (value,) in self.connection.execute(sql, params):
+            yield from range(expected, value)
+            expected = value + 1
+        yield from range(expected, max_value + 1)
+
+    def read(
+        self, digit: int, *, max_value: int = 0, max_cost: int = 0, ops: tuple[str, ...] | None = None
+    ) -> onedigit.Model:
+        """
+        Build the model stored for a digit.
+
+        Args:
+            digit (int): digit of the model.
+            max_value (int, optional): largest value to keep. Defaults to the one stored.
+            max_cost (int, optional): largest cost to keep. Defaults to the one stored.
+            ops (tuple[str, ...], optional): operations the model must use. Defaults to accepting any.
+
+        Raises:
+            ValueError: when the store has no model for the digit, or it uses other operations.
+
+        Returns:
+            onedigit.Model: the model, with the combinations within the limits.
+        """
+        header = self.header(digit)
+        onedigit.loader.check_ops(header["ops"], ops)
+
+        mymodel = onedigit.Model(digit=digit, ops=header["ops"])
+        mymodel.max_value = min(header["max_value"], max_value) if max_value else header["max_value"]
+        mymodel.max_cost = min(header["max_cost"], max_cost) if max_cost else header["max_cost"]
+        mymodel.state = {c.value: c for c in self.query(digit, max_value=mymodel.max_value, max_cost=mymodel.max_cost)}
+
+        logger.info(f"loaded {len(mymodel.state)} combinations for digit {digit} from '{self.filename}'.")
+        return mymodel
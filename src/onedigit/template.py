@@ -0,0 +1,304 @@
+"""
+Expression templates that evaluate the same expression shapes for all nine digits at once.
+
+A template is kept while any digit finds a new value with it, so the
+layers hold the shapes of all nine digits, and pairs of them are
+evaluated over plain tuples. This takes longer than nine runs of the
+'specialized' engine (about 6 times at max_value=5000 and max_cost=6),
+so templates are not one of the engines of 'Model.simulate', and the
+planner does not offer them.
+"""
+
+# Needed so classes can make self references to their type
+from __future__ import annotations
+
+import math
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+DIGITS = range(1, 10)
+
+# Placeholder used for the digit in template expressions
+PLACEHOLDER = "d"
+
+
+class Template:
+    """
+    An expression shape, evaluated for every digit from 1 to 9.
+
+    Component 'values[i]' holds the value of the expression for the digit
+    'i + 1'. A component set to zero means the expression is not useful
+    for that digit (the result is invalid, out of range, or the value
+    was already produced by a cheaper template).
+
+    Args:
+        values (tuple[int, ...]): value of the expression for each digit.
+        cost (int): number of times the digit is used in the expression.
+        expr (str): expression, with 'd' in place of the digit.
+        op (str): operation that produced the template ('' for concatenations).
+        operands (tuple[Template, ...]): templates the operation was applied to.
+    """
+
+    __slots__ = ("values", "cost", "expr", "op", "operands")
+
+    def __init__(self, values: tuple[int, ...], cost: int, expr: str, op: str, operands: tuple[Template, ...]) -> None:
+        self.values = values
+        self.cost = cost
+        self.expr = expr
+        self.op = op
+        self.operands = operands
+
+    def __repr__(self) -> str:
+        """
+        Provide a string representation of the Template object.
+
+        Returns:
+            str: string representation of the Template object
+        """
+        return f"Template: {self.expr}    [{self.cost}]"
+
+    def expr_simple(self, index: int) -> str:
+        """
+        Build the simplified expression of the template for one digit.
+
+        Args:
+            index (int): position of the digit (digit - 1).
+
+        Returns:
+            str: expression in terms of the values of the operands.
+        """
+        if not self.op:
+            return str(self.values[index])
+        if self.op == "!":
+            return f"{self.operands[0].values[index]}!"
+        if self.op == "sqrt":
+            return f"√({self.operands[0].values[index]})"
+        return f"{self.operands[0].values[index]} {self.op} {self.operands[1].values[index]}"
+
+
+def _wrap(expr: str) -> str:
+    """Only use parenthesis for cases it helps (if expression has spaces)."""
+    if " " in expr:
+        return "(" + expr + ")"
+    return expr
+
+
+def _power(base: int, exponent: int, max_value: int) -> int:
+    """
+    Calculate an exponentiation, if the result stays within range.
+
+    Mirrors the limits in 'Combo.binary_operation', and avoids building
+    huge integers for results that would be discarded.
+
+    Returns:
+        int: the result, or zero if it is not valid.
+    """
+    if exponent > 40:
+        return 0
+    if base >= 2 and exponent * (base.bit_length() - 1) > max_value.bit_length():
+        return 0
+    result: int = base**exponent
+    return result if result <= max_value else 0
+
+
+def _binary(values1: tuple[int, ...], values2: tuple[int, ...], op: str, max_value: int) -> tuple[int, ...]:
+    """
+    Apply a binary operation to every digit component of two templates.
+
+    Components where the operation is invalid or out of range are zero.
+    For '+', '-', '*' and '/', only cases where the first operand is at
+    least as large as the second are used, as in 'Model.simulate'.
+    """
+    match op:
+        case "+":
+            return tuple(a + b if a and b and a >= b and a + b <= max_value else 0 for a, b in zip(values1, values2))
+        case "-":
+            return tuple(a - b if a and b and a > b and a - b <= max_value else 0 for a, b in zip(values1, values2))
+        case "*":
+            return tuple(a * b if a and b and a >= b and a * b <= max_value else 0 for a, b in zip(values1, values2))
+        case "/":
+            return tuple(
+                a // b if a and b and a >= b and a % b == 0 and a // b <= max_value else 0
+                for a, b in zip(values1, values2)
+            )
+        case "^":
+            return tuple(_power(a, b, max_value) if a and b else 0 for a, b in zip(values1, values2))
+        case _:
+            raise ValueError("bad operator:", op)
+
+
+def _unary(values: tuple[int, ...], op: str, max_value: int) -> tuple[int, ...]:
+    """Apply a unary operation to every digit component of a template."""
+    match op:
+        case "!":
+            return tuple(math.factorial(a) if 1 <= a <= 20 and math.factorial(a) <= max_value else 0 for a in values)
+        case "sqrt":
+            return tuple(
+                math.isqrt(a) if a and math.isqrt(a) ** 2 == a and math.isqrt(a) <= max_value else 0 for a in values
+            )
+        case _:
+            raise ValueError("bad operator:", op)
+
+
+class TemplateEngine:
+    """
+    Enumerate expression templates by cost, for all nine digits at once.
+
+    Templates of cost 'c' are built from pairs of templates whose costs
+    add up to 'c', plus unary operations over templates of cost 'c'.
+    Each digit keeps the first template that produced a value; later
+    templates mask that component. So every value is produced by its
+    cheapest expression, which is the fixed point 'simple.advance'
+    converges to.
+
+    Args:
+        max_value (int): upper limit of values the models retain.
+        max_cost (int): maximum cost of a combination.
+        ops (tuple[str, ...], optional): operations to use. Defaults to all of them.
+    """
+
+    max_value: int
+    max_cost: int
+    ops: tuple[str, ...]
+    layers: dict[int, list[Template]]
+    best: list[dict[int, Template]]
+
+    def __init__(self, *, max_value: int, max_cost: int, ops: tuple[str, ...] | None = None) -> None:
+        if not isinstance(max_value, int) or not (1 <= max_value <= 1_000_000):
+            raise ValueError("max value must be a positive number below 1M.")
+        if not isinstance(max_cost, int) or not (1 <= max_cost <= 30):
+            raise ValueError("maximum cost must be a positive number below 30.")
+
+        self.max_value = max_value
+        self.max_cost = max_cost
+        self.ops = onedigit.operators.ALL_OPS if ops is None else ops
+        self.layers = {}
+        self.best = [{} for _ in DIGITS]
+
+    def _claim(self, values: tuple[int, ...]) -> tuple[int, ...]:
+        """Mask components whose values were already produced."""
+        return tuple(v if v and v not in best else 0 for v, best in zip(values, self.best))
+
+    def _add(
+        self,
+        layer: list[Template],
+        values: tuple[int, ...],
+        cost: int,
+        expr: str,
+        op: str,
+        operands: tuple[Template, ...],
+    ) -> Template | None:
+        """Register a template if it produces a new value for at least one digit."""
+        values = self._claim(values)
+        if not any(values):
+            return None
+
+        template = Template(values=values, cost=cost, expr=expr, op=op, operands=operands)
+        for v, best in zip(values, self.best):
+            if v:
+                best[v] = template
+        layer.append(template)
+        return template
+
+    def run(self) -> int:
+        """
+        Build all layers of templates, up to the maximum cost.
+
+        Returns:
+            int: number of templates that were kept.
+        """
+        logger.debug(f"TemplateEngine.run(max_value={self.max_value}, max_cost={self.max_cost})")
+
+        binary_ops = [op for op in ["+", "-", "*", "/", "^"] if op in self.ops]
+        unary_ops = [op for op in ["!", "sqrt"] if op in self.ops]
+
+        total = 0
+        for cost in range(1, self.max_cost + 1):
+            layer: list[Template] = []
+
+            # Concatenation of the digit (say, 22, two 2s).
+            # The digit itself is always available, as in 'Model.seed'.
+            repunit = (10**cost - 1) // 9
+            values = tuple(d * repunit if d * repunit <= self.max_value or cost == 1 else 0 for d in DIGITS)
+            self._add(layer, values, cost, PLACEHOLDER * cost, "", ())
+
+            # Binary operations over templates with lower costs
+            for cost1 in range(1, cost):
+                for t1 in self.layers[cost1]:
+                    expr1 = _wrap(t1.expr)
+                    for t2 in self.layers[cost - cost1]:
+                        expr2 = _wrap(t2.expr)
+                        for op in binary_ops:
+                            values = _binary(t1.values, t2.values, op, self.max_value)
+                            if any(values):
+                                self._add(layer, values, cost, f"{expr1} {op} {expr2}", op, (t1, t2))
+
+            # Unary operations keep the cost, so they run until the layer stops growing
+            pending = 0
+            while pending < len(layer):
+                t1 = layer[pending]
+                pending += 1
+                expr1 = _wrap(t1.expr)
+                for op in unary_ops:
+                    expr = expr1 + "!" if op == "!" else "√(" + expr1 + ")"
+                    values = _unary(t1.values, op, self.max_value)
+                    if any(values):
+                        self._add(layer, values, cost, expr, op, (t1,))
+
+            self.layers[cost] = layer
+            total += len(layer)
+            logger.info(f"cost {cost} has {len(layer)} templates.")
+
+        return total
+
+    def model(self, digit: int) -> onedigit.Model:
+        """
+        Build the model of one digit from the templates.
+
+        Args:
+            digit (int): digit of the model.
+
+        Returns:
+            onedigit.Model: model with the cheapest combination for every value found.
+        """
+        mymodel = onedigit.Model(digit=digit, ops=self.ops)
+        mymodel.seed(max_value=self.max_value, max_cost=self.max_cost)
+        mymodel.stats.stop_reason = "converged"
+
+        index = digit - 1
+        for value, template in self.best[index].items():
+            mymodel.state[value] = onedigit.Combo(
+                value=value,
+                cost=template.cost,
+                expr_full=template.expr.replace(PLACEHOLDER, str(digit)),
+                expr_simple=template.expr_simple(index),
+            )
+        return mymodel
+
+
+def calculate_all(*, max_value: int = 9999, max_cost: int = 10, ops: str = "") -> dict[int, onedigit.Model]:
+    """
+    Calculate the models for all nine digits in one pass.
+
+    Expression shapes are enumerated by cost once, and evaluated for every
+    digit together. The result for each digit matches running
+    'simple.advance' on it until the state stops changing. It is slower
+    than running the 'specialized' engine for each digit (see the module
+    documentation).
+
+    Args:
+        max_value (int, optional): largest value to remember. Defaults to 9999.
+        max_cost (int, optional): maximum cost a combination can have to be remembered. Defaults to 10.
+        ops (str, optional): operations to use, such as '+-*/' (see 'onedigit.parse_ops'). Defaults to all of them.
+
+    Returns:
+        dict[int, onedigit.Model]: a model for every digit, indexed by the digit.
+    """
+    logger.debug(f"calculate_all(max_value={max_value}, max_cost={max_cost}, ops={ops})")
+
+    engine = TemplateEngine(max_value=max_value, max_cost=max_cost, ops=onedigit.parse_ops(ops))
+    engine.run()
+
+    return {digit: engine.model(digit) for digit in DIGITS}
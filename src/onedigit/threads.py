@@ -0,0 +1,141 @@
+"""Rounds split across threads, for free-threaded builds of Python."""
+
+import concurrent.futures
+import functools
+import math
+import os
+import sys
+import threading
+import time
+from collections.abc import Generator
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Ranges of first operands per thread: more ranges balance the load and check the deadline more often
+RANGES_PER_THREAD = 8
+
+
+@functools.cache
+def free_threaded() -> bool:
+    """
+    Check if the interpreter runs without the global interpreter lock.
+
+    Returns:
+        bool: True for a free-threaded build with the GIL disabled.
+    """
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if gil_enabled:
+        logger.info("the GIL is enabled, the 'threads' engine runs its rounds serially.")
+    return not gil_enabled
+
+
+def thread_count() -> int:
+    """
+    Get the number of threads the 'threads' engine uses by default.
+
+    Returns:
+        int: one per available core on a free-threaded build, 1 otherwise.
+    """
+    if not free_threaded():
+        return 1
+    return os.cpu_count() or 1
+
+
+def split_ranges(count: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Split the first operands of a round in ranges with a similar number of pairs.
+
+    First operands are sorted by value, and most operations only pair an
+    operand with smaller ones, so position 'i' has about 'i' pairs.
+
+    Args:
+        count (int): number of first operands.
+        parts (int): number of ranges wanted.
+
+    Returns:
+        list[tuple[int, int]]: non empty ranges (start, stop), in order.
+    """
+    bounds = sorted({round(count * math.sqrt(k / parts)) for k in range(parts + 1)})
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+
+
+def iter_threads(
+    mymodel: onedigit.Model,
+    known: list[onedigit.Combo],
+    new_combos: onedigit.RoundBuffer,
+    ops: tuple[str, ...] | None = None,
+    *,
+    threads: int = 0,
+    deadline: float = 0.0,
+) -> Generator[onedigit.Improvement, None, bool]:
+    """
+    Apply all operations to every pair of combinations of a round, with the first operands split across threads.
+
+    Each range of first operands (see 'Model.run_pairs') runs on a view
+    of the model (see 'Model.view'), which shares the state without
+    copying it. Each range fills a buffer of its own. Buffers are merged
+    into 'new_combos' in the order of their ranges, as soon as the ranges
+    before them are done. Since a buffer keeps the first of the cheapest
+    candidates for every value, the state after the round is identical
+    to the one of 'Model.iter_pairs'. Only the best combination found by
+    each range is produced, so there are fewer improvements.
+
+    Threads only run in parallel on a free-threaded build (Python 3.13t
+    with the GIL disabled); otherwise they take turns, and a round is
+    best run serially (see 'thread_count').
+
+    With a deadline, ranges that did not start by then are skipped. The
+    combinations found by the other ranges are valid.
+
+    Args:
+        mymodel (onedigit.Model): model the round runs on.
+        known (list[Combo]): combinations at the start of the round, sorted by value.
+        new_combos (RoundBuffer): buffer receiving the new combinations.
+        ops (tuple[str, ...], optional): operations to apply. Defaults to those of the model.
+        threads (int, optional): number of threads. Defaults to 'thread_count()'.
+        deadline (float, optional): time (as given by 'time.monotonic()')
+            at which the round must stop. Defaults to no deadline.
+
+    Yields:
+        Improvement: combinations accepted by the buffer.
+
+    Returns:
+        bool: True if all pairs were visited.
+    """
+    threads = threads or thread_count()
+    ranges = split_ranges(len(known), threads * RANGES_PER_THREAD)
+    logger.debug(f"iter_threads(threads={threads}, ranges={len(ranges)})")
+    stop = threading.Event()
+
+    def run_range(start: int, end: int) -> tuple[onedigit.RoundBuffer, int] | None:
+        if stop.is_set() or (deadline and time.monotonic() >= deadline):
+            return None
+        # Counters of the view are private to the thread
+        view = mymodel.view()
+        buffer = onedigit.RoundBuffer(view)
+        pairs = view.stats.pairs
+        view.run_pairs(known, buffer, start, end, ops=ops)
+        return buffer, view.stats.pairs - pairs
+
+    complete = True
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="onedigit")
+    try:
+        futures = [pool.submit(run_range, start, end) for start, end in ranges]
+        offer = new_combos.offer
+        for future in futures:
+            result = future.result()
+            if result is None:
+                complete = False
+                continue
+            buffer, pairs = result
+            mymodel.stats.pairs += pairs
+            for combo in buffer.found.values():
+                if found := offer(combo):
+                    yield found
+    finally:
+        # The caller may stop iterating: ranges still waiting are dropped
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+    return complete
@@ -0,0 +1,389 @@
+"""Check the combinations of a model by evaluating their expressions again."""
+
+import collections
+import concurrent.futures
+import itertools
+import math
+import os
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any, TextIO
+
+import onedigit
+
+logger = onedigit.get_logger(__name__)
+
+# Combinations checked at a time, by a process of the pool
+BATCH_SIZE = 20_000
+
+# Steps of a compiled expression: literals, and names of operations applied to the stack
+Program = list[str]
+
+# Fields of a combination, as checked: (value, cost, expr_full, expr_simple)
+Row = tuple[int, int, str, str]
+
+_TOKEN = re.compile(r"[0-9]+|[()!√+\-*/^]")
+_TOKENS = re.compile(r"(?:\s*(?:[0-9]+|[()!√+\-*/^]))*\s*")
+_BINARY = {"+", "-", "*", "/", "^"}
+_OPEN, _CLOSE, _ROOT, _FACTORIAL = "(", ")", "√", "!"
+
+# Largest size of a partial result, in bits, for expressions evaluated without the limits of a model
+MAX_BITS = 256
+
+
+def compile_expression(expr: str) -> Program:
+    """
+    Compile an expression, as written by 'Combo', to a postfix program.
+
+    Operands of a binary operation that have spaces are in parentheses,
+    so every level of parentheses has at most one binary operation:
+
+        expr    := term [op term]
+        term    := primary '!'*
+        primary := literal | '(' expr ')' | '√' '(' expr ')'
+
+    The expression is read in a single pass, with a stack of the levels
+    of parentheses. Literals are kept as strings, so their digits can be
+    checked.
+
+    Args:
+        expr (str): full expression of a combination (see 'Combo').
+
+    Raises:
+        ValueError: when the expression is not valid.
+
+    Returns:
+        Program: literals and operations, in the order they are evaluated.
+    """
+    if not _TOKENS.fullmatch(expr):
+        raise ValueError("unexpected characters")
+    tokens = _TOKEN.findall(expr)
+
+    program: Program = []
+    # Levels of parentheses: [binary operation, True for a square root]
+    levels: list[list[Any]] = [["", False]]
+    operand = True  # True when an operand is expected
+    pos = 0
+    while pos < len(tokens):
+        token = tokens[pos]
+        pos += 1
+        level = levels[-1]
+        if token[0].isdigit() or token in (_OPEN, _ROOT):
+            if not operand:
+                raise ValueError(f"unexpected '{token}' (operands with spaces must be in parentheses)")
+            if token == _OPEN:
+                levels.append(["", False])
+                continue
+            if token == _ROOT:
+                if pos == len(tokens) or tokens[pos] != _OPEN:
+                    raise ValueError("expected '(' after '√'")
+                pos += 1
+                levels.append(["", True])
+                continue
+            program.append(token)
+            operand = False
+        elif operand:
+            raise ValueError(f"expected an operand but found '{token}'")
+        elif token == _FACTORIAL:
+            program.append(_FACTORIAL)
+        elif token == _CLOSE:
+            if len(levels) == 1:
+                raise ValueError("unexpected ')'")
+            if level[0]:
+                program.append(level[0])
+            if level[1]:
+                program.append("sqrt")
+            levels.pop()
+        elif level[0]:
+            raise ValueError(f"unexpected '{token}' (operands with spaces must be in parentheses)")
+        else:
+            level[0] = token
+            operand = True
+
+    if operand:
+        raise ValueError("expected an operand but found the end")
+    if len(levels) > 1:
+        raise ValueError("expected ')' but found the end")
+    if levels[0][0]:
+        program.append(levels[0][0])
+    return program
+
+
+def evaluate(program: Program, *, max_bits: int = MAX_BITS) -> tuple[int, tuple[str, int, int]]:
+    """
+    Evaluate a compiled expression, with the rules of 'Combo'.
+
+    Every partial result must be a positive integer: divisions and square
+    roots must be exact, factorials are limited to 20 and exponents to 40.
+    Partial results must also fit in 'max_bits'. Products and powers are
+    checked before they are computed, so a hostile expression (such as
+    nested powers) is rejected at once.
+
+    Args:
+        program (Program): compiled expression (see 'compile_expression').
+        max_bits (int, optional): largest size of a partial result, in bits. Defaults to MAX_BITS.
+
+    Raises:
+        ValueError: when a step is not valid.
+
+    Returns:
+        tuple[int, tuple[str, int, int]]: value of the expression, and its
+        last step as operation and operands (in the form of 'onedigit.columns.parse_simple').
+    """
+    stack: list[int] = []
+    last: tuple[str, int, int] = ("", 0, 0)
+    for step in program:
+        if step[0].isdigit():
+            result = int(step)
+            last = ("", result, 0)
+        elif step == "!" or step == "sqrt":
+            a = stack.pop()
+            if step == "!":
+                if a > 20:
+                    raise ValueError(f"factorial of {a} is out of range")
+                result = math.factorial(a)
+            else:
+                result = math.isqrt(a)
+                if result * result != a:
+                    raise ValueError(f"{a} is not a perfect square")
+            last = (step, a, 0)
+        else:
+            b, a = stack.pop(), stack.pop()
+            match step:
+                case "+":
+                    result = a + b
+                case "-":
+                    result = a - b
+                case "*":
+                    if a.bit_length() + b.bit_length() - 1 > max_bits:
+                        raise ValueError(f"product of {a} and {b} is out of range")
+                    result = a * b
+                case "/":
+                    if a % b != 0:
+                        raise ValueError(f"{a} is not divisible by {b}")
+                    result = a // b
+                case _:
+                    if b > 40:
+                        raise ValueError(f"exponent {b} is out of range")
+                    if b * (a.bit_length() - 1) + 1 > max_bits:
+                        raise ValueError(f"{a} to the power of {b} is out of range")
+                    result = a**b
+            last = (step, a, b)
+        # Results are not shown once they are too large, as they may take long to format
+        if result.bit_length() > max_bits:
+            raise ValueError(f"partial result of {result.bit_length()} bits is out of range")
+        if result < 1:
+            raise ValueError(f"partial result {result} is not a positive number")
+        stack.append(result)
+
+    if len(stack) != 1:
+        raise ValueError("the expression is empty")
+    return stack[0], last
+
+
+def check_row(row: Row, *, digit: int, max_value: int, max_cost: int, ops: tuple[str, ...]) -> str:
+    """
+    Check a combination against its expression and the limits of its model.
+
+    Args:
+        row (Row): value, cost, full expression and simple expression of the combination.
+        digit (int): digit of the model.
+        max_value (int): largest value of the model.
+        max_cost (int): largest cost of the model.
+        ops (tuple[str, ...]): operations of the model.
+
+    Returns:
+        str: the problem found, or an empty string if the combination is valid.
+    """
+    value, cost, expr_full, expr_simple = row
+    try:
+        program = compile_expression(expr_full)
+    except ValueError as e:
+        return f"value {value}: expression '{expr_full}' is not valid: {e}"
+
+    literals = [step for step in program if step[0].isdigit()]
+    if any(literal.strip(str(digit)) for literal in literals):
+        return f"value {value}: expression '{expr_full}' uses digits other than {digit}"
+    used = sum(len(literal) for literal in literals)
+    if used != cost:
+        return f"value {value}: cost is {cost}, but the expression uses the digit {used} times"
+    if not {step for step in program if not step[0].isdigit()}.issubset(ops):
+        return f"value {value}: expression '{expr_full}' uses operations the model does not"
+
+    # Partial results of a model stay close to its values: twice the bits leaves room to spare
+    try:
+        result, last = evaluate(program, max_bits=2 * max(max_value, digit).bit_length())
+    except ValueError as e:
+        return f"value {value}: expression '{expr_full}' can not be evaluated: {e}"
+    if result != value:
+        return f"value {value}: expression '{expr_full}' evaluates to {result}"
+
+    # The digit itself is always in the model, even above 'max_value'
+    if not (1 <= value <= max_value) and expr_full != str(digit):
+        return f"value {value}: out of range, the model goes up to {max_value}"
+    if cost > max_cost:
+        return f"value {value}: cost {cost} is above the largest cost of the model, {max_cost}"
+
+    # The simple expression is the last step, with the values of its operands
+    try:
+        simple = onedigit.columns.parse_simple(expr_simple)
+    except ValueError:
+        simple = ("?", 0, 0)
+    if simple != last:
+        return f"value {value}: simple expression '{expr_simple}' does not match '{expr_full}'"
+    return ""
+
+
+def _check_batch(args: tuple[dict[str, Any], list[Row]]) -> list[str]:
+    """Check a batch of combinations (run by the processes of a pool)."""
+    header, rows = args
+    problems = []
+    for row in rows:
+        if problem := check_row(row, **header):
+            problems.append(problem)
+    return problems
+
+
+def verify_rows(header: dict[str, Any], batches: Iterable[list[Row]], *, processes: int = 0) -> list[str]:
+    """
+    Check the combinations of a model, given in batches.
+
+    The first batch is checked in this process. When there are more, they
+    are checked by a pool of processes, keeping a few batches in flight so
+    memory use does not follow the size of the model.
+
+    Args:
+        header (dict[str, Any]): 'digit', 'max_value', 'max_cost' and 'ops' of the model.
+        batches (Iterable[list[Row]]): combinations of the model.
+        processes (int, optional): size of the pool, 1 to check everything here. Defaults to one per core.
+
+    Returns:
+        list[str]: problems found, batch by batch.
+    """
+    header = {k: header[k] for k in ("digit", "max_value", "max_cost", "ops")}
+    processes = processes or os.cpu_count() or 1
+    batches = iter(batches)
+    seen: set[int] = set()
+    problems: list[str] = []
+
+    def duplicates(rows: list[Row]) -> list[str]:
+        found = []
+        for row in rows:
+            if row[0] in seen:
+                found.append(f"value {row[0]}: more than one combination")
+            seen.add(row[0])
+        return found
+
+    first = next(batches, [])
+    problems.extend(duplicates(first) + _check_batch((header, first)))
+    second = next(batches, None)
+    if second is None:
+        return problems
+    rest = itertools.chain([second], batches)
+
+    if processes == 1:
+        for rows in rest:
+            problems.extend(duplicates(rows) + _check_batch((header, rows)))
+        return problems
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        pending: collections.deque[tuple[list[str], concurrent.futures.Future[list[str]]]] = collections.deque()
+        for rows in rest:
+            pending.append((duplicates(rows), pool.submit(_check_batch, (header, rows))))
+            while len(pending) > 2 * processes:
+                found, future = pending.popleft()
+                problems.extend(found + future.result())
+        for found, future in pending:
+            problems.extend(found + future.result())
+    return problems
+
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[list[Row]]:
+    """Group rows in lists of up to 'size' elements."""
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def verify_model(mymodel: onedigit.Model, *, processes: int = 0, batch_size: int = BATCH_SIZE) -> list[str]:
+    """
+    Check every combination of a model (see 'check_row').
+
+    Args:
+        mymodel (onedigit.Model): model to check.
+        processes (int, optional): size of the pool used for large models, 1 to use none. Defaults to one per core.
+        batch_size (int, optional): combinations checked at a time.
+
+    Returns:
+        list[str]: problems found, empty if the model is valid.
+    """
+    logger.debug(f"verify_model(mymodel={mymodel}, processes={processes})")
+
+    header = {"digit": mymodel.digit, "max_value": mymodel.max_value, "max_cost": mymodel.max_cost, "ops": mymodel.ops}
+    problems = [f"value {c.value}: found under value {k}" for k, c in mymodel.state.items() if k != c.value]
+    rows = ((c.value, c.cost, c.expr_full, c.expr_simple) for c in mymodel.state.values())
+    return problems + verify_rows(header, _batches(rows, batch_size), processes=processes)
+
+
+def verify_snapshot(fp: TextIO, *, processes: int = 0, batch_size: int = BATCH_SIZE) -> list[str]:
+    """
+    Check every combination of a JSON snapshot, without loading it as a model.
+
+    The snapshot is read incrementally (see 'onedigit.loader'), so it can
+    be checked before it is used, whatever its size.
+
+    Args:
+        fp (TextIO): file object with the snapshot, opened in text mode.
+        processes (int, optional): size of the pool used for large snapshots, 1 to use none. Defaults to one per core.
+        batch_size (int, optional): combinations checked at a time.
+
+    Raises:
+        ValueError: when the snapshot can not be read (say, it is not JSON, or a key is missing or out of place).
+
+    Returns:
+        list[str]: problems found, empty if the snapshot is valid.
+    """
+    logger.debug(f"verify_snapshot(processes={processes})")
+
+    reader = onedigit.loader.SnapshotReader(fp)
+    header = dict(reader.read_header())
+    for k in onedigit.loader.MODEL_KEYS:
+        if k not in header:
+            raise ValueError(f"input dictionary is missing key {k}")
+    has_ops = "ops" in header
+    header.setdefault("ops", list(onedigit.operators.ALL_OPS))
+    onedigit.loader.check_ops(header["ops"], None)
+    header["ops"] = tuple(header["ops"])
+
+    batches = (
+        [(d["value"], d["cost"], d["expr_full"], d["expr_simple"]) for d in batch]
+        for batch in onedigit.loader.validated_batches(reader, batch_size=batch_size)
+    )
+    problems = verify_rows(header, batches, processes=processes)
+    # The rows were checked against all the operations
+    if not has_ops and "ops" in reader.header:
+        raise ValueError("input dictionary has key ops after the combinations")
+    return problems
+
+
+def verify_store(store: onedigit.ModelStore, *, processes: int = 0, batch_size: int = BATCH_SIZE) -> list[str]:
+    """
+    Check every combination of a store, for every digit.
+
+    Args:
+        store (onedigit.ModelStore): store to check.
+        processes (int, optional): size of the pool used for large models, 1 to use none. Defaults to one per core.
+        batch_size (int, optional): combinations checked at a time.
+
+    Returns:
+        list[str]: problems found, starting with the digit they were found for.
+    """
+    logger.debug(f"verify_store(filename={store.filename}, processes={processes})")
+
+    problems: list[str] = []
+    for digit in store.digits():
+        header = store.header(digit)
+        rows = ((c.value, c.cost, c.expr_full, c.expr_simple) for c in store.query(digit))
+        found = verify_rows(header, _batches(rows, batch_size), processes=processes)
+        problems.extend(f"digit {digit}, {problem}" for problem in found)
+    return problems
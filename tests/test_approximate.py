@@ -0,0 +1,102 @@
+import random
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def exact_table(digit: int, max_value: int, max_cost: int) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.propagate.propagate(model)
+    return model
+
+
+class TestApproximate(unittest.TestCase):
+    @settings(deadline=None, max_examples=9)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_valid_bounds(self, digit: int) -> None:
+        table = exact_table(digit, max_value=300, max_cost=6)
+        bounds = onedigit.approximate.ApproximateTable(table, 20_000)
+        bounds.sample(5000, seed=digit)
+        bounds.refine()
+
+        rng = random.Random(digit)
+        for value in rng.sample(range(1, 20_001), 300) + list(bounds.sampled)[:100]:
+            combo = bounds.combo(value)
+            if combo is None:
+                assert bounds.cost(value) == 0
+                continue
+            # Every bound belongs to a valid expression
+            assert combo.value == value
+            assert combo.cost <= bounds.cost(value)
+            row = (combo.value, combo.cost, combo.expr_full, combo.expr_simple)
+            assert onedigit.verify.check_row(row, digit=digit, max_value=20_000, max_cost=99, ops=table.ops) == ""
+
+    def test_upper_bounds(self) -> None:
+        exact = exact_table(7, max_value=30_000, max_cost=7)
+        table = exact_table(7, max_value=1000, max_cost=7)
+        bounds = onedigit.approximate.ApproximateTable(table, 30_000)
+
+        # Values of the table keep their cost, and no bound is below the best cost
+        for value, combo in table.state.items():
+            if value <= 1000:
+                assert bounds.cost(value) == combo.cost
+        for value, combo in exact.state.items():
+            assert bounds.cost(value) == 0 or bounds.cost(value) >= combo.cost
+        assert sum(bounds.histogram().values()) == 30_000
+        # Every value above the table has a bound
+        assert all(bounds.cost(value) for value in range(1001, 30_001))
+
+    def test_sampling_lowers_bounds(self) -> None:
+        table = exact_table(3, max_value=500, max_cost=6)
+        bounds = onedigit.approximate.ApproximateTable(table, 50_000)
+        before = sum(bounds.costs)
+        assert bounds.sample(20_000) > 0
+        bounds.refine()
+        assert sum(bounds.costs) < before
+
+    def test_warm_start(self) -> None:
+        model = onedigit.Model(digit=4)
+        model.seed(max_value=2000, max_cost=5)
+        expected = model.copy()
+        onedigit.propagate.propagate(expected)
+
+        bounds = onedigit.approximate.approximate(4, 2000, table_value=200, table_cost=5)
+        assert bounds.warm_start(model) > 0
+        for combo in model.state.values():
+            assert combo.cost <= 5
+
+        # The exact engines converge to the same costs
+        model.simulate(engine="propagate")
+        assert {v: c.cost for v, c in model.state.items()} == {v: c.cost for v, c in expected.state.items()}
+
+        with self.assertRaises(expected_exception=ValueError):
+            bounds.warm_start(onedigit.Model(digit=5))
+        model = onedigit.Model(digit=4)
+        model.seed(max_value=100, max_cost=5)
+        with self.assertRaises(expected_exception=ValueError):
+            bounds.warm_start(model)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.approximate.approximate(4, 5000, ops=("+", "*"))
+
+    def test_warm_start_range(self) -> None:
+        # Expressions of values near 'max_value' may not go through larger ones, such as 7 * 6! - 77 = 4963
+        cold = onedigit.Model(digit=7)
+        cold.seed(max_value=5000, max_cost=7)
+        warm = cold.copy()
+        bounds = onedigit.approximate.approximate(7, 100_000, table_value=1000, table_cost=7)
+        assert bounds.cost(4963) == 6
+        assert bounds.warm_start(warm) > 0
+
+        onedigit.advance(mymodel=cold, max_steps=20, engine="specialized")
+        onedigit.advance(mymodel=warm, max_steps=20, engine="specialized")
+        assert {v: c.cost for v, c in warm.state.items()} == {v: c.cost for v, c in cold.state.items()}
+
+    def test_cli(self) -> None:
+        assert onedigit.cli.approximate(digit=2, max_value=20_000, table_value=200, table_cost=6, values="12345,678")
+        assert onedigit.cli.approximate(digit=2, max_value=5000, table_value=200, table_cost=6, samples=100)
+        assert not onedigit.cli.approximate(digit=2, max_value=5000, values="6000")
+        assert onedigit.main(5, max_value=500, max_cost=4, warm_start=True)
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+
+import onedigit
+from onedigit.benchmark import Sample, fit, run_benchmark
+
+SMALL = ((7, 100, 4), (7, 200, 5), (7, 400, 6))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_fit(self) -> None:
+        samples = [Sample("pairs", 0, 0, pairs, 2e-6 * pairs**1.5, 0) for pairs in (1000, 10_000, 100_000)]
+        coefficient, exponent = fit(samples)
+        assert abs(exponent - 1.5) < 1e-6 and abs(coefficient - 2e-6) < 1e-9
+
+        # A single sample grows with the number of pairs, and the exponent is bounded
+        assert fit(samples[:1])[1] == 1.0
+        assert fit([Sample("pairs", 0, 0, p, p**5, 0) for p in (10, 100)])[1] == onedigit.benchmark.MAX_EXPONENT
+        with self.assertRaises(expected_exception=ValueError):
+            fit([])
+
+    def test_run(self) -> None:
+        calibration, samples = run_benchmark(engines=("specialized", "propagate"), configs=SMALL)
+        assert set(calibration.engines) == {"specialized", "propagate"}
+        assert len(samples) == 2 * len(SMALL)
+        for model in calibration.engines.values():
+            assert model.coefficient > 0 and model.bytes_per_combo > 0
+
+        # Engines stop growing their simulations after one takes longer than the limit
+        _, samples = run_benchmark(engines=("specialized",), configs=SMALL, time_limit=1e-9)
+        assert len(samples) == 1
+
+        # The calibration plans runs
+        plan = onedigit.plan.plan_run(7, max_value=1000, max_cost=6, max_steps=5, calibration=calibration)
+        assert plan.engine in calibration.engines
+
+        with self.assertRaises(expected_exception=ValueError):
+            run_benchmark(engines=("fast",))
+        with self.assertRaises(expected_exception=ValueError):
+            run_benchmark(configs=())
+
+    def test_cli(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "calibration.json")
+            original = onedigit.benchmark.CONFIGS
+            try:
+                onedigit.benchmark.CONFIGS = SMALL
+                assert onedigit.cli.benchmark(output=filename, time_limit=0.5)
+            finally:
+                onedigit.benchmark.CONFIGS = original
+            with open(filename, mode="r", encoding="utf-8") as fp:
+                assert set(json.load(fp)["engines"]) == set(onedigit.plan.MEASURED_ENGINES)
+            assert not onedigit.cli.benchmark(output=filename, time_limit=0)
@@ -0,0 +1,91 @@
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.bounds import CostBounds, cost_bounds
+
+
+def converged(digit: int, max_value: int, max_cost: int, ops: tuple[str, ...] | None = None) -> onedigit.Model:
+    # Rounds of 'pairs' do not use the bounds
+    model = onedigit.Model(digit=digit, ops=ops)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    while model.simulate(engine="pairs"):
+        pass
+    return model
+
+
+class TestBounds(unittest.TestCase):
+    @settings(deadline=None, max_examples=30)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=300),
+        max_cost=hst.integers(min_value=1, max_value=5),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_sound(self, digit: int, max_value: int, max_cost: int, ops: set[str]) -> None:
+        model = converged(digit, max_value, max_cost, tuple(ops))
+        bounds = cost_bounds(digit, max_value, max_cost, model.ops)
+        for value in range(1, max_value + 1):
+            combo = model.state.get(value)
+            if combo is None:
+                assert bounds.lower[value] > bounds.exact or bounds.lower[value] > max_cost
+            else:
+                assert combo.cost >= bounds.lower[value]
+                # Levels enumerated exactly give the cost itself
+                assert combo.cost == bounds.lower[value] or bounds.lower[value] > bounds.exact
+        assert model.useful_cost() == 0 or bounds.exact < max_cost
+
+    def test_reach(self) -> None:
+        # Without powers and factorials, joint digits are the largest values
+        bounds = CostBounds(9, 1_000_000, 30, ("+",))
+        assert bounds.exact == 30
+        assert bounds.reach[:7] == [0, 9, 99, 999, 9999, 99999, 999999]
+        assert bounds.lower[999] == 3 and bounds.lower[1008] == 4
+        assert bounds.lower[1000] == 31 and bounds.lower[1] == 31
+
+        # Beyond the levels enumerated exactly, bounds come from the largest values
+        bounds = CostBounds(7, 1_000_000, 12, onedigit.operators.ALL_OPS)
+        assert bounds.exact < 12
+        assert all(bounds.lower[v] >= 1 for v in range(1, 1_000_001))
+        assert bounds.lower[7] == 1 and bounds.lower[5040] == 1
+
+    def test_closed(self) -> None:
+        # Every value closes when its cost is proven, and the run stops without another round
+        model = onedigit.Model(digit=7)
+        model.seed(max_value=100, max_cost=8)
+        assert model.useful_cost() == 8
+        onedigit.advance(mymodel=model, max_steps=20, engine="specialized")
+        assert model.useful_cost() == 0
+        rounds = model.stats.rounds
+        onedigit.advance(mymodel=model, max_steps=20)
+        assert model.stats.rounds == rounds
+        assert model.stats.stop_reason == "converged" and model.stats.certified
+
+        # Values that can not be reached are closed too
+        model = converged(7, 1000, 6)
+        assert len(model.state) < 1000
+        assert model.useful_cost() == 0
+
+    def test_foreign_state(self) -> None:
+        # Combinations found with a larger range may be cheaper than the bounds of a smaller one
+        model = converged(3, 300, 5)
+        model.max_value = 60
+        model.state = {v: c for v, c in model.state.items() if v <= 60}
+        bounds = cost_bounds(3, 60, 5, model.ops)
+        assert any(c.cost < bounds.lower[v] for v, c in model.state.items())
+        assert model.useful_cost() == 5
+
+    def test_identical_results(self) -> None:
+        # Engines skip the candidates for closed values, and find the same costs
+        model1 = onedigit.Model(digit=3)
+        model1.seed(max_value=600, max_cost=6)
+        model2 = model1.copy()
+        model3 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=20, engine="pairs")
+        onedigit.advance(mymodel=model2, max_steps=20, engine="specialized")
+        onedigit.advance(mymodel=model3, max_steps=20, engine="kernels")
+        assert model1.asdict() == model2.asdict()
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model3.state.items()}
+        assert model2.stats.pairs < model1.stats.pairs
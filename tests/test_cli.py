@@ -6,3 +6,11 @@ import onedigit
 class TestCalculate(unittest.TestCase):
     def test_main_entry(self) -> None:
         assert onedigit.main(1, max_value=1, max_cost=1)
+
+    def test_main_ops(self) -> None:
+        assert onedigit.main(4, max_value=50, max_cost=2, ops="+-*/")
+        assert not onedigit.main(4, max_value=50, max_cost=2, ops="+%")
+
+    def test_main_goal(self) -> None:
+        assert onedigit.main(4, max_value=50, max_cost=3, goal="cost<=3")
+        assert not onedigit.main(4, max_value=50, max_cost=3, goal="fast")
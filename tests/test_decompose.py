@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.decompose import Decomposer, integer_root
+
+
+def run_model(
+    digit: int, max_value: int = 2000, max_cost: int = 7, ops: tuple[str, ...] | None = None
+) -> onedigit.Model:
+    model = onedigit.Model(digit=digit, ops=ops)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.propagate.propagate(model)
+    return model
+
+
+class TestDecompose(unittest.TestCase):
+    model: onedigit.Model
+    decomposer: Decomposer
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.model = run_model(7)
+        cls.decomposer = Decomposer(cls.model)
+
+    @given(value=hst.integers(min_value=1, max_value=10**30), exponent=hst.integers(min_value=1, max_value=40))
+    def test_integer_root(self, value: int, exponent: int) -> None:
+        root = integer_root(value, exponent)
+        assert root**exponent <= value < (root + 1) ** exponent
+
+    @settings(deadline=None, max_examples=30)
+    @given(target=hst.integers(min_value=1, max_value=10**12))
+    def test_valid_expressions(self, target: int) -> None:
+        combo = self.decomposer.search(target, time_budget=0.5)
+        assert combo is not None
+        row = (combo.value, combo.cost, combo.expr_full, combo.expr_simple)
+        problem = onedigit.verify.check_row(row, digit=7, max_value=target, max_cost=99, ops=self.model.ops)
+        assert problem == ""
+
+    def test_forms(self) -> None:
+        # Values of the table keep their combination
+        assert self.decomposer.search(343) == self.model.state[343]
+
+        # Products, and powers, of values of the table plus a remainder
+        state = self.model.state
+        a, b = max(state), min(v for v in state if v >= 1000)
+        combo = self.decomposer.search(a * b + 5, max_depth=0)
+        assert combo is not None and combo.value == a * b + 5
+        assert combo.cost <= state[a].cost + state[b].cost + state[5].cost
+        combo = self.decomposer.search(49**7 - 1, max_depth=0)
+        assert combo is not None and combo.cost <= 5
+
+        # Deeper levels only replace an expression with a cheaper one
+        target = 1_234_567_890
+        costs = [self.decomposer.search(target, time_budget=2, max_depth=d) for d in range(3)]
+        assert costs[0] is None
+        assert costs[1] is not None and costs[2] is not None and costs[2].cost <= costs[1].cost
+
+    def test_operations(self) -> None:
+        # Without subtraction, remainders can only be added (and every value is a multiple of 3)
+        decomposer = Decomposer(run_model(3, max_value=500, max_cost=6, ops=("+", "*")))
+        combo = decomposer.search(3 * 10**7 + 3, time_budget=0)
+        assert combo is not None and "-" not in combo.expr_full and "^" not in combo.expr_full
+
+        # Without products or powers, nothing beyond the table can be found
+        assert Decomposer(run_model(3, max_value=100, max_cost=4, ops=("+", "-"))).search(10**6) is None
+
+    def test_errors(self) -> None:
+        for target in [0, -5, True]:
+            with self.assertRaises(expected_exception=ValueError):
+                self.decomposer.search(target)
+        with self.assertRaises(expected_exception=ValueError):
+            Decomposer(onedigit.Model(digit=7))
+
+    def test_cli(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "model.json")
+            with open(filename, mode="w", encoding="utf-8") as fp:
+                json.dump(self.model.asdict(), fp)
+            assert onedigit.cli.decompose(filename, digit=7, values="987654321012,77777", time_budget=0.2)
+
+            store = os.path.join(tmpdir, "model.sqlite")
+            with onedigit.ModelStore(store) as s:
+                s.write(self.model)
+            assert onedigit.cli.decompose(store, digit=7, values="10000000000007")
+
+            assert not onedigit.cli.decompose(store, digit=4, values="100")
+            assert not onedigit.cli.decompose(filename, digit=7, values="-3")
+            assert not onedigit.cli.decompose(os.path.join(tmpdir, "none.json"), digit=7, values="100")
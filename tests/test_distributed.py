@@ -0,0 +1,145 @@
+import socket
+import socketserver
+import threading
+import time
+import unittest
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.distributed import WorkerServer, _Connection, recv_message
+
+
+@contextmanager
+def workers(count: int) -> Iterator[list[str]]:
+    # Start workers on localhost, on ports picked by the system
+    servers = [WorkerServer("127.0.0.1", 0) for _ in range(count)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield [f"127.0.0.1:{server.server_address[1]}" for server in servers]
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+class _FailingHandler(socketserver.BaseRequestHandler):
+    # Drop the connection after the first message
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        recv_message(sock)
+
+
+class _ExclusiveConnection(_Connection):
+    # Record requests that overlap on the same connection
+    overlaps = 0
+
+    def __init__(self, address: tuple[str, int], timeout: float, delay: float) -> None:
+        super().__init__(address, timeout)
+        self.busy = False
+        self.delay = delay
+
+    def request(self, message: dict[str, Any]) -> dict[str, Any]:
+        if self.busy:
+            _ExclusiveConnection.overlaps += 1
+        self.busy = True
+        try:
+            time.sleep(self.delay)
+            return super().request(message)
+        finally:
+            self.busy = False
+
+
+def serial_model(digit: int, max_value: int, max_cost: int, max_steps: int) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.advance(mymodel=model, max_steps=max_steps)
+    return model
+
+
+class TestDistributed(unittest.TestCase):
+    @settings(deadline=None, max_examples=10)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        count=hst.integers(min_value=1, max_value=4),
+        max_steps=hst.integers(min_value=1, max_value=4),
+    )
+    def test_distributed_matches_serial(self, digit: int, count: int, max_steps: int) -> None:
+        model1 = serial_model(digit, 200, 4, max_steps)
+
+        model2 = onedigit.Model(digit=digit)
+        model2.seed(max_value=200, max_cost=4)
+        with workers(count) as addresses:
+            onedigit.distributed.advance(mymodel=model2, workers=addresses, max_steps=max_steps)
+
+        # Identical, including the expressions picked for each value
+        assert model2.state == model1.state
+
+    def test_distributed_worker_failure(self) -> None:
+        model1 = serial_model(3, 300, 5, 4)
+
+        failing = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FailingHandler)
+        threading.Thread(target=failing.serve_forever, daemon=True).start()
+        try:
+            model2 = onedigit.Model(digit=3)
+            model2.seed(max_value=300, max_cost=5)
+            with workers(2) as addresses:
+                addresses.insert(1, f"127.0.0.1:{failing.server_address[1]}")
+                onedigit.distributed.advance(mymodel=model2, workers=addresses, max_steps=4)
+        finally:
+            failing.shutdown()
+            failing.server_close()
+
+        assert model2.state == model1.state
+
+    def test_distributed_more_failures_than_workers(self) -> None:
+        # Three ranges are retried on two workers: the slow one takes two, one after the other
+        model1 = serial_model(3, 300, 5, 3)
+
+        failing = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FailingHandler)
+        threading.Thread(target=failing.serve_forever, daemon=True).start()
+        try:
+            model2 = onedigit.Model(digit=3)
+            model2.seed(max_value=300, max_cost=5)
+            with workers(2) as addresses:
+                addresses = [f"127.0.0.1:{failing.server_address[1]}"] * 3 + addresses
+                with onedigit.distributed.Coordinator(addresses) as coordinator:
+                    delays = [0.0, 0.0, 0.0, 0.05, 0.0]
+                    coordinator.connections = [
+                        _ExclusiveConnection(conn.address, conn.timeout, delay)
+                        for conn, delay in zip(coordinator.connections, delays)
+                    ]
+                    for _ in range(3):
+                        coordinator.simulate(model2)
+        finally:
+            failing.shutdown()
+            failing.server_close()
+
+        assert _ExclusiveConnection.overlaps == 0
+        assert model2.state == model1.state
+
+    def test_distributed_no_workers_left(self) -> None:
+        # With every worker down, rounds run locally
+        model1 = serial_model(7, 100, 4, 3)
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        model2 = onedigit.Model(digit=7)
+        model2.seed(max_value=100, max_cost=4)
+        onedigit.distributed.advance(mymodel=model2, workers=[f"127.0.0.1:{port}"], max_steps=3)
+
+        assert model2.state == model1.state
+
+    def test_calculate_with_workers(self) -> None:
+        with workers(2) as addresses:
+            model = onedigit.calculate(digit=5, max_value=100, max_cost=3, max_steps=3, workers=addresses)
+
+        assert model is not None
+        assert model.state == serial_model(5, 100, 3, 3).state
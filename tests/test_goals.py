@@ -0,0 +1,87 @@
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+class TestParseGoal(unittest.TestCase):
+    def test_parse(self) -> None:
+        assert onedigit.goals.parse_goal("coverage") == 0
+        assert onedigit.goals.parse_goal(" cost <= 4 ") == 4
+
+    def test_parse_bad(self) -> None:
+        for text in ["", "cost<=0", "cost<4", "all"]:
+            with self.assertRaises(expected_exception=ValueError):
+                onedigit.goals.parse_goal(text)
+
+
+class TestGoals(unittest.TestCase):
+    def test_coverage(self) -> None:
+        model = onedigit.Model(digit=2)
+        model.seed(max_value=100, max_cost=8)
+        onedigit.advance(mymodel=model, max_steps=20, goal="coverage")
+
+        assert model.stats.stop_reason == "goal"
+        assert set(model.state) == set(range(1, 101))
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9), cost=hst.integers(min_value=1, max_value=5))
+    def test_cost(self, digit: int, cost: int) -> None:
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=40, max_cost=7)
+        onedigit.advance(mymodel=model, max_steps=20, goal=f"cost<={cost}")
+
+        reached = all(v in model.state and model.state[v].cost <= cost for v in range(1, 41))
+        assert reached == (model.stats.stop_reason == "goal")
+
+    def test_reached_before(self) -> None:
+        model = onedigit.Model(digit=1)
+        model.seed(max_value=1, max_cost=1)
+        onedigit.advance(mymodel=model, max_steps=20, goal="coverage")
+
+        assert model.stats.stop_reason == "goal"
+        assert model.stats.rounds == 0
+
+    def test_bad_goal(self) -> None:
+        model = onedigit.Model(digit=1)
+        model.seed(max_value=10, max_cost=2)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.advance(mymodel=model, goal="everything")
+
+
+class TestFixpointCertificate(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=300),
+        max_cost=hst.integers(min_value=1, max_value=5),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_sound(self, digit: int, max_value: int, max_cost: int, ops: set[str]) -> None:
+        # Whenever the certificate holds, a full round finds nothing
+        model = onedigit.Model(digit=digit, ops=tuple(ops))
+        model.seed(max_value=max_value, max_cost=max_cost)
+        for _ in range(20):
+            changed = [found.combo for found in model.simulate_iter()]
+            if onedigit.goals.fixpoint_certificate(model, changed):
+                assert model.simulate() == 0
+                break
+            assert changed
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9), engine=hst.sampled_from(onedigit.model.ENGINES))
+    def test_saves_a_round(self, digit: int, engine: str) -> None:
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=500, max_cost=5)
+        model2 = model1.copy()
+        rounds = 0
+        while model1.simulate(engine="pairs"):
+            rounds += 1
+        onedigit.advance(mymodel=model2, max_steps=20, engine=engine)
+
+        assert model2.stats.stop_reason == "converged"
+        assert model2.stats.certified
+        assert model2.stats.rounds <= rounds
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
@@ -0,0 +1,63 @@
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+class TestBitsets(unittest.TestCase):
+    @given(values=hst.sets(hst.integers(min_value=0, max_value=5000)))
+    def test_bitset_roundtrip(self, values: set[int]) -> None:
+        bits = onedigit.kernels.to_bits(list(values))
+
+        assert bits == sum(1 << v for v in values)
+        assert list(onedigit.kernels.members(bits)) == sorted(values, reverse=True)
+
+    @given(n=hst.integers(min_value=1, max_value=20000))
+    def test_divisors(self, n: int) -> None:
+        spf = onedigit.kernels.smallest_factors(20000)
+
+        assert sorted(onedigit.kernels.divisors(n, spf)) == [d for d in range(1, n + 1) if n % d == 0]
+        assert spf[n] == min([p for p in range(2, n + 1) if n % p == 0], default=n)
+
+
+class TestKernels(unittest.TestCase):
+    @settings(deadline=None, max_examples=30)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=800),
+        max_cost=hst.integers(min_value=1, max_value=5),
+    )
+    def test_kernels_match_pairs(self, digit: int, max_value: int, max_cost: int) -> None:
+        # Every round reaches the same costs as the reference engine
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=max_value, max_cost=max_cost)
+        model2 = model1.copy()
+
+        for _ in range(6):
+            updates1 = model1.simulate()
+            updates2 = model2.simulate(engine="kernels")
+            assert (updates1 == 0) == (updates2 == 0)
+            assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_kernels_expressions(self, digit: int) -> None:
+        # Expressions built from the bitsets evaluate to their values
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=300, max_cost=4)
+        for _ in range(3):
+            known = sorted(model.state.values(), key=lambda c: c.value)
+            buffer = onedigit.RoundBuffer(model)
+            onedigit.kernels.run_kernels(model, known, buffer)
+            model.apply_round(buffer)
+
+        for combo in model.get_valid_combos():
+            assert combo.cost == combo.expr_full.count(str(digit))
+            assert eval(combo.expr_full) == combo.value
+
+    def test_unknown_engine(self) -> None:
+        model = onedigit.Model(digit=4)
+        model.seed(max_value=99, max_cost=3)
+        with self.assertRaises(expected_exception=ValueError):
+            model.simulate(engine="nope")
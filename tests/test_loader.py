@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.loader import SnapshotReader
+
+INPUTS = os.path.join(os.path.dirname(__file__), "inputs")
+
+
+def build_model(digit: int) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=300, max_cost=4)
+    onedigit.advance(mymodel=model, max_steps=2)
+    return model
+
+
+class TestLoader(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(digit=hst.integers(min_value=1, max_value=9), chunk_size=hst.integers(min_value=1, max_value=200))
+    def test_reader_chunks(self, digit: int, chunk_size: int) -> None:
+        # The document is decoded the same way, no matter where chunks end
+        model = build_model(digit)
+        text = json.dumps(model.asdict(), indent=2)
+
+        reader = SnapshotReader(io.StringIO(text), chunk_size=chunk_size)
+        header = reader.read_header()
+        combos = list(reader.combinations())
+
+        assert header == {"digit": digit, "max_cost": 4, "max_value": 300, "ops": list(onedigit.operators.ALL_OPS)}
+        assert combos == model.asdict()["combinations"]
+
+    @settings(deadline=None, max_examples=20)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_load_model(self, digit: int) -> None:
+        model1 = build_model(digit)
+        model2 = onedigit.load_model(io.StringIO(json.dumps(model1.asdict())), digit=digit)
+
+        assert model2.digit == digit
+        assert model2.max_value == model1.max_value
+        assert model2.max_cost == model1.max_cost
+        assert model2.state == model1.state
+
+    def test_load_model_limits(self) -> None:
+        model1 = build_model(3)
+        text = json.dumps(model1.asdict())
+
+        model2 = onedigit.load_model(io.StringIO(text), max_value=50, max_cost=3, batch_size=7)
+        assert model2.max_value == 50
+        assert model2.max_cost == 3
+        assert model2.state == {v: c for v, c in model1.state.items() if v <= 50 and c.cost <= 3}
+
+    def test_load_model_key_order(self) -> None:
+        # Model keys can follow the combinations
+        model1 = build_model(5)
+        model_dict = model1.asdict()
+        reordered = {"combinations": model_dict["combinations"], "digit": 5, "max_cost": 4, "max_value": 300}
+
+        model2 = onedigit.load_model(io.StringIO(json.dumps(reordered)), max_value=100)
+        assert model2.digit == 5
+        assert model2.state == {v: c for v, c in model1.state.items() if v <= 100}
+
+        # Operations after the combinations are not missed, even when reading could stop early
+        model1 = onedigit.Model(digit=5, ops=("+", "*"))
+        model1.seed(max_value=300, max_cost=4)
+        onedigit.advance(mymodel=model1, max_steps=2)
+        model_dict = model1.asdict()
+        ops_last = {k: v for k, v in model_dict.items() if k != "ops"} | {"ops": model_dict["ops"]}
+        assert list(ops_last)[-2:] == ["combinations", "ops"]
+
+        model2 = onedigit.load_model(io.StringIO(json.dumps(ops_last)), max_value=100, batch_size=7)
+        assert model2.ops == ("+", "*")
+        assert model2.state == {v: c for v, c in model1.state.items() if v <= 100}
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.load_model(io.StringIO(json.dumps(ops_last)), max_value=100, ops=("+", "-"), batch_size=7)
+
+        # Verifying and merging need the operations first
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.verify.verify_snapshot(io.StringIO(json.dumps(ops_last)), processes=1)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.merge_snapshots([io.StringIO(json.dumps(ops_last))], io.StringIO())
+
+    def test_load_model_files(self) -> None:
+        for digit in [2, 3]:
+            filename = os.path.join(INPUTS, f"simple_model_{digit}.json")
+            with open(filename, encoding="utf-8") as fp:
+                model1 = onedigit.Model.fromdict(json.load(fp))
+            with open(filename, encoding="utf-8") as fp:
+                model2 = onedigit.load_model(fp)
+
+            assert model2.digit == model1.digit
+            assert model2.state == model1.state
+
+    def test_load_model_bad_input(self) -> None:
+        model_dict = build_model(4).asdict()
+
+        # Wrong digit
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.load_model(io.StringIO(json.dumps(model_dict)), digit=5)
+
+        # Bad combination
+        bad = dict(model_dict, combinations=model_dict["combinations"] + [{"value": "7", "cost": 1}])
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.load_model(io.StringIO(json.dumps(bad)))
+
+        # Missing keys
+        for key in ["digit", "max_value", "max_cost", "combinations"]:
+            partial = {k: v for k, v in model_dict.items() if k != key}
+            with self.assertRaises(expected_exception=ValueError):
+                onedigit.load_model(io.StringIO(json.dumps(partial)))
+
+        # Truncated document
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.load_model(io.StringIO(json.dumps(model_dict)[:-20]))
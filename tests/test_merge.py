@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def build_model(digit: int, max_value: int, max_cost: int, steps: int) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.advance(mymodel=model, max_steps=steps)
+    return model
+
+
+class TestMergeSnapshots(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        params=hst.lists(
+            hst.tuples(
+                hst.integers(min_value=10, max_value=400),
+                hst.integers(min_value=1, max_value=4),
+                hst.integers(min_value=0, max_value=3),
+            ),
+            min_size=1,
+            max_size=4,
+        ),
+    )
+    def test_merge_matches_state_merge(self, digit: int, params: list[tuple[int, int, int]]) -> None:
+        models = [build_model(digit, *p) for p in params]
+
+        # Same result as merging the models in memory
+        expected = onedigit.Model(digit=digit)
+        expected.max_value = max(m.max_value for m in models)
+        expected.max_cost = max(m.max_cost for m in models)
+        for model in models:
+            expected.state_merge(model)
+
+        output = io.StringIO()
+        count = onedigit.merge_snapshots([io.StringIO(json.dumps(m.asdict())) for m in models], output)
+        merged = json.loads(output.getvalue())
+
+        assert count == len(expected.state)
+        assert merged == expected.asdict()
+
+    def test_merge_mismatched_digits(self) -> None:
+        model1, model2 = build_model(3, 100, 3, 1), build_model(4, 100, 3, 1)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.merge_snapshots(
+                [io.StringIO(json.dumps(model1.asdict())), io.StringIO(json.dumps(model2.asdict()))], io.StringIO()
+            )
+
+    def test_merge_unsorted(self) -> None:
+        data = build_model(3, 100, 3, 1).asdict()
+        data["combinations"].reverse()
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.merge_snapshots([io.StringIO(json.dumps(data))], io.StringIO())
+
+    def test_merge_command(self) -> None:
+        model1, model2 = build_model(6, 200, 3, 2), build_model(6, 300, 4, 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            names = []
+            for i, model in enumerate([model1, model2]):
+                names.append(os.path.join(tmp, f"model{i}.json"))
+                with open(names[-1], mode="w", encoding="utf-8") as fp:
+                    json.dump(model.asdict(), fp)
+
+            output = os.path.join(tmp, "merged.json")
+            assert onedigit.cli.merge(*names, output=output)
+            with open(output, encoding="utf-8") as fp:
+                merged = onedigit.load_model(fp, digit=6)
+            assert merged.max_value == 300
+            assert merged.max_cost == 4
+            assert set(merged.state) == set(model1.state) | set(model2.state)
+
+            # A failed merge leaves no output behind
+            other = os.path.join(tmp, "other.json")
+            assert not onedigit.cli.merge(*names, os.path.join(tmp, "missing.json"), output=other)
+            assert not os.path.exists(other)
+            assert not os.path.exists(other + ".partial")
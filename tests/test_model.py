@@ -159,6 +159,38 @@ class Test_Model(unittest.TestCase):
             assert val in model2.state
             assert val == model2.state[val].value
 
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_model_snapshot(self, digit: int) -> None:
+        # A snapshot shares the state, until the model changes
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=99, max_cost=4)
+        model2 = model1.snapshot()
+
+        self.check_model(model2, digit)
+        assert model2.state is model1.state
+        assert model2.max_value == model1.max_value
+        assert model2.max_cost == model1.max_cost
+
+        # Changes to the model are not seen by the snapshot
+        before = dict(model2.state)
+        combo1 = model1.state[digit]
+        assert model1.state_update(combo1.binary_operation(combo1, "+"))
+        assert (digit + digit) in model1.state
+        assert model2.state == before
+
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_model_snapshot_simulate(self, digit: int) -> None:
+        # A snapshot keeps its view while the simulation advances
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=99, max_cost=4)
+        model2 = model1.snapshot()
+        before = dict(model2.state)
+
+        onedigit.advance(mymodel=model1, max_steps=2)
+
+        assert len(model1.state) > len(before)
+        assert model2.state == before
+
     # For serialization
     @given(digit=hst.integers(min_value=1, max_value=9))
     def test_model_to_dictionary(self, digit: int) -> None:
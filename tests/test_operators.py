@@ -0,0 +1,109 @@
+import io
+import json
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+# Operations that show in the simplified expressions of each operation
+MARKERS = {"+": " + ", "-": " - ", "*": " * ", "/": " / ", "^": " ^ ", "!": "!", "sqrt": "√"}
+
+
+class TestParseOps(unittest.TestCase):
+    def test_parse_ops(self) -> None:
+        assert onedigit.parse_ops("") == onedigit.operators.ALL_OPS
+        assert onedigit.parse_ops("+-*/") == ("+", "-", "*", "/")
+        assert onedigit.parse_ops("/ * - +") == ("+", "-", "*", "/")
+        assert onedigit.parse_ops("^,sqrt,!") == ("!", "sqrt", "^")
+        assert onedigit.parse_ops("√+") == ("sqrt", "+")
+
+    def test_parse_ops_bad(self) -> None:
+        for text in ["+%", "add", "+-x"]:
+            with self.assertRaises(expected_exception=ValueError):
+                onedigit.parse_ops(text)
+
+    def test_unknown_op(self) -> None:
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.Model(digit=3, ops=("+", "mod"))
+
+
+class TestModelOps(unittest.TestCase):
+    @settings(deadline=None, max_examples=30)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+        engine=hst.sampled_from(onedigit.model.ENGINES),
+    )
+    def test_disabled_ops_unused(self, digit: int, ops: set[str], engine: str) -> None:
+        model = onedigit.Model(digit=digit, ops=tuple(ops))
+        model.seed(max_value=300, max_cost=4)
+        onedigit.advance(mymodel=model, max_steps=4, engine=engine)
+
+        for combo in model.get_valid_combos():
+            for op, marker in MARKERS.items():
+                if op not in ops:
+                    assert marker not in combo.expr_simple
+
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_engines_match(self, digit: int, ops: set[str]) -> None:
+        model1 = onedigit.Model(digit=digit, ops=tuple(ops))
+        model1.seed(max_value=200, max_cost=4)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=10)
+        onedigit.advance(mymodel=model2, max_steps=10, engine="kernels")
+
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_templates_match(self, digit: int) -> None:
+        model1 = onedigit.Model(digit=digit, ops=onedigit.parse_ops("+-*/"))
+        model1.seed(max_value=300, max_cost=4)
+        onedigit.advance(mymodel=model1, max_steps=10)
+
+        model2 = onedigit.calculate_all(max_value=300, max_cost=4, ops="+-*/")[digit]
+
+        assert model2.ops == model1.ops
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+
+class TestSnapshotOps(unittest.TestCase):
+    def test_snapshot_ops(self) -> None:
+        model1 = onedigit.Model(digit=5, ops=("+", "*"))
+        model1.seed(max_value=99, max_cost=3)
+        onedigit.advance(mymodel=model1, max_steps=2)
+
+        data = model1.asdict()
+        assert data["ops"] == ["+", "*"]
+        assert onedigit.Model.fromdict(data).ops == ("+", "*")
+        assert model1.copy().ops == model1.snapshot().ops == ("+", "*")
+
+        # Dictionaries from before operations could be selected use all of them
+        del data["ops"]
+        assert onedigit.Model.fromdict(data).ops == onedigit.operators.ALL_OPS
+
+    def test_mismatched_ops(self) -> None:
+        model1 = onedigit.Model(digit=5, ops=("+", "*"))
+        model1.seed(max_value=99, max_cost=3)
+        model2 = onedigit.Model(digit=5)
+        model2.seed(max_value=99, max_cost=3)
+
+        with self.assertRaises(expected_exception=ValueError):
+            model2.state_merge(model1)
+
+        text = json.dumps(model1.asdict())
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.load_model(io.StringIO(text), ops=onedigit.operators.ALL_OPS)
+        assert onedigit.load_model(io.StringIO(text), ops=("*", "+")).ops == ("+", "*")
+        assert onedigit.load_model(io.StringIO(text)).ops == ("+", "*")
+
+        # A model using other operations is not used as input
+        model3 = onedigit.get_model(digit=5, max_value=99, max_cost=3, input_json=text)
+        assert model3 is not None
+        assert model3.ops == onedigit.operators.ALL_OPS
@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.plan import Calibration, format_seconds, plan_run, round_pairs
+
+
+class TestPlan(unittest.TestCase):
+    def test_round_pairs(self) -> None:
+        # Every round visits the pairs of the combinations it starts with
+        assert round_pairs([2, 10, 10], "pairs") == 3 + 55
+        # 'propagate' settles the final combinations in one pass
+        assert round_pairs([2, 10, 10], "propagate") == 55
+        assert round_pairs([], "pairs") == 0
+
+    @settings(deadline=None, max_examples=10)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_cost=hst.integers(min_value=2, max_value=6),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_pilot(self, digit: int, max_cost: int, ops: set[str]) -> None:
+        # Without scaling, the pilot is the simulation itself
+        sizes = onedigit.plan.pilot(digit, max_value=300, max_cost=max_cost, max_steps=20, ops=tuple(ops))
+        model = onedigit.Model(digit=digit, ops=tuple(ops))
+        model.seed(max_value=300, max_cost=max_cost)
+        onedigit.advance(mymodel=model, max_steps=20, engine="specialized")
+        assert sizes[0] <= sizes[-1] == len(model.state)
+        assert sizes == sorted(sizes)
+
+    def test_plan(self) -> None:
+        plan = plan_run(7, max_value=20_000, max_cost=9, max_steps=10)
+        assert plan.engine == plan.estimates[0].engine
+        assert [e.seconds for e in plan.estimates] == sorted(e.seconds for e in plan.estimates)
+        assert 10_000 <= plan.combinations <= 20_000
+        assert not plan.notes
+        assert "<- selected" in plan.describe()
+
+        # Larger runs take longer
+        larger = plan_run(7, max_value=100_000, max_cost=9, max_steps=10)
+        times = {e.engine: e.seconds for e in plan.estimates}
+        assert all(e.seconds > times[e.engine] for e in larger.estimates)
+
+        # Budgets that will be hit are reported
+        tight = plan_run(7, max_value=100_000, max_cost=9, max_steps=10, time_budget=0.001, max_memory=0.5)
+        assert len(tight.notes) == 2
+
+        with self.assertRaises(expected_exception=ValueError):
+            plan_run(7, max_value=100, max_cost=3, max_steps=0)
+
+    def test_calibration(self) -> None:
+        default = Calibration.default()
+        assert set(default.engines) == set(onedigit.plan.MEASURED_ENGINES)
+        again = Calibration.load(io.StringIO(json.dumps(default.asdict())), source="copy")
+        assert again.engines == default.engines and again.source == "copy"
+
+        # Engines left out of the calibration are not planned for
+        only = Calibration.fromdict({"engines": {"specialized": default.asdict()["engines"]["specialized"]}})
+        plan = plan_run(3, max_value=500, max_cost=5, max_steps=5, calibration=only)
+        assert [e.engine for e in plan.estimates] == ["specialized"]
+
+        # Engines the planner does not estimate leave nothing to choose from
+        threads = Calibration.fromdict({"engines": {"threads": default.asdict()["engines"]["pairs"]}})
+        with self.assertRaises(expected_exception=ValueError):
+            plan_run(3, max_value=500, max_cost=5, max_steps=5, calibration=threads)
+
+        for bad in ["[]", "{}", '{"engines": {"fast": {}}}', '{"engines": {"pairs": {"coefficient": 1}}}', "nope"]:
+            with self.assertRaises(expected_exception=ValueError):
+                Calibration.load(io.StringIO(bad))
+
+    def test_format_seconds(self) -> None:
+        assert format_seconds(0.25) == "0.25 s"
+        assert format_seconds(90) == "1.5 min"
+        assert format_seconds(3 * 86400) == "3.0 days"
+
+    def test_cli(self) -> None:
+        assert onedigit.main(7, max_value=2000, max_cost=6, dry_run=True)
+        assert onedigit.main(7, max_value=500, max_cost=5, engine="auto")
+        assert not onedigit.main(7, max_value=500, max_cost=5, engine="fastest")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "calibration.json")
+            with open(filename, mode="w", encoding="utf-8") as fp:
+                json.dump(Calibration.default().asdict(), fp)
+            assert onedigit.main(7, max_value=500, max_cost=5, dry_run=True, calibration=filename)
+            assert not onedigit.main(7, max_value=500, max_cost=5, dry_run=True, calibration=tmpdir + "/none.json")
+            with open(filename, mode="w", encoding="utf-8") as fp:
+                json.dump({"engines": {"threads": Calibration.default().asdict()["engines"]["pairs"]}}, fp)
+            assert not onedigit.main(7, max_value=500, max_cost=5, engine="auto", calibration=filename)
@@ -0,0 +1,83 @@
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def naive_round(model: onedigit.Model) -> list[onedigit.Improvement]:
+    # Every operation on every pair, as rounds ran before the index
+    unary_ops, ordered_ops, unordered_ops = onedigit.operators.split_ops(model.ops)
+    known = sorted(model.state.values(), key=lambda c: c.value)
+    buffer = onedigit.RoundBuffer(model)
+    found = []
+    for combo1 in known:
+        candidates = [combo1.unary_operation(op=op) for op in unary_ops]
+        for combo2 in known:
+            if combo1.value >= combo2.value:
+                candidates += [combo1.binary_operation(combo2, op) for op in ordered_ops]
+            candidates += [combo1.binary_operation(combo2, op) for op in unordered_ops]
+        found += [f for f in map(buffer.offer, candidates) if f is not None]
+    model.apply_round(buffer)
+    return found
+
+
+class TestPowerIndex(unittest.TestCase):
+    @given(max_value=hst.integers(min_value=1, max_value=100_000), base=hst.integers(min_value=1, max_value=400))
+    def test_max_exponent(self, max_value: int, base: int) -> None:
+        index = onedigit.powers.PowerIndex(max_value)
+        exponents = [e for e in range(1, onedigit.powers.MAX_EXPONENT + 1) if base**e <= max_value]
+        assert index.max_exponent(base) == max(exponents, default=0)
+
+    @given(max_value=hst.integers(min_value=1, max_value=100_000), value=hst.integers(min_value=1, max_value=200_000))
+    def test_unary(self, max_value: int, value: int) -> None:
+        index = onedigit.powers.PowerIndex(max_value)
+        combo = onedigit.Combo(value=value, cost=1)
+        for op in ["!", "sqrt"]:
+            assert index.unary_in_range(op, value) == (1 <= combo.unary_operation(op=op).value <= max_value)
+
+
+class TestIndexedRounds(unittest.TestCase):
+    @settings(deadline=None, max_examples=25)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=1000),
+        max_cost=hst.integers(min_value=1, max_value=4),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_same_rounds(self, digit: int, max_value: int, max_cost: int, ops: set[str]) -> None:
+        model1 = onedigit.Model(digit=digit, ops=tuple(ops))
+        model1.seed(max_value=max_value, max_cost=max_cost)
+        model2 = model1.copy()
+
+        for _ in range(6):
+            found1 = naive_round(model1)
+            found2 = list(model2.simulate_iter())
+            assert found1 == found2
+            if not found1:
+                break
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_same_by_cost(self, digit: int) -> None:
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=500, max_cost=4)
+        model2 = model1.copy()
+        while model1.simulate():
+            pass
+        while model2.simulate(deadline=time.monotonic() + 600):
+            pass
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+    def test_fewer_pairs(self) -> None:
+        # Exponentiation no longer visits every pair, in both orders
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=5000, max_cost=6)
+        for _ in range(3):
+            model.simulate()
+        known = len(model.state)
+        pairs = model.stats.pairs
+        model.simulate()
+        assert model.stats.pairs - pairs < 0.6 * known * known
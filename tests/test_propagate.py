@@ -0,0 +1,83 @@
+import re
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def reference_costs(mymodel: onedigit.Model) -> dict[int, int]:
+    model = mymodel.copy()
+    onedigit.advance(mymodel=model, max_steps=50)
+    assert model.stats.stop_reason == "converged"
+    return {v: c.cost for v, c in model.state.items()}
+
+
+class TestPropagate(unittest.TestCase):
+    @settings(deadline=None, max_examples=25)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=300),
+        max_cost=hst.integers(min_value=1, max_value=4),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_matches_fixpoint(self, digit: int, max_value: int, max_cost: int, ops: set[str]) -> None:
+        model = onedigit.Model(digit=digit, ops=tuple(ops))
+        model.seed(max_value=max_value, max_cost=max_cost)
+        expected = reference_costs(model)
+
+        onedigit.propagate.propagate(model)
+        assert {v: c.cost for v, c in model.state.items()} == expected
+
+        # Expressions are built from the digit, as many times as the cost
+        for combo in model.state.values():
+            assert len(re.findall(str(digit), combo.expr_full)) == combo.cost
+
+    def test_advance_converges(self) -> None:
+        model = onedigit.Model(digit=7)
+        model.seed(max_value=1000, max_cost=6)
+        expected = reference_costs(model)
+
+        onedigit.advance(mymodel=model, max_steps=50, engine="propagate")
+        assert model.stats.stop_reason == "converged"
+        assert model.stats.certified
+        assert model.stats.rounds == 1
+        assert {v: c.cost for v, c in model.state.items()} == expected
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_improve(self, digit: int) -> None:
+        # Cheaper combinations found with a larger range reach the values derived from them
+        small = onedigit.Model(digit=digit)
+        small.seed(max_value=300, max_cost=5)
+        large = onedigit.Model(digit=digit)
+        large.seed(max_value=3000, max_cost=5)
+        onedigit.propagate.propagate(large)
+
+        propagator = onedigit.Propagator(small)
+        assert propagator.run()
+        for value, combo in large.state.items():
+            if value <= 300:
+                propagator.improve(combo)
+        assert propagator.run()
+
+        expected = small.copy()
+        expected.state = {v: c for v, c in large.state.items() if v <= 300}
+        onedigit.advance(mymodel=expected, max_steps=50)
+
+        assert {v: c.cost for v, c in propagator.results().items()} == {v: c.cost for v, c in expected.state.items()}
+
+    def test_deadline(self) -> None:
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=20_000, max_cost=7)
+        seeded = len(model.state)
+        updates = model.simulate(deadline=time.monotonic(), engine="propagate")
+
+        assert not model.stats.complete
+        # Whatever was found is valid
+        assert updates == len(model.state) - seeded
+        for value, combo in model.state.items():
+            assert value == combo.value
+            assert combo.cost <= 7
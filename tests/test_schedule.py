@@ -0,0 +1,62 @@
+import math
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def reference_costs(digit: int, max_value: int, max_cost: int) -> dict[int, int]:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.advance(mymodel=model, max_steps=50)
+    assert model.stats.stop_reason == "converged"
+    return {v: c.cost for v, c in model.state.items()}
+
+
+class TestYield(unittest.TestCase):
+    def test_rate(self) -> None:
+        assert onedigit.schedule.Yield().rate() == math.inf
+        assert onedigit.schedule.Yield(pairs=20_000, improvements=3).rate() == 1.5
+
+
+class TestAdaptive(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=300),
+        max_cost=hst.integers(min_value=1, max_value=4),
+    )
+    def test_adaptive_matches(self, digit: int, max_value: int, max_cost: int) -> None:
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=max_value, max_cost=max_cost)
+        onedigit.advance(mymodel=model, max_steps=50, adaptive=True)
+
+        assert model.stats.stop_reason == "converged"
+        assert {v: c.cost for v, c in model.state.items()} == reference_costs(digit, max_value, max_cost)
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9), engine=hst.sampled_from(onedigit.model.ENGINES))
+    def test_verification(self, digit: int, engine: str) -> None:
+        # Skip every operation after its first run, so only full rounds find the rest
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=400, max_cost=5)
+        scheduler = onedigit.AdaptiveScheduler(model, min_yield=math.inf, min_pairs=0, engine=engine)
+        for _ in range(50):
+            if not scheduler.simulate():
+                break
+
+        assert scheduler.verifications >= 1
+        assert {v: c.cost for v, c in model.state.items()} == reference_costs(digit, 400, 5)
+
+    def test_fewer_pairs(self) -> None:
+        # Late rounds only revisit pairs with an operand that changed
+        model1 = onedigit.Model(digit=4)
+        model1.seed(max_value=500, max_cost=5)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=50)
+        onedigit.advance(mymodel=model2, max_steps=50, adaptive=True)
+
+        assert model2.stats.pairs < model1.stats.pairs
+        assert model1.state.keys() == model2.state.keys()
@@ -0,0 +1,132 @@
+import json
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.shards import ShardedRound, split_values
+
+
+def run_shards(mymodel: onedigit.Model, threads: int, shards: int = 0, deadline: float = 0.0) -> tuple[int, bool]:
+    known = sorted(mymodel.state.values(), key=lambda c: c.value)
+    buffer = onedigit.RoundBuffer(mymodel)
+    improvements = onedigit.shards.iter_shards(
+        mymodel, known, buffer, threads=threads, shards=shards, deadline=deadline
+    )
+    updates = 0
+    while True:
+        try:
+            next(improvements)
+            updates += 1
+        except StopIteration as stop:
+            mymodel.apply_round(buffer)
+            return updates, bool(stop.value)
+
+
+def grown_model(digit: int = 3, max_value: int = 5000, max_cost: int = 7, rounds: int = 3) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    for _ in range(rounds):
+        model.simulate(engine="specialized")
+    return model
+
+
+class TestShards(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=1000),
+        max_cost=hst.integers(min_value=1, max_value=5),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+        threads=hst.integers(min_value=1, max_value=4),
+        shards=hst.integers(min_value=1, max_value=50),
+    )
+    def test_identical_rounds(
+        self, digit: int, max_value: int, max_cost: int, ops: set[str], threads: int, shards: int
+    ) -> None:
+        # Expressions kept on ties are the same too
+        model1 = onedigit.Model(digit=digit, ops=tuple(ops))
+        model1.seed(max_value=max_value, max_cost=max_cost)
+        model2 = model1.copy()
+
+        for _ in range(10):
+            model1.simulate(engine="pairs")
+            _, complete = run_shards(model2, threads, shards)
+            assert complete
+            assert model1.asdict() == model2.asdict()
+
+    def test_engine(self) -> None:
+        model1 = onedigit.Model(digit=4)
+        model1.seed(max_value=500, max_cost=4)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=20)
+        onedigit.advance(mymodel=model2, max_steps=20, engine="shards")
+
+        assert model1.asdict() == model2.asdict()
+        assert model2.stats.stop_reason == "converged"
+
+    def test_deadline(self) -> None:
+        model = grown_model()
+        _, complete = run_shards(model, threads=2, deadline=time.monotonic())
+
+        assert not complete
+        for value, combo in model.state.items():
+            assert value == combo.value
+            assert combo.cost <= 7
+
+    def test_lost_shards(self) -> None:
+        model = grown_model()
+        known = sorted(model.state.values(), key=lambda c: c.value)
+        sharded = ShardedRound(model, known, shards=10)
+        expected = {shard: dict(sharded.run_shard(shard)) for shard in range(10)}
+
+        # Shards own their values, and are recomputed on their own
+        for shard, (low, high) in enumerate(sharded.shards):
+            assert all(low <= value <= high for value in expected[shard])
+        sharded.discard(3)
+        sharded.discard(7)
+        assert sharded.pending() == [3, 7]
+        assert list(sharded.run()) == [3, 7]
+        assert sharded.results == expected
+
+    def test_checkpoint(self) -> None:
+        model = grown_model()
+        known = sorted(model.state.values(), key=lambda c: c.value)
+        sharded = ShardedRound(model, known, shards=6)
+        for shard in (0, 2, 5):
+            sharded.run_shard(shard)
+        saved = json.loads(json.dumps(sharded.checkpoint()))
+
+        # Another process restores the finished shards, and runs the others
+        restored = ShardedRound(model, list(known), shards=6)
+        restored.restore(saved)
+        assert restored.pending() == [1, 3, 4]
+        list(restored.run())
+        full = ShardedRound(model, known, shards=6)
+        list(full.run())
+        assert restored.results == full.results
+        assert restored.pairs == full.pairs
+
+        # Checkpoints only fit the round they come from
+        model.simulate(engine="specialized")
+        later = ShardedRound(model, sorted(model.state.values(), key=lambda c: c.value), shards=6)
+        with self.assertRaises(expected_exception=ValueError):
+            later.restore(saved)
+        with self.assertRaises(expected_exception=ValueError):
+            ShardedRound(model, known, shards=5).restore(saved)
+        saved["shards"]["0"]["combinations"][0]["value"] = model.max_value + 1
+        with self.assertRaises(expected_exception=ValueError):
+            restored.restore(saved)
+        del saved["shards"]
+        with self.assertRaises(expected_exception=ValueError):
+            restored.restore(saved)
+
+    def test_split_values(self) -> None:
+        for max_value in (1, 5, 100, 1001):
+            for parts in (1, 3, 16):
+                ranges = split_values(max_value, parts)
+                covered = [v for low, high in ranges for v in range(low, high + 1)]
+                assert covered == list(range(1, max_value + 1))
+                assert len(ranges) <= parts
@@ -0,0 +1,140 @@
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+class TestAdvance(unittest.TestCase):
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_advance_stats(self, digit: int) -> None:
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=50, max_cost=4)
+        onedigit.advance(mymodel=model, max_steps=10)
+
+        assert model.stats.rounds >= 1
+        assert model.stats.pairs > 0
+        assert model.stats.complete
+        assert model.stats.stop_reason in ["converged", "max_steps"]
+
+    @settings(deadline=None)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_advance_time_budget_expired(self, digit: int) -> None:
+        # A budget that is already spent leaves the seeded model untouched
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=500, max_cost=6)
+        initial = {v: c.cost for v, c in model.state.items()}
+
+        onedigit.advance(mymodel=model, max_steps=10, time_budget=1e-9)
+
+        assert model.stats.stop_reason == "time_budget"
+        assert {v: c.cost for v, c in model.state.items()} == initial
+
+    @settings(deadline=None, max_examples=20)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_advance_time_budget_matches(self, digit: int) -> None:
+        # With enough time, the cost-ordered schedule reaches the same costs
+        model1 = onedigit.Model(digit=digit)
+        model1.seed(max_value=60, max_cost=4)
+        onedigit.advance(mymodel=model1, max_steps=20)
+
+        model2 = onedigit.Model(digit=digit)
+        model2.seed(max_value=60, max_cost=4)
+        onedigit.advance(mymodel=model2, max_steps=20, time_budget=60)
+
+        assert model2.stats.stop_reason == "converged"
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+    def test_advance_time_budget_partial(self) -> None:
+        # A round cut short still leaves valid combinations behind
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=100_000, max_cost=8)
+        start = time.monotonic()
+        onedigit.advance(mymodel=model, max_steps=20, time_budget=0.5)
+
+        assert time.monotonic() - start < 5
+        for combo in model.get_valid_combos():
+            assert 1 <= combo.value <= 100_000
+            assert combo.cost == combo.expr_full.count("3")
+
+    def test_advance_max_memory(self) -> None:
+        # A tight budget lowers the limits instead of failing
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=5000, max_cost=6)
+        onedigit.advance(mymodel=model, max_steps=4, max_memory=0.05)
+
+        assert model.stats.degradations
+        assert model.max_cost < 6 or model.max_value < 5000
+        assert model.stats.peak_memory <= 0.05 * 1024 * 1024
+        for combo in model.get_valid_combos():
+            assert combo.cost <= model.max_cost
+            assert combo.cost == combo.expr_full.count("3")
+
+    def test_advance_max_memory_generous(self) -> None:
+        # A generous budget does not change the results
+        model1 = onedigit.Model(digit=4)
+        model1.seed(max_value=200, max_cost=4)
+        onedigit.advance(mymodel=model1, max_steps=4)
+
+        model2 = onedigit.Model(digit=4)
+        model2.seed(max_value=200, max_cost=4)
+        onedigit.advance(mymodel=model2, max_steps=4, max_memory=512)
+
+        assert not model2.stats.degradations
+        assert model2.stats.peak_memory > 0
+        assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+
+class TestAdvanceIter(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        engine=hst.sampled_from(onedigit.model.ENGINES),
+        adaptive=hst.booleans(),
+    )
+    def test_replay(self, digit: int, engine: str, adaptive: bool) -> None:
+        # Applying the improvements, in order, to the initial state gives the final state
+        model = onedigit.Model(digit=digit)
+        model.seed(max_value=300, max_cost=4)
+        state = dict(model.state)
+
+        improvements = list(onedigit.advance_iter(model, max_steps=20, engine=engine, adaptive=adaptive))
+        for found in improvements:
+            assert found.value == found.combo.value
+            assert found.new_cost == found.combo.cost
+            current = state.get(found.value)
+            assert found.old_cost == (current.cost if current is not None else 0)
+            assert found.old_cost == 0 or found.new_cost < found.old_cost
+            state[found.value] = found.combo
+
+        assert model.stats.stop_reason == "converged"
+        assert model.stats.updates == len(improvements)
+        assert {v: c.cost for v, c in state.items()} == {v: c.cost for v, c in model.state.items()}
+
+    def test_same_as_advance(self) -> None:
+        model1 = onedigit.Model(digit=6)
+        model1.seed(max_value=500, max_cost=5)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=20)
+        for _ in onedigit.advance_iter(model2, max_steps=20):
+            pass
+
+        assert model1.asdict() == model2.asdict()
+        assert model1.stats.rounds == model2.stats.rounds
+        assert model1.stats.updates == model2.stats.updates
+
+    def test_interrupted(self) -> None:
+        # What was found before the caller stopped is kept
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=5000, max_cost=6)
+        improvements = onedigit.advance_iter(model, max_steps=20)
+        first = [next(improvements) for _ in range(50)]
+        improvements.close()
+
+        assert model.stats.stop_reason == "interrupted"
+        assert not model.stats.complete
+        assert model.stats.updates == 50
+        for found in first:
+            assert model.state[found.value].cost <= found.new_cost
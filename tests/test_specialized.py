@@ -0,0 +1,63 @@
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+class TestSpecialized(unittest.TestCase):
+    @settings(deadline=None, max_examples=30)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=2000),
+        max_cost=hst.integers(min_value=1, max_value=5),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_identical_rounds(self, digit: int, max_value: int, max_cost: int, ops: set[str]) -> None:
+        model1 = onedigit.Model(digit=digit, ops=tuple(ops))
+        model1.seed(max_value=max_value, max_cost=max_cost)
+        model2 = model1.copy()
+
+        # Same improvements, in the same order, round after round
+        for _ in range(10):
+            found1 = list(model1.simulate_iter(engine="pairs"))
+            found2 = list(model2.simulate_iter(engine="specialized"))
+            assert found1 == found2
+            assert model1.asdict() == model2.asdict()
+            if not found1:
+                break
+
+    def test_fewer_pairs(self) -> None:
+        model1 = onedigit.Model(digit=5)
+        model1.seed(max_value=3000, max_cost=5)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=20)
+        onedigit.advance(mymodel=model2, max_steps=20, engine="specialized")
+
+        assert model1.asdict() == model2.asdict()
+        assert model2.stats.pairs < model1.stats.pairs
+
+    def test_deadline(self) -> None:
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=20_000, max_cost=7)
+        for _ in range(3):
+            model.simulate(engine="pairs")
+        model.simulate(deadline=time.monotonic(), engine="specialized")
+
+        assert not model.stats.complete
+        for value, combo in model.state.items():
+            assert value == combo.value
+            assert combo.cost <= 7
+
+    def test_unknown_operation(self) -> None:
+        # Operations registered later have no specialized loop
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=100, max_cost=3)
+        onedigit.operators.OPERATORS["%"] = onedigit.Operator(name="%", symbol="%", arity=2)
+        try:
+            with self.assertRaises(expected_exception=ValueError):
+                list(onedigit.specialized.iter_specialized(model, [], onedigit.RoundBuffer(model), ("%",)))
+        finally:
+            del onedigit.operators.OPERATORS["%"]
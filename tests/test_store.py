@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def run_model(digit: int, max_value: int, max_cost: int, max_steps: int = 10) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.advance(mymodel=model, max_steps=max_steps)
+    return model
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "models.sqlite")
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    @settings(deadline=None, max_examples=10)
+    @given(digit=hst.integers(min_value=1, max_value=9))
+    def test_round_trip(self, digit: int) -> None:
+        model = run_model(digit, max_value=500, max_cost=4)
+        with onedigit.ModelStore(self.filename) as store:
+            store.write(model)
+            assert store.read(digit).asdict() == model.asdict()
+            assert store.header(digit)["combinations"] == len(model.state)
+
+            # Limits given to 'read' only keep part of the model
+            small = store.read(digit, max_value=100, max_cost=3)
+            assert small.max_value == 100 and small.max_cost == 3
+            assert small.state == {v: c for v, c in model.state.items() if v <= 100 and c.cost <= 3}
+
+    def test_keeps_improvements(self) -> None:
+        cheap = run_model(3, max_value=300, max_cost=5)
+        rough = run_model(3, max_value=600, max_cost=5, max_steps=1)
+
+        with onedigit.ModelStore(self.filename) as store:
+            assert store.write(cheap) == len(cheap.state)
+            store.write(rough)
+            # Writing again changes nothing
+            assert store.write(cheap) == 0
+
+            header = store.header(3)
+            assert header["max_value"] == 600 and header["max_cost"] == 5
+            for combo in store.query(3):
+                best = min(m.state[combo.value].cost for m in (cheap, rough) if combo.value in m.state)
+                assert combo.cost == best
+
+    def test_query(self) -> None:
+        model = run_model(7, max_value=1000, max_cost=5)
+        with onedigit.ModelStore(self.filename) as store:
+            store.write(model)
+            store.write(run_model(4, max_value=1000, max_cost=5))
+            assert store.digits() == [4, 7]
+
+            found = list(store.query(7, min_value=500, max_value=600, max_cost=4))
+            assert found == [c for v, c in sorted(model.state.items()) if 500 <= v <= 600 and c.cost <= 4]
+
+            missing = list(store.unreachable(7, max_cost=4))
+            assert missing == [v for v in range(1, 1001) if v not in model.state or model.state[v].cost > 4]
+
+            # The indexes are used for ranges of values and of costs
+            plan = " ".join(
+                str(row)
+                for row in store.connection.execute(
+                    "EXPLAIN QUERY PLAN SELECT value FROM combinations WHERE digit = 7 AND cost <= 2"
+                )
+            )
+            assert "combinations_cost" in plan
+
+    def test_errors(self) -> None:
+        with onedigit.ModelStore(self.filename) as store:
+            with self.assertRaises(expected_exception=ValueError):
+                store.header(5)
+            store.write(run_model(5, max_value=50, max_cost=2))
+            other = onedigit.Model(digit=5, ops=("+", "-"))
+            other.seed(max_value=50, max_cost=2)
+            with self.assertRaises(expected_exception=ValueError):
+                store.write(other)
+            with self.assertRaises(expected_exception=ValueError):
+                store.read(5, ops=("+", "-"))
+
+        text = os.path.join(self.tmpdir.name, "text.sqlite")
+        with open(text, mode="w", encoding="utf-8") as fp:
+            fp.write("not a database, " * 100)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.ModelStore(text)
+
+    def test_cli(self) -> None:
+        assert onedigit.main(6, max_value=200, max_cost=3, output_filename=self.filename)
+        assert onedigit.cli.query(self.filename, digit=6, max_value=100, max_cost=2)
+        assert onedigit.cli.query(self.filename, digit=6, unreachable=True)
+        assert not onedigit.cli.query(self.filename, digit=2)
+        assert not onedigit.cli.query(os.path.join(self.tmpdir.name, "none.sqlite"), digit=6)
+
+        # The store can continue a simulation
+        model = onedigit.get_model(digit=6, max_value=200, max_cost=4, input_filename=self.filename)
+        assert model is not None
+        with onedigit.ModelStore(self.filename) as store:
+            assert all(model.state[c.value].cost == c.cost for c in store.query(6))
+            assert sqlite3.connect(self.filename).execute("SELECT count(*) FROM models").fetchone() == (1,)
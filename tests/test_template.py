@@ -0,0 +1,47 @@
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+class TestTemplate(unittest.TestCase):
+    @settings(deadline=None, max_examples=10)
+    @given(
+        max_value=hst.integers(min_value=1, max_value=80),
+        max_cost=hst.integers(min_value=1, max_value=4),
+    )
+    def test_calculate_all_matches_advance(self, max_value: int, max_cost: int) -> None:
+        models = onedigit.calculate_all(max_value=max_value, max_cost=max_cost)
+        assert sorted(models.keys()) == list(range(1, 10))
+
+        for digit, model1 in models.items():
+            assert model1.digit == digit
+
+            # Each digit matches a model simulated until it stops changing
+            model2 = onedigit.Model(digit=digit)
+            model2.seed(max_value=max_value, max_cost=max_cost)
+            onedigit.advance(mymodel=model2, max_steps=50)
+
+            assert {v: c.cost for v, c in model1.state.items()} == {v: c.cost for v, c in model2.state.items()}
+
+    def test_calculate_all_expressions(self) -> None:
+        models = onedigit.calculate_all(max_value=200, max_cost=4)
+
+        for digit, model in models.items():
+            for combo in model.get_valid_combos():
+                assert combo.cost == combo.expr_full.count(str(digit))
+                assert "d" not in combo.expr_full
+                assert combo.expr_simple
+
+    def test_not_an_engine(self) -> None:
+        # Slower than nine runs of 'specialized', so never chosen for a run
+        assert "template" not in onedigit.model.ENGINES
+        assert "template" not in onedigit.plan.MEASURED_ENGINES
+
+    def test_calculate_all_bad_arguments(self) -> None:
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.calculate_all(max_value=0, max_cost=4)
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.calculate_all(max_value=99, max_cost=0)
@@ -0,0 +1,106 @@
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+
+
+def run_threads(mymodel: onedigit.Model, threads: int, deadline: float = 0.0) -> tuple[int, bool]:
+    known = sorted(mymodel.state.values(), key=lambda c: c.value)
+    buffer = onedigit.RoundBuffer(mymodel)
+    improvements = onedigit.threads.iter_threads(mymodel, known, buffer, threads=threads, deadline=deadline)
+    updates = 0
+    while True:
+        try:
+            next(improvements)
+            updates += 1
+        except StopIteration as stop:
+            mymodel.apply_round(buffer)
+            return updates, bool(stop.value)
+
+
+class TestThreads(unittest.TestCase):
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        max_value=hst.integers(min_value=1, max_value=1000),
+        max_cost=hst.integers(min_value=1, max_value=5),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+        threads=hst.integers(min_value=1, max_value=4),
+    )
+    def test_identical_rounds(self, digit: int, max_value: int, max_cost: int, ops: set[str], threads: int) -> None:
+        # The threads run even with the GIL enabled, only not in parallel
+        model1 = onedigit.Model(digit=digit, ops=tuple(ops))
+        model1.seed(max_value=max_value, max_cost=max_cost)
+        model2 = model1.copy()
+
+        for _ in range(10):
+            model1.simulate(engine="pairs")
+            _, complete = run_threads(model2, threads)
+            assert complete
+            assert model1.asdict() == model2.asdict()
+            assert model1.stats.pairs == model2.stats.pairs
+
+    def test_engine(self) -> None:
+        model1 = onedigit.Model(digit=4)
+        model1.seed(max_value=500, max_cost=4)
+        model2 = model1.copy()
+        onedigit.advance(mymodel=model1, max_steps=20)
+        onedigit.advance(mymodel=model2, max_steps=20, engine="threads")
+
+        assert model1.asdict() == model2.asdict()
+        assert model2.stats.stop_reason == "converged"
+
+    def test_deadline(self) -> None:
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=20_000, max_cost=7)
+        for _ in range(3):
+            model.simulate(engine="pairs")
+        _, complete = run_threads(model, threads=2, deadline=time.monotonic())
+
+        assert not complete
+        for value, combo in model.state.items():
+            assert value == combo.value
+            assert combo.cost <= 7
+
+    def test_stop_iterating(self) -> None:
+        model = onedigit.Model(digit=5)
+        model.seed(max_value=2000, max_cost=6)
+        known = sorted(model.state.values(), key=lambda c: c.value)
+        buffer = onedigit.RoundBuffer(model)
+        improvements = onedigit.threads.iter_threads(model, known, buffer, threads=2)
+        next(improvements)
+        improvements.close()
+
+        # Whatever was merged is valid
+        assert buffer.found
+        for value, combo in buffer.found.items():
+            assert value == combo.value
+
+    def test_no_copy(self) -> None:
+        # Ranges read the state through views, so the round does not copy it
+        model = onedigit.Model(digit=3)
+        model.seed(max_value=2000, max_cost=6)
+        state = model.state
+        updates, complete = run_threads(model, threads=2)
+        assert updates and complete
+        assert model.state is state
+
+        # A snapshot taken outside the round is still kept apart, and its copy counted
+        memory = model.round_memory()
+        snapshot = model.snapshot()
+        assert model.round_memory() > memory
+        before = dict(snapshot.state)
+        run_threads(model, threads=2)
+        assert model.state is not state
+        assert snapshot.state == before
+
+    def test_split_ranges(self) -> None:
+        for count in (0, 1, 5, 100, 1001):
+            for parts in (1, 3, 16):
+                ranges = onedigit.threads.split_ranges(count, parts)
+                covered = [i for start, stop in ranges for i in range(start, stop)]
+                assert covered == list(range(count))
+                assert len(ranges) <= parts
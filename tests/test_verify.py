@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from hypothesis import given, settings
+from hypothesis import strategies as hst
+
+import onedigit
+from onedigit.verify import check_row, compile_expression, evaluate
+
+
+def run_model(digit: int, max_value: int = 500, max_cost: int = 4) -> onedigit.Model:
+    model = onedigit.Model(digit=digit)
+    model.seed(max_value=max_value, max_cost=max_cost)
+    onedigit.propagate.propagate(model)
+    return model
+
+
+class TestVerify(unittest.TestCase):
+    def test_compile(self) -> None:
+        assert compile_expression("33") == ["33"]
+        assert compile_expression("(3 + 3)! / 3") == ["3", "3", "+", "!", "3", "/"]
+        assert compile_expression("√((3 * 3) + 33)") == ["3", "3", "*", "33", "+", "sqrt"]
+        assert evaluate(compile_expression("(3 + 3)! / 3")) == (240, ("/", 720, 3))
+        assert evaluate(compile_expression("√(9)!!")) == (720, ("!", 6, 0))
+
+        for expr in ["", "3 +", "3 + 3 + 3", "(3 + 3", "3 % 3", "√3", "3)"]:
+            with self.assertRaises(expected_exception=ValueError):
+                compile_expression(expr)
+        for expr in ["3 - 3", "33 / 2", "√(33)", "33!", "3 ^ 44"]:
+            with self.assertRaises(expected_exception=ValueError):
+                evaluate(compile_expression(expr))
+
+    @settings(deadline=None, max_examples=20)
+    @given(
+        digit=hst.integers(min_value=1, max_value=9),
+        ops=hst.sets(hst.sampled_from(onedigit.operators.ALL_OPS), min_size=1),
+    )
+    def test_valid_models(self, digit: int, ops: set[str]) -> None:
+        model = onedigit.Model(digit=digit, ops=tuple(ops))
+        model.seed(max_value=300, max_cost=4)
+        onedigit.advance(mymodel=model, max_steps=10)
+        assert onedigit.verify.verify_model(model, processes=1) == []
+
+    def test_problems(self) -> None:
+        ops = onedigit.operators.ALL_OPS
+        assert check_row((30, 3, "33 - 3", "33 - 3"), digit=3, max_value=100, max_cost=4, ops=ops) == ""
+        # The digit is kept above 'max_value'
+        assert check_row((3, 1, "3", "3"), digit=3, max_value=2, max_cost=4, ops=ops) == ""
+
+        problems = {
+            (31, 3, "33 - 3", "33 - 3"): "evaluates to 30",
+            (30, 2, "33 - 3", "33 - 3"): "cost is 2",
+            (30, 3, "33 - 2", "33 - 2"): "digits other than 3",
+            (30, 3, "33 -", "33 - 3"): "is not valid",
+            (30, 3, "33 - 3", "27 + 3"): "does not match",
+            (11, 3, "33 / 3", "33 / 3"): "operations the model does not",
+            (333, 3, "333", "333"): "out of range",
+            (99, 6, "(33 + 33) + 33", "66 + 33"): "above the largest cost",
+        }
+        for row, problem in problems.items():
+            assert problem in check_row(row, digit=3, max_value=100, max_cost=4, ops=("+", "-", "*", "^"))
+
+    def test_snapshot(self) -> None:
+        model = run_model(7)
+        snapshot = model.asdict()
+        assert onedigit.verify.verify_snapshot(io.StringIO(json.dumps(snapshot)), processes=1) == []
+
+        snapshot["combinations"][5]["cost"] += 1
+        snapshot["combinations"][9]["expr_full"] = "7 * 7"
+        snapshot["combinations"].append(dict(snapshot["combinations"][0]))
+        problems = onedigit.verify.verify_snapshot(io.StringIO(json.dumps(snapshot)), processes=1)
+        assert len(problems) == 3
+        assert any("more than one combination" in problem for problem in problems)
+
+        with self.assertRaises(expected_exception=ValueError):
+            onedigit.verify.verify_snapshot(io.StringIO(json.dumps({"digit": 7})))
+
+    def test_huge_results(self) -> None:
+        # Nested powers are rejected before they are computed, and only that row is reported
+        power = "9 ^ ((9 + 9) + (9 + 9))"
+        for _ in range(3):
+            power = f"({power}) ^ ((9 + 9) + (9 + 9))"
+        started = time.monotonic()
+        problem = check_row((81, 17, power, "?"), digit=9, max_value=1000, max_cost=20, ops=("+", "^"))
+        assert "out of range" in problem
+        assert time.monotonic() - started < 1
+
+        model = run_model(9, max_value=1000)
+        snapshot = model.asdict()
+        snapshot["combinations"][3].update(cost=17, expr_full=power)
+        problems = onedigit.verify.verify_snapshot(io.StringIO(json.dumps(snapshot)), processes=1)
+        assert len(problems) == 1 and "out of range" in problems[0]
+
+        with self.assertRaises(expected_exception=ValueError):
+            evaluate(compile_expression("(99 * 99) * (99 * 99)"), max_bits=20)
+
+    def test_process_pool(self) -> None:
+        model = run_model(4, max_value=3000, max_cost=5)
+        value = sorted(model.state)[-1]
+        model.state[value] = onedigit.Combo(value=value, cost=5, expr_full="44444", expr_simple="44444")
+
+        serial = onedigit.verify.verify_model(model, processes=1, batch_size=100)
+        pooled = onedigit.verify.verify_model(model, processes=2, batch_size=100)
+        assert len(serial) == 1
+        assert pooled == serial
+
+    def test_cli(self) -> None:
+        model = run_model(5)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "model.json")
+            with open(filename, mode="w", encoding="utf-8") as fp:
+                json.dump(model.asdict(), fp)
+            assert onedigit.cli.verify(filename)
+
+            store = os.path.join(tmpdir, "model.sqlite")
+            with onedigit.ModelStore(store) as s:
+                s.write(model)
+            assert onedigit.cli.verify(store, processes=1)
+
+            model.state[25] = onedigit.Combo(value=25, cost=2, expr_full="5 + 5", expr_simple="5 + 5")
+            with open(filename, mode="w", encoding="utf-8") as fp:
+                json.dump(model.asdict(), fp)
+            assert not onedigit.cli.verify(filename)
+            assert not onedigit.cli.verify(os.path.join(tmpdir, "none.json"))